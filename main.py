@@ -1,21 +1,27 @@
-import pandas as pd
-from utils.data_loader import DataLoader
-from strategies.regime_detector import RegimeDetector
-from strategies.maotai_t_strategy import MaotaiTStrategy
-import matplotlib.pyplot as plt
+import argparse
+import sys
+from utils.profiler import profiled, stage
+
+# 各子命令只在执行时导入所需模块，避免无关的 akshare / matplotlib / 回测模块导入开销
+
+
+def run_signal(days=365, offline=False, plot=False, replay=None, lean=False):
+    import pandas as pd
+    from utils.data_loader import DataLoader
+    from strategies.regime_detector import RegimeDetector
+    from strategies.maotai_t_strategy import MaotaiTStrategy
 
-def main():
     print("=== 茅台持仓增强器 (Maotai Holding Enhancer) v1.0 ===")
-    
+
     # 1. 初始化
-    loader = DataLoader()
-    detector = RegimeDetector()
-    strategy = MaotaiTStrategy()
-    
+    loader = DataLoader(cache_dir="data_cache", offline=offline, replay=replay)
+    detector = RegimeDetector(lean=lean)
+    strategy = MaotaiTStrategy(lean=lean)
+
     # 2. 获取数据 (获取过去一年的数据进行演示)
     end_date = pd.Timestamp.now().strftime('%Y%m%d')
-    start_date = (pd.Timestamp.now() - pd.Timedelta(days=365)).strftime('%Y%m%d')
-    
+    start_date = (pd.Timestamp.now() - pd.Timedelta(days=days)).strftime('%Y%m%d')
+
     try:
         df = loader.get_daily_data(start_date, end_date)
     except Exception as e:
@@ -24,10 +30,10 @@ def main():
 
     # 3. 市场状态识别
     df = detector.detect(df)
-    
+
     # 4. 生成策略信号
     df = strategy.generate_signals(df)
-    
+
     # 5. 输出最近的建议
     latest = df.iloc[-1]
     print("\n--- 最新市场分析 ---")
@@ -35,7 +41,7 @@ def main():
     print(f"当前收盘价: {latest['close']:.2f}")
     print(f"市场状态: {latest['regime']}")
     print(f"建议做T仓位: {latest['suggested_t_pos']*100:.0f}%")
-    
+
     if latest['signal'] == -1:
         print("操作建议: 【卖出/减仓】 触发日内高位信号，建议执行替代操作。")
     elif latest['signal'] == 1:
@@ -43,20 +49,200 @@ def main():
     else:
         print("操作建议: 【持有】 当前无明确做T信号，建议死拿。")
 
-    # 6. 简单可视化 (保存到文件)
-    plt.figure(figsize=(12, 6))
-    plt.plot(df.index, df['close'], label='Maotai Close')
-    plt.title('Maotai Price and Market Regimes')
-    
-    # 用不同颜色背景表示不同状态
-    colors = {'Risk-On': 'green', 'Volatile': 'yellow', 'Risk-Off': 'red', 'Low-Liquidity': 'gray'}
-    for regime, color in colors.items():
-        mask = df['regime'] == regime
-        plt.fill_between(df.index, df['low'].min(), df['high'].max(), where=mask, color=color, alpha=0.2, label=regime)
-    
-    plt.legend()
-    plt.savefig('maotai_analysis.png')
-    print("\n分析图表已保存为 'maotai_analysis.png'")
+    # 6. 简单可视化 (可选，保存到文件)
+    if plot:
+        from utils.reporting import render_report
+        with stage('plot'):
+            render_report('maotai_analysis.png', [{
+                'lines': {'Maotai Close': df['close']},
+                'regime': df['regime'],
+                'title': 'Maotai Price and Market Regimes',
+            }], width=12, height_per_panel=6)
+        print("\n分析图表已保存为 'maotai_analysis.png'")
+
+
+def run_import(days=3650, store="bar_store", minute=("1",)):
+    """
+    从 AkShare 一次性导入茅台日/周/月线、沪深300 指数及分钟线到本地 BarStore，之后可用 --replay 离线回放
+    """
+    import pandas as pd
+    from utils.data_loader import DataLoader
+    from utils.providers import import_bars
+
+    loader = DataLoader()
+    end_date = pd.Timestamp.now().strftime('%Y%m%d')
+    start_date = (pd.Timestamp.now() - pd.Timedelta(days=days)).strftime('%Y%m%d')
+    counts = import_bars(store, [loader.symbol], start_date, end_date, index_symbols=[loader.index_symbol],
+                         minute_periods=minute, provider=loader.provider)
+    for (symbol, period), n in counts.items():
+        print(f"{symbol} {period}: {n} 根K线")
+    print(f"\n已导入到 '{store}'，使用 --replay {store} 离线回放")
+
+
+def run_daily(days=730, offline=False, replay=None, checkpoint="daily_job.pkl", journal="daily_job.csv"):
+    """
+    收盘后日常任务：读取检查点，只拉取检查点之后的新K线并逐根推进状态，逐日结果追加到 journal
+    首次运行 (无检查点) 时用最近 days 天的历史初始化
+    """
+    import os
+    import pandas as pd
+    from utils.data_loader import DataLoader
+    from utils.data_cache import DataCache
+    from strategies.daily_job import DailyJob
+    from strategies.metrics import format_metrics
+
+    print("=== 茅台持仓增强器：收盘后日常任务 ===")
+    loader = DataLoader(cache_dir="data_cache", offline=offline, replay=replay)
+    # 只推进已确认收盘的K线：当天K线可能未走完，写入检查点后不会再被修正，留到下次运行
+    end = DataCache._complete_until(pd.Timestamp.now().normalize())
+    resume = os.path.exists(checkpoint)
+    if resume:
+        job = DailyJob.load(checkpoint)
+        start = job.last_date + pd.Timedelta(days=1)
+    else:
+        job = DailyJob()
+        start = end - pd.Timedelta(days=days)
+
+    rows = pd.DataFrame()
+    if start <= end:
+        with stage('fetch'):
+            daily_df = loader.get_daily_data(start.strftime('%Y%m%d'), end.strftime('%Y%m%d'))
+        with stage('update'):
+            rows = job.extend(daily_df)
+    if len(rows):
+        # 首次运行重写 journal，之后只追加新行
+        append = resume and os.path.exists(journal)
+        rows.to_csv(journal, mode='a' if append else 'w', header=not append)
+        job.save(checkpoint)
+    print(f"新增 {len(rows)} 根K线，检查点日期: {job.last_date.strftime('%Y-%m-%d')}")
+
+    latest = job.latest
+    print("\n--- 最新市场分析 ---")
+    print(f"当前收盘价: {latest['close']:.2f}")
+    print(f"市场状态: {latest['regime']}")
+    print(f"建议做T仓位: {latest['suggested_t_pos']*100:.0f}%")
+    print(f"次日多周期预测: {latest['action']}")
+    if latest['action'] != 'Wait':
+        print(f"建议买入价: {latest['buy_price']:.2f}")
+        print(f"建议卖出价: {latest['sell_price']:.2f}")
+
+    print("\n--- 累计双向做T指标 ---")
+    metrics = job.metrics.result()
+    display = {k: metrics[k] for k in ['trade_days', 'success_trades', 'win_rate', 'strategy_final',
+                                       'benchmark_final', 'alpha', 'max_drawdown', 'sharpe']}
+    for k, v in format_metrics(display).items():
+        print(f"{k}: {v}")
+    return job
+
+
+def run_stress(days=365 * 6, offline=False, replay=None, paths=2000, block=20, horizon=None, seed=None):
+    """
+    分块自助法压力测试：在模拟行情路径上批量运行 状态识别 -> 做T信号 -> 回测，输出相对死拿的超额收益分布
+    """
+    import pandas as pd
+    from utils.data_loader import DataLoader
+    from utils.results_store import ResultsStore
+    from strategies.stress_test import StressTest
+
+    print("=== 茅台持仓增强器：分块自助法压力测试 ===")
+    loader = DataLoader(cache_dir="data_cache", offline=offline, replay=replay)
+    end_date = pd.Timestamp.now().strftime('%Y%m%d')
+    start_date = (pd.Timestamp.now() - pd.Timedelta(days=days)).strftime('%Y%m%d')
+    daily_df = loader.get_daily_data(start_date, end_date)
+
+    stress = StressTest(n_paths=paths, n_days=horizon, block_size=block, seed=seed)
+    with stage('stress'):
+        result = stress.run(daily_df)
+
+    columns = ['total_return', 'benchmark_return', 'alpha', 'max_drawdown', 'sharpe', 'win_rate']
+    print(f"\n--- {paths} 条模拟路径 (块长 {block} 日) ---")
+    print(result['summary'][columns].to_string(float_format='{:.4f}'.format))
+    historical = result['historical']
+    print(f"\n历史实际路径: 策略收益 {historical['total_return']:.2%}，死拿收益 {historical['benchmark_return']:.2%}，"
+          f"超额 {historical['alpha']:.2%}")
+    print(f"跑赢死拿的路径比例: {result['prob_outperform']:.2%}")
+
+    run_id = ResultsStore("results").save(
+        result['metrics'], 'stress', params={'paths': paths, 'block': block, 'horizon': horizon, 'seed': seed},
+        metrics={'prob_outperform': result['prob_outperform'], **historical.add_prefix('historical_').to_dict()})
+    print(f"\n逐路径指标已保存到结果库 'results/'，运行编号 {run_id}")
+    return result
+
+
+# 参数由对应脚本自行解析的子命令
+FORWARDED = ('sweep', 'walk-forward')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="茅台持仓增强器 (Maotai Holding Enhancer)")
+    sub = parser.add_subparsers(dest='command')
+
+    def common(p, days):
+        p.add_argument('--days', type=int, default=days, help="数据区间 (自然日)")
+        p.add_argument('--offline', action='store_true', help="只使用本地缓存数据，不访问网络")
+        p.add_argument('--plot', action='store_true', help="输出图表 (Agg 后端写 PNG)")
+        p.add_argument('--replay', default=None, help="从本地 BarStore 目录回放行情 (见 import 子命令)")
+        p.add_argument('--lean', action='store_true', help="精简内存模式：中间量不落为列，分类/float32 存储")
+
+    common(sub.add_parser('signal', help="最新市场状态及做T建议 (默认)"), 365)
+    common(sub.add_parser('backtest', help="状态识别 + 做T信号回测"), 730)
+    common(sub.add_parser('multi-period', help="多周期预测 + 双向做T回测"), 730)
+    imp = sub.add_parser('import', help="从 AkShare 导入行情到本地回放库")
+    imp.add_argument('--days', type=int, default=3650, help="日/周/月线区间 (自然日)")
+    imp.add_argument('--store', default='bar_store', help="BarStore 目录")
+    imp.add_argument('--minute', nargs='*', default=['1'], help="分钟线周期 (AkShare 只提供最近几个交易日)")
+    daily = sub.add_parser('daily', help="收盘后日常任务：从检查点增量推进一根K线")
+    daily.add_argument('--days', type=int, default=730, help="首次运行 (无检查点) 时的历史区间 (自然日)")
+    daily.add_argument('--offline', action='store_true', help="只使用本地缓存数据，不访问网络")
+    daily.add_argument('--replay', default=None, help="从本地 BarStore 目录回放行情 (见 import 子命令)")
+    daily.add_argument('--checkpoint', default='daily_job.pkl', help="检查点文件")
+    daily.add_argument('--journal', default='daily_job.csv', help="逐日结果追加写入的 CSV")
+    stress = sub.add_parser('stress', help="分块自助法压力测试：模拟路径上的超额收益分布")
+    stress.add_argument('--days', type=int, default=365 * 6, help="用于重抽样的历史区间 (自然日)")
+    stress.add_argument('--offline', action='store_true', help="只使用本地缓存数据，不访问网络")
+    stress.add_argument('--replay', default=None, help="从本地 BarStore 目录回放行情 (见 import 子命令)")
+    stress.add_argument('--paths', type=int, default=2000, help="模拟路径数")
+    stress.add_argument('--block', type=int, default=20, help="重抽样块长 (交易日)")
+    stress.add_argument('--horizon', type=int, default=None, help="每条路径的交易日数，默认与历史等长")
+    stress.add_argument('--seed', type=int, default=None, help="随机种子")
+    sub.add_parser('sweep', help="参数扫描 (参数见 run_sweep.py --help)", add_help=False)
+    sub.add_parser('walk-forward', help="滚动前推验证 (参数见 run_walk_forward.py --help)", add_help=False)
+    return parser
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # 不带子命令时 (如 python3 main.py --offline) 默认为 signal
+    if not argv or (argv[0].startswith('-') and argv[0] not in ('-h', '--help')):
+        argv.insert(0, 'signal')
+
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command not in FORWARDED:
+        parser.error(f"未知参数: {' '.join(extra)}")
+
+    with profiled():
+        if args.command == 'signal':
+            run_signal(args.days, args.offline, args.plot, args.replay, args.lean)
+        elif args.command == 'backtest':
+            from run_backtest import run_analysis
+            run_analysis(args.days, args.offline, args.plot, args.replay, args.lean)
+        elif args.command == 'multi-period':
+            from run_multi_period_backtest import run_multi_period_analysis
+            run_multi_period_analysis(args.days, args.offline, args.plot, args.replay, args.lean)
+        elif args.command == 'import':
+            run_import(args.days, args.store, args.minute)
+        elif args.command == 'daily':
+            run_daily(args.days, args.offline, args.replay, args.checkpoint, args.journal)
+        elif args.command == 'stress':
+            run_stress(args.days, args.offline, args.replay, args.paths, args.block, args.horizon, args.seed)
+        elif args.command == 'sweep':
+            from run_sweep import run_sweep
+            run_sweep(extra)
+        elif args.command == 'walk-forward':
+            from run_walk_forward import run_walk_forward
+            run_walk_forward(extra)
+
 
 if __name__ == "__main__":
     main()
@@ -1,22 +1,26 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 from utils.data_loader import DataLoader
 from strategies.regime_detector import RegimeDetector
-from strategies.maotai_t_strategy import MaotaiTStrategy
+from strategies.maotai_t_strategy import MaotaiTStrategy, Backtester
 from strategies.backtester_v2 import BacktesterV2
+from utils.bar_store import BarStore
+from utils.microstructure import minute_features
+from utils.results_store import ResultsStore
+from utils.reporting import render_report
+from utils.profiler import stage
 
-def run_analysis():
+def run_analysis(days=730, offline=False, plot=False, replay=None, lean=False):
     print("=== 茅台持仓增强器：近两年深度回测分析 ===")
     
     # 1. 初始化
-    loader = DataLoader()
-    detector = RegimeDetector()
-    strategy = MaotaiTStrategy()
-    backtester = BacktesterV2()
+    loader = DataLoader(cache_dir="data_cache", offline=offline, replay=replay)
+    detector = RegimeDetector(lean=lean)
+    strategy = MaotaiTStrategy(lean=lean)
+    backtester = BacktesterV2(lean=lean)
     
     # 2. 获取近两年数据 (约 500 个交易日)
     end_date = pd.Timestamp.now().strftime('%Y%m%d')
-    start_date = (pd.Timestamp.now() - pd.Timedelta(days=730)).strftime('%Y%m%d')
+    start_date = (pd.Timestamp.now() - pd.Timedelta(days=days)).strftime('%Y%m%d')
     
     df = loader.get_daily_data(start_date, end_date)
     
@@ -31,33 +35,51 @@ def run_analysis():
     print("\n--- 回测指标统计 ---")
     for k, v in metrics.items():
         print(f"{k}: {v}")
+
+    # 上述指标只是一次随机胜负序列的结果，蒙特卡洛给出其分布
+    mc = backtester.run_monte_carlo(df, n_paths=10000, seed=0)
+    print("\n--- 蒙特卡洛分布 (10000 条路径) ---")
+    print(mc['summary'][['total_return', 'max_drawdown', 'sharpe', 'win_rate']].to_string(float_format='{:.4f}'.format))
+
+    # 按信号实际调仓的持仓回测 (收盘价成交，含佣金及印花税)
+    position = Backtester(backtester.initial_capital).run(df)
+    print("\n--- 持仓回测 (按信号调仓) ---")
+    for k, v in backtester.calculate_metrics(position)[0].items():
+        print(f"{k}: {v}")
+
+    # 本地已积累分钟线时 (回放模式下为回放库中的分钟线)，改用分钟线实测的日内往返价差计算做T收益
+    store = BarStore(replay or "bar_store")
+    if store.exists(loader.symbol, '1'):
+        features = minute_features(store, loader.symbol, '1', start_date, end_date)
+        measured_df = df[['high', 'low', 'close', 'regime', 'signal', 'suggested_t_pos']].join(features)
+        measured_model = BacktesterV2(backtester.initial_capital, backtester.t_cost, profit_model='measured')
+        measured_df = measured_model.run(measured_df)
+        print(f"\n--- 分钟线实测做T收益 (覆盖 {measured_df['long_spread'].notna().sum()} 个交易日) ---")
+        for k, v in measured_model.calculate_metrics(measured_df)[0].items():
+            print(f"{k}: {v}")
         
-    # 5. 可视化
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10), gridspec_kw={'height_ratios': [3, 1]})
-    
-    # 净值曲线
-    ax1.plot(df.index, df['benchmark_nav'], label='Benchmark (Hold Maotai)', color='gray', alpha=0.6)
-    ax1.plot(df.index, df['strategy_nav'], label='Strategy (Maotai Enhancer)', color='blue', linewidth=2)
-    ax1.set_title('Maotai Holding Enhancer: 2-Year Backtest (NAV Comparison)')
-    ax1.set_ylabel('Normalized Value')
-    ax1.legend()
-    ax1.grid(True, alpha=0.3)
-    
-    # 回撤曲线
-    ax2.fill_between(df.index, drawdown, 0, color='red', alpha=0.3, label='Strategy Drawdown')
-    ax2.set_title('Strategy Maximum Drawdown')
-    ax2.set_ylabel('Drawdown')
-    ax2.set_ylim(-0.5, 0.05)
-    ax2.legend()
-    ax2.grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    plt.savefig('backtest_report.png')
-    print("\n回测报告图表已保存为 'backtest_report.png'")
-    
-    # 保存详细数据到 CSV
-    df.to_csv('backtest_results.csv')
-    print("详细回测数据已保存为 'backtest_results.csv'")
+    # 5. 可视化 (可选)
+    if plot:
+        with stage('plot'):
+            render_report('backtest_report.png', [
+                {'lines': {'Benchmark (Hold Maotai)': (df['benchmark_nav'], {'color': 'gray', 'alpha': 0.6}),
+                           'Strategy (Maotai Enhancer)': (df['strategy_nav'], {'color': 'blue', 'linewidth': 2})},
+                 'title': 'Maotai Holding Enhancer: 2-Year Backtest (NAV Comparison)',
+                 'ylabel': 'Normalized Value', 'height': 3},
+                {'fill': (drawdown, {'color': 'red', 'alpha': 0.3, 'label': 'Strategy Drawdown'}),
+                 'title': 'Strategy Maximum Drawdown', 'ylabel': 'Drawdown', 'ylim': (-0.5, 0.05)},
+            ], height_per_panel=2.5)
+        print("\n回测报告图表已保存为 'backtest_report.png'")
+
+    # 保存详细数据到列式结果库
+    run_id = ResultsStore("results").save(
+        df, 'regime', params={'detector.window': detector.window,
+                            **{f'strategy.{k}': v for k, v in strategy.config.items()},
+                            'backtester.t_cost': backtester.t_cost},
+        metrics=backtester.metrics(df))
+    print(f"\n详细回测数据已保存到结果库 'results/'，运行编号 {run_id}")
 
 if __name__ == "__main__":
-    run_analysis()
+    import sys
+    from main import main
+    main(['backtest'] + sys.argv[1:])
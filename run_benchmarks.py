@@ -0,0 +1,179 @@
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.synthetic_data import generate_multi_period, generate_minute
+from utils.bar_store import BarStore
+from utils.microstructure import minute_features
+from utils.resample import AGGREGATIONS
+from strategies.regime_detector import RegimeDetector
+from strategies.maotai_t_strategy import MaotaiTStrategy
+from strategies.backtester_v2 import BacktesterV2
+from strategies.multi_period_predictor import MultiPeriodPredictor
+from strategies.t_plus_0_backtester import TPlus0Backtester, PREDICTION_DTYPE, ACTION_CODES
+from strategies.intraday_simulator import IntradayFillSimulator
+
+DEFAULT_SIZES = [500, 5000, 50000, 1000000]
+
+# 参考实现 (逐行/逐日循环) 复杂度高，只在小规模下计时
+REFERENCE_MAX_SIZE = 5000
+PREDICTOR_REFERENCE_MAX_SIZE = 1000  # 逐日截取循环为 O(n^2)
+
+# 分钟线基准：size 为分钟K线根数，每个交易日 240 根
+MINUTE_BARS_PER_DAY = 240
+
+
+def predict_loop_reference(predictor, daily_df, weekly_df, monthly_df):
+    """
+    run_multi_period_backtest.py 原有的逐日截取历史预测循环
+    """
+    predictions = []
+    for i in range(len(daily_df)):
+        current_date = daily_df.index[i]
+        d_sub = daily_df.iloc[:i+1]
+        w_sub = weekly_df[weekly_df.index <= current_date]
+        m_sub = monthly_df[monthly_df.index <= current_date]
+        if len(d_sub) < 20 or len(w_sub) < 5 or len(m_sub) < 2:
+            predictions.append({'action': 'Wait'})
+            continue
+        predictions.append(predictor.predict_next_day(d_sub, w_sub, m_sub))
+    return predictions
+
+
+def _timeit(func, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _recorder(records, n, repeat):
+    def record(stage, func):
+        seconds, result = _timeit(func, repeat)
+        records.append({'stage': stage, 'size': n, 'seconds': seconds})
+        print(f"{stage:<36}{n:>10}{seconds:>12.4f}s")
+        return result
+    return record
+
+
+def benchmark_size(n, repeat=3, seed=0):
+    """
+    对单一数据规模逐阶段计时，返回 [{stage, size, seconds}]
+    """
+    daily, weekly, monthly = generate_multi_period(n, seed)
+    detector = RegimeDetector()
+    strategy = MaotaiTStrategy()
+    backtester = BacktesterV2()
+    predictor = MultiPeriodPredictor()
+    t0_backtester = TPlus0Backtester()
+
+    records = []
+    record = _recorder(records, n, repeat)
+
+    detected = record('RegimeDetector.detect', lambda: detector.detect(daily.copy()))
+    signals = record('MaotaiTStrategy.generate_signals', lambda: strategy.generate_signals(detected.copy()))
+    result = record('BacktesterV2.run', lambda: backtester.run(signals))
+    record('BacktesterV2.calculate_metrics', lambda: backtester.calculate_metrics(result))
+    if n <= REFERENCE_MAX_SIZE:
+        record('BacktesterV2.run_reference', lambda: backtester.run_reference(signals))
+
+    lean = (RegimeDetector(lean=True), MaotaiTStrategy(lean=True), BacktesterV2(lean=True))
+    record('Pipeline (lean)', lambda: lean[2].run(lean[1].generate_signals(lean[0].detect(daily.copy()))))
+
+    predictions = record('MultiPeriodPredictor.predict_series',
+                         lambda: predictor.predict_series(daily, weekly, monthly))
+    record('MultiPeriodPredictor.predict_array', lambda: predictor.predict_array(daily, weekly, monthly))
+    if n <= PREDICTOR_REFERENCE_MAX_SIZE:
+        record('MultiPeriodPredictor.loop_reference',
+               lambda: predict_loop_reference(predictor, daily, weekly, monthly))
+
+    record('TPlus0Backtester.run', lambda: t0_backtester.run(daily, predictions))
+    return records
+
+
+def benchmark_minute(n, repeat=3, seed=0):
+    """
+    分钟线阶段计时 (n 根 1 分钟K线，写入临时 BarStore)：存储写入、微结构特征聚合、分钟级成交模拟
+    成交模拟使用以前收盘价 ±0.5% 为买/卖价的合成 RangeT 预测，保证每天都有挂单
+    """
+    minute = generate_minute(max(1, n // MINUTE_BARS_PER_DAY), seed)
+    daily = minute.groupby(minute.index.normalize()).agg(AGGREGATIONS)
+    preds = np.empty(len(daily), dtype=PREDICTION_DTYPE)
+    preds['action'] = ACTION_CODES['RangeT']
+    preds['buy_price'] = daily['close'].to_numpy() * 0.995
+    preds['sell_price'] = daily['close'].to_numpy() * 1.005
+
+    records = []
+    record = _recorder(records, len(minute), repeat)
+    with tempfile.TemporaryDirectory() as root:
+        store = BarStore(root)
+        record('BarStore.write (minute)', lambda: store.write('sh600519', '1', minute, append=False))
+        record('minute_features (BarStore)', lambda: minute_features(store, 'sh600519'))
+        simulator = IntradayFillSimulator(store, 'sh600519')
+        record('IntradayFillSimulator.run', lambda: simulator.run(daily, preds))
+    return records
+
+
+def _metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'timestamp': pd.Timestamp.now().isoformat(),
+        'git_commit': commit or None,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+    }
+
+
+def compare(current, baseline_path):
+    """
+    与历史结果文件对比，打印各阶段耗时比 (>1 表示变慢)
+    """
+    with open(baseline_path) as f:
+        baseline = {(r['stage'], r['size']): r['seconds'] for r in json.load(f)['results']}
+    print(f"\n--- 与 {baseline_path} 对比 (当前 / 基线) ---")
+    for r in current:
+        base = baseline.get((r['stage'], r['size']))
+        if base:
+            print(f"{r['stage']:<36}{r['size']:>10}{r['seconds'] / base:>10.2f}x")
+
+
+def run_benchmarks(argv=None):
+    parser = argparse.ArgumentParser(description="茅台持仓增强器：离线性能基准")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=3, help="每阶段重复次数，取最快一次")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', default=None, help="与之前的基准结果文件对比")
+    args = parser.parse_args(argv)
+
+    print("=== 茅台持仓增强器：离线性能基准 (合成数据) ===")
+    records = []
+    for n in args.sizes:
+        records.extend(benchmark_size(n, args.repeat))
+    for n in args.sizes:
+        records.extend(benchmark_minute(n, args.repeat))
+
+    with open(args.output, 'w') as f:
+        json.dump({'meta': _metadata(), 'results': records}, f, indent=2)
+    print(f"\n基准结果已保存为 '{args.output}'")
+
+    if args.compare:
+        compare(records, args.compare)
+    return records
+
+
+if __name__ == "__main__":
+    run_benchmarks()
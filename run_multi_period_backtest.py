@@ -1,81 +1,94 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 from utils.data_loader import DataLoader
 from strategies.multi_period_predictor import MultiPeriodPredictor
-from strategies.t_plus_0_backtester import TPlus0Backtester
+from strategies.t_plus_0_backtester import TPlus0Backtester, to_prediction_array, ACTIONS
+from strategies.intraday_simulator import IntradayFillSimulator
+from strategies.metrics import trade_code_metrics, trade_codes, multi_period_metrics, format_metrics
+from utils.bar_store import BarStore
+from utils.results_store import ResultsStore
+from utils.reporting import render_report
+from utils.profiler import stage
 
-def run_multi_period_analysis():
+def run_multi_period_analysis(days=730, offline=False, plot=False, replay=None, lean=False):
     print("=== 茅台持仓增强器：多周期高胜率回测 (v2.0) ===")
     
     # 1. 初始化
-    loader = DataLoader()
+    loader = DataLoader(cache_dir="data_cache", offline=offline, replay=replay)
     predictor = MultiPeriodPredictor()
     backtester = TPlus0Backtester()
     
     # 2. 获取数据 (获取过去两年的数据)
     end_date = pd.Timestamp.now().strftime('%Y%m%d')
-    start_date = (pd.Timestamp.now() - pd.Timedelta(days=730)).strftime('%Y%m%d')
+    start_date = (pd.Timestamp.now() - pd.Timedelta(days=days)).strftime('%Y%m%d')
     
     daily_df, weekly_df, monthly_df = loader.get_multi_period_data(start_date, end_date)
     
     # 3. 生成每日预测
     # 我们需要模拟真实情况：每天收盘后，基于当时的数据预测明天
-    predictions = []
-    for i in range(len(daily_df)):
-        # 截取到当前日期的数据
-        current_date = daily_df.index[i]
-        d_sub = daily_df.iloc[:i+1]
-        w_sub = weekly_df[weekly_df.index <= current_date]
-        m_sub = monthly_df[monthly_df.index <= current_date]
-        
-        if len(d_sub) < 20 or len(w_sub) < 5 or len(m_sub) < 2:
-            # 数据不足，跳过
-            predictions.append({'action': 'Wait'})
-            continue
-            
-        pred = predictor.predict_next_day(d_sub, w_sub, m_sub)
-        predictions.append(pred)
+    # 增量模式单次遍历，每根K线 O(1) 更新滚动窗口状态；精简模式直接输出结构化数组
+    if lean:
+        predictions = predictor.predict_array(daily_df, weekly_df, monthly_df)
+    else:
+        predictions = predictor.predict_series(daily_df, weekly_df, monthly_df)
     
     # 4. 执行回测
     res_df = backtester.run(daily_df, predictions)
+
+    # 本地已积累分钟线时 (回放模式下为回放库中的分钟线)，按分钟K线触价先后重新模拟成交
+    store = BarStore(replay or "bar_store")
+    if store.exists(loader.symbol, '1'):
+        intraday_df = IntradayFillSimulator(store, loader.symbol).run(daily_df, predictions)
+        covered = intraday_df['minute_bars'] > 0
+        print(f"\n--- 分钟级成交模拟 (覆盖 {covered.sum()} 个交易日) ---")
+        daily_stats = trade_code_metrics(trade_codes(res_df.loc[covered, 'trade_type']))
+        intraday_stats = trade_code_metrics(trade_codes(intraday_df.loc[covered, 'trade_type']))
+        print(f"日线口径成功次数: {daily_stats['success_trades']}")
+        print(f"分钟口径成功次数: {intraday_stats['success_trades']}")
     
     # 5. 计算指标
-    total_days = len(res_df)
-    trade_days = len(res_df[res_df['trade_type'] != 'None'])
-    success_trades = len(res_df[res_df['trade_type'].str.contains('Success', na=False)])
-    win_rate = success_trades / trade_days if trade_days > 0 else 0
-    
-    strategy_final = res_df['total_value'].iloc[-1]
-    bench_final = res_df['benchmark_value'].iloc[-1]
-    alpha = (strategy_final - bench_final) / bench_final
-    
+    metrics = multi_period_metrics(res_df, backtester.initial_value)
+
     print("\n--- 多周期回测指标 ---")
-    print(f"总交易天数: {total_days}")
-    print(f"实际做T天数: {trade_days}")
-    print(f"做T成功次数: {success_trades}")
-    print(f"做T成功率: {win_rate*100:.2f}%")
-    print(f"策略最终价值: {strategy_final:.2f}")
-    print(f"基准最终价值: {bench_final:.2f}")
-    print(f"超额收益 (Alpha): {alpha*100:.2f}%")
-    
-    # 6. 可视化
-    plt.figure(figsize=(14, 7))
-    plt.plot(res_df.index, res_df['benchmark_value'], label='Benchmark (Hold + Cash)', color='gray', alpha=0.6)
-    plt.plot(res_df.index, res_df['total_value'], label='Strategy (Multi-Period T+0)', color='red', linewidth=2)
-    plt.title('Maotai Multi-Period T+0 Strategy: 2-Year Backtest')
-    plt.ylabel('Total Asset Value')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.savefig('multi_period_backtest.png')
+    print(f"总交易天数: {len(res_df)}")
+    print(f"实际做T天数: {metrics['trade_days']}")
+    display = {k: metrics[k] for k in ['success_trades', 'win_rate', 'strategy_final', 'benchmark_final',
+                                       'alpha', 'max_drawdown', 'sharpe', 'sortino']}
+    for k, v in format_metrics(display).items():
+        print(f"{k}: {v}")
     
+    # 保存逐日结果 (附当日所用的预测) 到列式结果库
+    preds = to_prediction_array(predictions)
+    used = preds[:-1]
+    stored = res_df.assign(action=pd.Categorical.from_codes(used['action'], ACTIONS),
+                           buy_price=used['buy_price'], sell_price=used['sell_price'])
+    run_id = ResultsStore("results").save(
+        stored, 'multi_period',
+        params={'predictor.atr_multiplier': predictor.atr_multiplier,
+                'predictor.atr_window': predictor.atr_window, 'backtester.fee': backtester.fee},
+        metrics=metrics)
+    print(f"\n逐日结果已保存到结果库 'results/'，运行编号 {run_id}")
+
+    # 6. 可视化 (可选)
+    if plot:
+        with stage('plot'):
+            render_report('multi_period_backtest.png', [{
+                'lines': {'Benchmark (Hold + Cash)': (res_df['benchmark_value'], {'color': 'gray', 'alpha': 0.6}),
+                          'Strategy (Multi-Period T+0)': (res_df['total_value'], {'color': 'red', 'linewidth': 2})},
+                'title': 'Maotai Multi-Period T+0 Strategy: 2-Year Backtest',
+                'ylabel': 'Total Asset Value',
+            }], height_per_panel=7)
+        print("\n图表已保存为 'multi_period_backtest.png'")
+
     # 输出明日预测 (示例)
-    latest_pred = predictions[-1]
+    latest_pred = preds[-1]
     print("\n--- 明日操作预测 ---")
     print(f"预测日期: {pd.Timestamp.now().strftime('%Y-%m-%d')}")
-    print(f"建议动作: {latest_pred['action']}")
-    if latest_pred['buy_price']:
+    print(f"建议动作: {ACTIONS[latest_pred['action']]}")
+    if pd.notna(latest_pred['buy_price']):
         print(f"建议买入价: {latest_pred['buy_price']:.2f}")
         print(f"建议卖出价: {latest_pred['sell_price']:.2f}")
 
 if __name__ == "__main__":
-    run_multi_period_analysis()
+    import sys
+    from main import main
+    main(['multi-period'] + sys.argv[1:])
@@ -0,0 +1,57 @@
+import argparse
+import ast
+import pandas as pd
+from utils.data_loader import DataLoader
+from strategies.param_sweep import ParameterSweep, PIPELINES
+from utils.results_store import ResultsStore
+
+
+def parse_param(text):
+    """
+    解析 "strategy.volatile_t_ratio=0.3,0.5,0.7" 形式的参数网格
+    """
+    name, _, values = text.partition('=')
+    if not values:
+        raise argparse.ArgumentTypeError(f"参数格式应为 name=v1,v2,...: {text}")
+    parsed = []
+    for v in values.split(','):
+        try:
+            parsed.append(ast.literal_eval(v))
+        except (ValueError, SyntaxError):
+            parsed.append(v)
+    return name.strip(), parsed
+
+
+def run_sweep(argv=None):
+    parser = argparse.ArgumentParser(description="茅台持仓增强器：参数扫描")
+    parser.add_argument('--pipeline', choices=PIPELINES, default='regime')
+    parser.add_argument('--param', type=parse_param, action='append', default=[],
+                        help="参数网格，例如 detector.window=10,20,30 (可重复)")
+    parser.add_argument('--days', type=int, default=730, help="回测区间 (自然日)")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认 CPU 核数")
+    parser.add_argument('--output', default='sweep_results.csv')
+    parser.add_argument('--offline', action='store_true', help="只使用本地缓存数据")
+    parser.add_argument('--replay', default=None, help="从本地 BarStore 目录回放行情 (见 main.py import)")
+    args = parser.parse_args(argv)
+
+    print(f"=== 茅台持仓增强器：参数扫描 ({args.pipeline}) ===")
+    grid = dict(args.param)
+
+    # 行情只加载一次
+    loader = DataLoader(cache_dir="data_cache", offline=args.offline, replay=args.replay)
+    end_date = pd.Timestamp.now().strftime('%Y%m%d')
+    start_date = (pd.Timestamp.now() - pd.Timedelta(days=args.days)).strftime('%Y%m%d')
+    daily_df, weekly_df, monthly_df = loader.get_multi_period_data(start_date, end_date)
+
+    sweep = ParameterSweep(args.pipeline, max_workers=args.workers)
+    results = sweep.run(grid, daily_df, weekly_df, monthly_df)
+
+    print(results.to_string())
+    results.to_csv(args.output, index=False)
+    run_id = ResultsStore("results").save(results, 'sweep', params={'pipeline': args.pipeline, 'grid': grid})
+    print(f"\n扫描结果已保存为 '{args.output}'，并写入结果库 'results/' (运行编号 {run_id})")
+    return results
+
+
+if __name__ == "__main__":
+    run_sweep()
@@ -0,0 +1,62 @@
+import argparse
+import pandas as pd
+from utils.data_loader import DataLoader
+from strategies.param_sweep import PIPELINES
+from strategies.walk_forward import WalkForward
+from run_sweep import parse_param
+from utils.reporting import render_report
+
+
+def run_walk_forward(argv=None):
+    parser = argparse.ArgumentParser(description="茅台持仓增强器：滚动前推验证")
+    parser.add_argument('--pipeline', choices=PIPELINES, default='regime')
+    parser.add_argument('--param', type=parse_param, action='append', default=[],
+                        help="训练期选参的参数网格，例如 strategy.volatile_t_ratio=0.3,0.5,0.7 (可重复)")
+    parser.add_argument('--days', type=int, default=365 * 6, help="历史区间 (自然日)")
+    parser.add_argument('--train', type=int, default=252, help="训练窗口 (交易日)")
+    parser.add_argument('--test', type=int, default=63, help="测试窗口 (交易日)")
+    parser.add_argument('--step', type=int, default=None, help="折间步长，默认等于测试窗口")
+    parser.add_argument('--anchored', action='store_true', help="训练起点固定，逐折扩展")
+    parser.add_argument('--objective', default=None, help="选参目标指标，默认 sharpe / alpha")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认 CPU 核数")
+    parser.add_argument('--seed', type=int, default=42, help="做T胜负随机数的基础种子，各折由此派生")
+    parser.add_argument('--output', default='walk_forward.csv')
+    parser.add_argument('--offline', action='store_true', help="只使用本地缓存数据")
+    parser.add_argument('--replay', default=None, help="从本地 BarStore 目录回放行情 (见 main.py import)")
+    parser.add_argument('--plot', action='store_true', help="输出样本外净值图 walk_forward.png")
+    args = parser.parse_args(argv)
+
+    print(f"=== 茅台持仓增强器：滚动前推验证 ({args.pipeline}) ===")
+    loader = DataLoader(cache_dir="data_cache", offline=args.offline, replay=args.replay)
+    end_date = pd.Timestamp.now().strftime('%Y%m%d')
+    start_date = (pd.Timestamp.now() - pd.Timedelta(days=args.days)).strftime('%Y%m%d')
+    daily_df, weekly_df, monthly_df = loader.get_multi_period_data(start_date, end_date)
+
+    wf = WalkForward(args.pipeline, args.train, args.test, args.step, args.anchored,
+                     args.objective, args.workers, args.seed)
+    folds, oos = wf.run(daily_df, weekly_df, monthly_df, grid=dict(args.param))
+
+    print(folds.to_string())
+    print("\n--- 样本外拼接结果 ---")
+    print(f"样本外区间: {oos.index[0].strftime('%Y-%m-%d')} ~ {oos.index[-1].strftime('%Y-%m-%d')}")
+    print(f"策略净值: {oos['strategy_nav'].iloc[-1]:.4f}")
+    print(f"基准净值: {oos['benchmark_nav'].iloc[-1]:.4f}")
+
+    folds.to_csv(args.output)
+    equity_path = args.output.replace('.csv', '_equity.csv')
+    oos.to_csv(equity_path)
+    print(f"\n逐折指标已保存为 '{args.output}'，样本外净值已保存为 '{equity_path}'")
+
+    if args.plot:
+        render_report('walk_forward.png', [{
+            'lines': {'Walk-Forward OOS Strategy': (oos['strategy_nav'], {'color': 'red'}),
+                      'Benchmark (Hold)': (oos['benchmark_nav'], {'color': 'blue', 'alpha': 0.6})},
+            'vlines': list(folds['test_from']),
+            'title': 'Walk-Forward Out-of-Sample Equity',
+        }], width=12, height_per_panel=6)
+        print("图表已保存为 'walk_forward.png'")
+    return folds, oos
+
+
+if __name__ == "__main__":
+    run_walk_forward()
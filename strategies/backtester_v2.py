@@ -1,38 +1,151 @@
 import pandas as pd
 import numpy as np
+from strategies.metrics import nav_metrics, trade_metrics, drawdown, format_metrics
 
 class BacktesterV2:
     """
     升级版回测引擎：支持做T收益计算、成功率统计及净值追踪
     """
-    def __init__(self, initial_capital=1000000, t_cost=0.0005):
+    def __init__(self, initial_capital=1000000, t_cost=0.0005, lean=False, profit_model='simulated', capture=0.5,
+                 seed=42):
         self.initial_capital = initial_capital
         self.t_cost = t_cost  # 交易手续费 (单边)
+        self.seed = seed      # 做T胜负随机数种子
+        # 精简模式：不复制输入，振幅/随机数等中间量只作临时数组，结果列直接写入 df (收益率列为 float32)
+        self.lean = lean
+        # 做T收益模型：'simulated' 为振幅比例 x 随机胜负；'measured' 使用分钟线实测的日内最大往返价差
+        # (df 需含 utils.microstructure 的 long_spread / short_spread 列)，按 capture 比例计入
+        self.profit_model = profit_model
+        self.capture = capture
+
+    # 各市场状态下的做T胜率：Volatile 70%，Risk-Off 60%，Risk-On 40%，其余 50%
+    REGIME_WIN_RATES = {'Volatile': 0.7, 'Risk-Off': 0.6, 'Risk-On': 0.4}
+    DEFAULT_WIN_RATE = 0.5
 
     def run(self, df):
         """
-        执行回测
+        执行回测 (NumPy 向量化实现)
         """
-        # 初始状态
-        df = df.copy()
-        df['benchmark_nav'] = df['close'] / df['close'].iloc[0]  # 基准净值 (死拿)
-        
-        # 策略净值追踪
-        # 核心逻辑：当 signal == -1 (卖出信号) 时，假设在当日高位卖出，低位买回，或者次日买回
-        # 由于目前是日线数据，我们简化模拟做T收益：
-        # 如果 signal != 0，则根据市场状态分配的仓位比例，获取一个“增强收益”
-        # 增强收益简化为：日内波动率 * 状态系数 * 随机胜率因子 (模拟真实做T)
-        
-        # 为了更真实，我们假设做T的收益是基于日内振幅的一个比例
-        df['amplitude'] = (df['high'] - df['low']) / df['close'].shift(1)
-        
-        # 模拟做T收益率 (基于信号和市场状态)
-        # 逻辑：在 Volatile 状态下，做T收益最高；Risk-On 状态下，做T容易卖飞，收益可能为负
-        df['t_profit'] = 0.0
-        
-        # 成功率模拟：Volatile 状态胜率 70%，Risk-Off 60%，Risk-On 40%
-        np.random.seed(42)
-        df['win_rand'] = np.random.rand(len(df))
+        if self.lean:
+            return self._run_lean(df)
+        df = self._prepare(df)
+        if self.profit_model == 'measured':
+            df['t_profit'] = self._measured_profit(df)
+            return self._finalize(df)
+
+        regime = df['regime'].to_numpy()
+        signal = df['signal'].to_numpy()
+        t_pos = df['suggested_t_pos'].to_numpy()
+        amp = df['amplitude'].to_numpy()
+        win_rand = df['win_rand'].to_numpy()
+
+        active, win_rate, gain, loss = self._trade_model(regime, signal, t_pos, amp)
+        df['t_profit'] = np.where(active, np.where(win_rand < win_rate, gain, loss), 0.0)
+
+        return self._finalize(df)
+
+    def _run_lean(self, df):
+        close = df['close'].to_numpy(dtype=np.float64)
+        prev_close = np.empty_like(close)
+        prev_close[0] = np.nan
+        prev_close[1:] = close[:-1]
+        if self.profit_model == 'measured':
+            t_profit = self._measured_profit(df)
+        else:
+            amp = (df['high'].to_numpy() - df['low'].to_numpy()) / prev_close
+            np.random.seed(self.seed)
+            active, win_rate, gain, loss = self._trade_model(df['regime'].array, df['signal'].to_numpy(),
+                                                             df['suggested_t_pos'].to_numpy(), amp)
+            t_profit = np.where(active, np.where(np.random.rand(len(df)) < win_rate, gain, loss), 0.0)
+            del amp, active, win_rate, gain, loss
+
+        stock_ret = close / prev_close - 1
+        stock_ret[np.isnan(stock_ret)] = 0.0
+        daily_ret = stock_ret + t_profit
+        df['benchmark_nav'] = close / close[0]
+        df['t_profit'] = t_profit.astype(np.float32)
+        df['stock_ret'] = stock_ret.astype(np.float32)
+        df['strategy_daily_ret'] = daily_ret.astype(np.float32)
+        df['strategy_nav'] = np.cumprod(1 + daily_ret)
+        return df
+
+    def _measured_profit(self, df):
+        """
+        实测做T收益：买回信号 (1) 对应先买后卖，卖出信号 (-1) 对应先卖后买，
+        收益 = 当日对应方向的最大往返价差 x capture x 做T仓位 - 双边手续费；无分钟线的交易日不计做T
+        """
+        signal = df['signal'].to_numpy()
+        t_pos = df['suggested_t_pos'].to_numpy()
+        spread = np.where(signal == 1, df['long_spread'].to_numpy(),
+                          np.where(signal == -1, df['short_spread'].to_numpy(), 0.0))
+        active = (signal != 0) & (t_pos > 0) & ~np.isnan(spread)
+        return np.where(active, spread * self.capture * t_pos - self.t_cost * 2, 0.0)
+
+    def _trade_model(self, regime, signal, t_pos, amp):
+        """
+        做T收益模型中与随机数无关的部分：是否做T、胜率、获利/亏损时的收益
+        """
+        # 状态 -> 胜率映射 (分类类型的状态按编码查表)
+        if isinstance(regime, pd.Categorical):
+            rates = [self.REGIME_WIN_RATES.get(r, self.DEFAULT_WIN_RATE) for r in regime.categories]
+            win_rate = np.append(rates, self.DEFAULT_WIN_RATE)[regime.codes]
+        else:
+            win_rate = np.select([regime == r for r in self.REGIME_WIN_RATES],
+                                 list(self.REGIME_WIN_RATES.values()), default=self.DEFAULT_WIN_RATE)
+
+        # 获利：捕捉到振幅的 30%；亏损：损失振幅的 20% (止损)
+        active = (signal != 0) & (t_pos > 0)
+        gain = amp * 0.3 * t_pos - self.t_cost * 2
+        loss = -amp * 0.2 * t_pos - self.t_cost * 2
+        return active, win_rate, gain, loss
+
+    def run_monte_carlo(self, df, n_paths=10000, seed=None, **kwargs):
+        """
+        蒙特卡洛模式：同时模拟 n_paths 组随机胜负序列，返回指标分布 (见 MonteCarloBacktest)
+        """
+        from strategies.monte_carlo import MonteCarloBacktest
+        return MonteCarloBacktest(self, n_paths=n_paths, seed=seed, **kwargs).run(df)
+
+    def run_panel(self, panel, regime, signal, t_pos, rng=None):
+        """
+        面板版本：所有输入均为 日期 x 标的，返回 {字段: 日期 x 标的 DataFrame}
+        默认每个标的使用与单标的回测相同的随机数序列；
+        传入 rng (np.random.Generator) 时每列独立抽取胜负随机数 (如压力测试的各条模拟路径)，
+        按 列 x 日期 顺序生成，同一 rng 分块调用时结果与分块大小无关
+        区间中途上市的标的，上市前的空收盘价以上市首日收盘价回填：资金按现金持有，净值从上市日起算
+        """
+        close = panel['close'].bfill()
+        index, columns = close.index, close.columns
+        close_v = close.to_numpy()
+
+        amp = (panel['high'] - panel['low']).to_numpy() / close.shift(1).to_numpy()
+        if rng is None:
+            np.random.seed(self.seed)
+            win_rand = np.random.rand(len(close))[:, None]
+        else:
+            win_rand = rng.random((len(columns), len(close))).T
+
+        active, win_rate, gain, loss = self._trade_model(regime.to_numpy(), signal.to_numpy(),
+                                                         t_pos.to_numpy(), amp)
+        t_profit = np.where(active, np.where(win_rand < win_rate, gain, loss), 0.0)
+
+        stock_ret = close.pct_change().fillna(0).to_numpy()
+        strategy_daily_ret = stock_ret + t_profit
+
+        frames = {
+            'benchmark_nav': close_v / close_v[0],
+            't_profit': t_profit,
+            'stock_ret': stock_ret,
+            'strategy_daily_ret': strategy_daily_ret,
+            'strategy_nav': np.cumprod(1 + strategy_daily_ret, axis=0),
+        }
+        return {k: pd.DataFrame(v, index=index, columns=columns) for k, v in frames.items()}
+
+    def run_reference(self, df):
+        """
+        执行回测 (逐行循环的参考实现，用于校验向量化结果)
+        """
+        df = self._prepare(df)
         
         # 计算每日做T增强收益
         for i in range(len(df)):
@@ -56,6 +169,32 @@ class BacktesterV2:
                     # 亏损：损失振幅的 20% (止损)
                     df.at[df.index[i], 't_profit'] = -amp * 0.2 * t_pos - self.t_cost * 2
         
+        return self._finalize(df)
+
+    def _prepare(self, df):
+        # 初始状态
+        df = df.copy()
+        df['benchmark_nav'] = df['close'] / df['close'].iloc[0]  # 基准净值 (死拿)
+        
+        # 策略净值追踪
+        # 核心逻辑：当 signal == -1 (卖出信号) 时，假设在当日高位卖出，低位买回，或者次日买回
+        # 由于目前是日线数据，我们简化模拟做T收益：
+        # 如果 signal != 0，则根据市场状态分配的仓位比例，获取一个“增强收益”
+        # 增强收益简化为：日内波动率 * 状态系数 * 随机胜率因子 (模拟真实做T)
+        
+        # 为了更真实，我们假设做T的收益是基于日内振幅的一个比例
+        df['amplitude'] = (df['high'] - df['low']) / df['close'].shift(1)
+        
+        # 模拟做T收益率 (基于信号和市场状态)
+        # 逻辑：在 Volatile 状态下，做T收益最高；Risk-On 状态下，做T容易卖飞，收益可能为负
+        df['t_profit'] = 0.0
+        
+        # 成功率模拟：Volatile 状态胜率 70%，Risk-Off 60%，Risk-On 40%
+        np.random.seed(self.seed)
+        df['win_rand'] = np.random.rand(len(df))
+        return df
+
+    def _finalize(self, df):
         # 计算策略每日总收益率 = 持仓收益率 + 做T增强收益率
         df['stock_ret'] = df['close'].pct_change().fillna(0)
         df['strategy_daily_ret'] = df['stock_ret'] + df['t_profit']
@@ -65,37 +204,24 @@ class BacktesterV2:
         
         return df
 
+    @staticmethod
+    def metrics(df):
+        """
+        数值指标 (见 strategies.metrics)
+        """
+        metrics = nav_metrics(df['strategy_nav'].to_numpy(), df['strategy_daily_ret'].to_numpy())
+        metrics['benchmark_return'] = float(df['benchmark_nav'].iloc[-1] - 1)
+        metrics.update(trade_metrics(df['t_profit'].to_numpy()))
+        return metrics
+
     def calculate_metrics(self, df):
         """
-        计算量化指标
+        计算量化指标，返回 (展示用的格式化指标, 回撤序列)
+        键及取值类型与原有输出一致 (总交易天数为 int)；索提诺比率等其他指标见 metrics()
         """
-        # 1. 总收益率
-        total_ret = df['strategy_nav'].iloc[-1] - 1
-        bench_ret = df['benchmark_nav'].iloc[-1] - 1
-        
-        # 2. 年化收益率 (假设 252 个交易日)
-        annual_ret = (1 + total_ret) ** (252 / len(df)) - 1
-        
-        # 3. 最大回撤
-        rolling_max = df['strategy_nav'].cummax()
-        drawdown = (df['strategy_nav'] - rolling_max) / rolling_max
-        max_drawdown = drawdown.min()
-        
-        # 4. 做T成功率
-        t_trades = df[df['t_profit'] != 0]
-        win_trades = t_trades[t_trades['t_profit'] > 0]
-        win_rate = len(win_trades) / len(t_trades) if len(t_trades) > 0 else 0
-        
-        # 5. 夏普比率 (假设无风险利率 2%)
-        sharpe = (df['strategy_daily_ret'].mean() * 252 - 0.02) / (df['strategy_daily_ret'].std() * np.sqrt(252))
-        
-        metrics = {
-            '策略总收益': f"{total_ret*100:.2f}%",
-            '基准总收益': f"{bench_ret*100:.2f}%",
-            '年化收益率': f"{annual_ret*100:.2f}%",
-            '最大回撤': f"{max_drawdown*100:.2f}%",
-            '做T成功率': f"{win_rate*100:.2f}%",
-            '夏普比率': f"{sharpe:.2f}",
-            '总交易天数': len(t_trades)
-        }
-        return metrics, drawdown
+        metrics = self.metrics(df)
+        order = ['total_return', 'benchmark_return', 'annual_return', 'max_drawdown', 'win_rate', 'sharpe']
+        formatted = format_metrics({k: metrics[k] for k in order})
+        formatted['总交易天数'] = int(metrics['trade_days'])
+        dd = pd.Series(drawdown(df['strategy_nav'].to_numpy()), index=df.index, name='strategy_nav')
+        return formatted, dd
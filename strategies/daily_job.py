@@ -0,0 +1,118 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from strategies.maotai_t_strategy import LiveStrategy
+from strategies.multi_period_predictor import StreamingMultiPeriodPredictor
+from strategies.t_plus_0_backtester import TPlus0Backtester, TRADE_TYPES
+from strategies.metrics import RunningMetrics
+from utils.resample import IncrementalResampler
+
+
+class DailyJob:
+    """
+    收盘后日常任务：
+    检查点保存整条链路的增量状态 (状态识别/做T信号/多周期预测的滚动窗口、当前未走完的周/月K线、
+    双向做T的现金及累计指标)，每天只需拉取新K线并逐根推进，不必重新下载和回算整段历史
+    1. 状态/信号与 RegimeDetector(index_std='expanding') + MaotaiTStrategy 逐行一致
+    2. 每天记录的次日预测与对截至当天的历史全量重跑 predict_series 的最后一条一致
+       (当前未走完的周/月K线也参与预测)
+    3. 做T成交按上一交易日在全量历史回放中的预测撮合：新K线到来后才能确定上一交易日是否为其周/月的
+       最后一个交易日，此时只按已走完的周/月K线重新预测，与 predict_series + TPlus0Backtester.run 逐日一致
+    检查点大小只与窗口长度有关，不随历史增长
+    """
+    def __init__(self, window=20, config=None, predictor=None, backtester=None):
+        self.live = LiveStrategy(window, config)
+        self.predictor = StreamingMultiPeriodPredictor(predictor)
+        self.weekly = IncrementalResampler('weekly')
+        self.monthly = IncrementalResampler('monthly')
+        self.backtester = backtester or TPlus0Backtester()
+        self.metrics = None
+        self.cash = None
+        self.prediction = None
+        self.last_date = None
+        self.latest = None
+
+    def _advance_period(self, resampler, add_bar, date, bar):
+        if resampler.update(date, *bar):
+            # 已走完的周期K线计入预测器状态后不再保留
+            resampler.dates.pop()
+            add_bar(resampler.bars.pop()[3])
+        return resampler.current[3]
+
+    def update(self, date, open_, high, low, close, volume, index_close):
+        """
+        推进一根已收盘的日K线，返回当日结果 (含对下一交易日的预测)
+        """
+        date = pd.Timestamp(date)
+        shares = self.backtester.initial_shares
+
+        # 1. 周/月线增量聚合：当日开启新周期时，上一周期已走完，计入预测器状态
+        bar = (open_, high, low, close, volume)
+        weekly_close = self._advance_period(self.weekly, self.predictor.add_weekly_bar, date, bar)
+        monthly_close = self._advance_period(self.monthly, self.predictor.add_monthly_bar, date, bar)
+
+        # 2. 用上一交易日的预测撮合当日成交 (首日只初始化现金)
+        #    此时已知上一交易日是否为其周/月的最后一个交易日，只按已走完的周/月K线重新预测
+        if self.cash is None:
+            self.cash = self.backtester.initial_cash = shares * close
+            self.metrics = RunningMetrics(self.backtester.initial_value)
+            trade_code, profit = 0, 0.0
+        else:
+            trade_code, profit, self.cash = self.backtester.step(self.cash, high, low, close,
+                                                                 self.predictor.predict())
+        stock_value = shares * close
+        total_value = self.cash + stock_value
+        benchmark_value = self.backtester.initial_cash + stock_value
+        if self.last_date is not None:
+            self.metrics.update(trade_code, total_value, benchmark_value)
+
+        # 3. 状态识别 + 做T信号
+        live = self.live.update(close, volume, index_close)
+
+        # 4. 次日预测：当前未走完的周/月K线只参与本次预测
+        self.prediction = self.predictor.add_daily_bar(date, high, low, close, weekly_close, monthly_close)
+
+        self.last_date = date
+        self.latest = {
+            'date': date,
+            'close': close,
+            **live,
+            'trade_type': TRADE_TYPES[trade_code],
+            'daily_profit': profit,
+            'total_cash': self.cash,
+            'stock_value': stock_value,
+            'total_value': total_value,
+            'benchmark_value': benchmark_value,
+            'action': self.prediction['action'],
+            'buy_price': self.prediction.get('buy_price', np.nan),
+            'sell_price': self.prediction.get('sell_price', np.nan),
+        }
+        return self.latest
+
+    def extend(self, daily_df):
+        """
+        依次推进 daily_df (含 OHLCV 及 index_close) 中晚于检查点的K线，返回逐日结果 DataFrame
+        """
+        if self.last_date is not None:
+            daily_df = daily_df[daily_df.index > self.last_date]
+        rows = [self.update(*row) for row in zip(
+            daily_df.index, daily_df['open'].to_numpy(), daily_df['high'].to_numpy(), daily_df['low'].to_numpy(),
+            daily_df['close'].to_numpy(), daily_df['volume'].to_numpy(), daily_df['index_close'].to_numpy())]
+        columns = ['date', 'close', 'regime', 'signal', 'suggested_t_pos', 'trade_type', 'daily_profit', 'total_cash',
+                   'stock_value', 'total_value', 'benchmark_value', 'action', 'buy_price', 'sell_price']
+        return pd.DataFrame(rows, columns=columns).set_index('date')
+
+    def save(self, path):
+        # 先写临时文件再替换，任务中断时不会留下损坏的检查点
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
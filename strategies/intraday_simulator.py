@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+from strategies.t_plus_0_backtester import (TPlus0Backtester, ACTION_CODES, TRADE_TYPES,
+                                            to_prediction_array)
+
+
+class IntradayFillSimulator(TPlus0Backtester):
+    """
+    分钟级做T成交模拟：
+    1. 逐日回放分钟K线，按价格先后触及的顺序判断买/卖价是否成交
+    2. 第二笔必须在第一笔成交之后的K线上触及 (同一根K线内无法判断先后，保守处理)
+    3. 第二笔未成交时按收盘前最后一根K线的收盘价强制平仓
+    分钟线来自 BarStore 的内存映射列，逐日切片，不整体载入 pandas
+    """
+    def __init__(self, store, symbol="sh600519", period="1", initial_shares=100, fee=0.0002):
+        super().__init__(initial_shares=initial_shares, fee=fee)
+        self.store = store
+        self.symbol = symbol
+        self.period = period
+
+    def run(self, daily_df, predictions):
+        """
+        predictions: 每日预测结果 (字典列表或结构化数组)，第 i 天使用 predictions[i-1]
+        返回格式与 TPlus0Backtester.run 相同，另附成交时间及分钟K线数量
+        """
+        preds = to_prediction_array(predictions)
+        close = daily_df['close'].to_numpy(dtype=np.float64)
+        shares = self.initial_shares
+        cash0 = shares * close[0]
+        self.initial_cash = cash0
+
+        cols = self.store.columns(self.symbol, self.period, ['high', 'low', 'close'])
+        days, starts, ends = self.store.day_index(self.symbol, self.period)
+        dates = daily_df.index[1:].values.astype('datetime64[D]')
+        pos = np.searchsorted(days, dates)
+        if len(days):
+            found = (pos < len(days)) & (days[np.minimum(pos, len(days) - 1)] == dates)
+        else:
+            # 该标的没有任何分钟线：所有交易日均按无分钟线处理 (不成交，minute_bars 为 0)
+            found = np.zeros(len(dates), dtype=bool)
+
+        n = len(dates)
+        daily_profit = np.zeros(n)
+        trade_code = np.zeros(n, dtype=np.int8)
+        entry_time = np.full(n, np.datetime64('NaT'), dtype='datetime64[ns]')
+        exit_time = np.full(n, np.datetime64('NaT'), dtype='datetime64[ns]')
+        minute_bars = np.zeros(n, dtype=np.int64)
+
+        for i in range(n):
+            if not found[i]:
+                continue
+            lo, hi = starts[pos[i]], ends[pos[i]]
+            minute_bars[i] = hi - lo
+            pred = preds[i]
+            action = pred['action']
+            if action == ACTION_CODES['BuyFirst']:
+                fill = self._simulate_day(cols['low'][lo:hi] <= pred['buy_price'],
+                                          cols['high'][lo:hi] >= pred['sell_price'])
+                if fill is None:
+                    continue
+                first, second = fill
+                buy_cost = pred['buy_price'] * 100 * (1 + self.fee)
+                if second is not None:
+                    daily_profit[i] = pred['sell_price'] * 100 * (1 - self.fee) - buy_cost
+                    trade_code[i] = 1
+                else:
+                    # 卖出失败，尾盘强制卖出
+                    second = hi - lo - 1
+                    daily_profit[i] = cols['close'][hi - 1] * 100 * (1 - self.fee) - buy_cost
+                    trade_code[i] = 2
+            elif action in (ACTION_CODES['SellFirst'], ACTION_CODES['RangeT']):
+                fill = self._simulate_day(cols['high'][lo:hi] >= pred['sell_price'],
+                                          cols['low'][lo:hi] <= pred['buy_price'])
+                if fill is None:
+                    continue
+                first, second = fill
+                sell_revenue = pred['sell_price'] * 100 * (1 - self.fee)
+                if second is not None:
+                    daily_profit[i] = sell_revenue - pred['buy_price'] * 100 * (1 + self.fee)
+                    trade_code[i] = 3
+                else:
+                    # 买回失败，尾盘强制买回
+                    second = hi - lo - 1
+                    daily_profit[i] = sell_revenue - cols['close'][hi - 1] * 100 * (1 + self.fee)
+                    trade_code[i] = 4
+            else:
+                continue
+            entry_time[i] = cols['timestamp'][lo + first]
+            exit_time[i] = cols['timestamp'][lo + second]
+
+        total_cash = np.cumsum(np.concatenate(([cash0], daily_profit)))[1:]
+        stock_value = shares * close[1:]
+
+        res_df = pd.DataFrame({
+            'close': close[1:],
+            'trade_type': np.array(TRADE_TYPES, dtype=object)[trade_code],
+            'daily_profit': daily_profit,
+            'total_cash': total_cash,
+            'stock_value': stock_value,
+            'total_value': total_cash + stock_value,
+            'entry_time': entry_time,
+            'exit_time': exit_time,
+            'minute_bars': minute_bars,
+        }, index=daily_df.index[1:])
+        res_df.index.name = 'date'
+        res_df['benchmark_value'] = self.initial_cash + self.initial_shares * res_df['close']
+        return res_df
+
+    @staticmethod
+    def _simulate_day(first_hit, second_hit):
+        """
+        first_hit / second_hit: 每根分钟K线是否触及第一笔 / 第二笔价格
+        返回 None (第一笔未成交) 或 (第一笔位置, 第二笔位置或 None)
+        """
+        if not first_hit.any():
+            return None
+        first = int(np.argmax(first_hit))
+        later = second_hit[first + 1:]
+        if later.any():
+            return first, first + 1 + int(np.argmax(later))
+        return first, None
@@ -1,5 +1,10 @@
+import copy
 import pandas as pd
 import numpy as np
+from strategies.backtester_v2 import BacktesterV2
+from strategies.regime_detector import REGIME_DTYPE
+from utils import indicators
+from utils.rolling import RollingMean, RollingStd
 
 class MaotaiTStrategy:
     """
@@ -9,24 +14,32 @@ class MaotaiTStrategy:
     2. 在适合做T的状态下，利用日内波动率和微结构规律生成信号
     3. 目标是降低持仓成本，而非单纯预测涨跌
     """
-    def __init__(self, config=None):
-        self.config = config or {
-            'risk_on_t_ratio': 0.2,    # 趋势向上时，仅用20%仓位做T
-            'volatile_t_ratio': 0.5,   # 震荡市，用50%仓位做T
-            'risk_off_t_ratio': 0.8,   # 弱势市，用80%仓位做T或对冲
-            'stop_loss': -0.015,       # 日内止损
-            'take_profit': 0.02        # 日内止盈
-        }
+    DEFAULT_CONFIG = {
+        'risk_on_t_ratio': 0.2,    # 趋势向上时，仅用20%仓位做T
+        'volatile_t_ratio': 0.5,   # 震荡市，用50%仓位做T
+        'risk_off_t_ratio': 0.8,   # 弱势市，用80%仓位做T或对冲
+        'stop_loss': -0.015,       # 日内止损
+        'take_profit': 0.02,       # 日内止盈
+        'bb_window': 20,           # 布林带窗口
+        'bb_k': 2                  # 布林带宽度 (标准差倍数)
+    }
+
+    def __init__(self, config=None, lean=False):
+        # 未指定的参数沿用默认值
+        self.config = {**self.DEFAULT_CONFIG, **(config or {})}
+        # 精简模式：布林带只作临时数组，signal 存为 int8、suggested_t_pos 存为 float32
+        self.lean = lean
 
     def generate_signals(self, df):
         """
         生成交易信号
         """
         # 基础信号：基于布林带或 RSI 的日内超买超卖
-        df['ma'] = df['close'].rolling(window=20).mean()
-        df['std'] = df['close'].rolling(window=20).std()
-        df['upper'] = df['ma'] + 2 * df['std']
-        df['lower'] = df['ma'] - 2 * df['std']
+        window = self.config['bb_window']
+        k = self.config['bb_k']
+        if self.lean:
+            return self._generate_signals_lean(df, *indicators.bollinger(df['close'], window, k)[2:])
+        df['ma'], df['std'], df['upper'], df['lower'] = indicators.bollinger(df['close'], window, k)
         
         # 信号逻辑
         df['signal'] = 0
@@ -45,30 +58,208 @@ class MaotaiTStrategy:
         
         return df
 
+    def _generate_signals_lean(self, df, upper, lower):
+        codes = df['regime'].astype(REGIME_DTYPE).cat.codes.to_numpy()
+        close = df['close'].to_numpy()
+        signal = np.zeros(len(df), dtype=np.int8)
+        signal[(close > upper) & ((codes == 1) | (codes == 2))] = -1
+        signal[close < lower] = 1
+
+        # 状态编码 -> 建议仓位 (顺序同 REGIMES，Low-Liquidity 及未知状态 (编码 -1) 均取最后一项 0)
+        t_pos = np.array([self.config['risk_on_t_ratio'], self.config['volatile_t_ratio'],
+                          self.config['risk_off_t_ratio'], 0.0], dtype=np.float32)
+        df['signal'] = signal
+        df['suggested_t_pos'] = t_pos[codes]
+        return df
+
+    def generate_signals_panel(self, close, regime):
+        """
+        面板版本：close / regime 为 日期 x 标的 DataFrame
+        返回 (signal, suggested_t_pos) 两个同形状 DataFrame
+        """
+        window = self.config['bb_window']
+        k = self.config['bb_k']
+        _, _, upper, lower = indicators.bollinger(close, window, k)
+
+        regime = regime.to_numpy()
+        values = close.to_numpy()
+        signal = np.zeros(close.shape, dtype=np.int64)
+        signal[(values > upper) & np.isin(regime, ['Volatile', 'Risk-Off'])] = -1
+        signal[values < lower] = 1
+
+        t_pos = np.select(
+            [regime == 'Risk-On', regime == 'Volatile', regime == 'Risk-Off'],
+            [self.config['risk_on_t_ratio'], self.config['volatile_t_ratio'], self.config['risk_off_t_ratio']],
+            default=0.0)
+
+        return (pd.DataFrame(signal, index=close.index, columns=close.columns),
+                pd.DataFrame(t_pos, index=close.index, columns=close.columns))
+
+class StreamingSignalGenerator:
+    """
+    增量信号生成：布林带均值/标准差以环形缓冲维护，每根新K线 O(1) 更新
+    结果与 MaotaiTStrategy.generate_signals 逐行一致
+    """
+    def __init__(self, config=None):
+        self.config = {**MaotaiTStrategy.DEFAULT_CONFIG, **(config or {})}
+        self.ma = RollingMean(self.config['bb_window'])
+        self.std = RollingStd(self.config['bb_window'])
+        self.t_pos = {
+            'Risk-On': self.config['risk_on_t_ratio'],
+            'Volatile': self.config['volatile_t_ratio'],
+            'Risk-Off': self.config['risk_off_t_ratio'],
+        }
+
+    def update(self, close, regime):
+        """
+        加入一根K线及其市场状态，返回 (signal, suggested_t_pos)
+        """
+        ma = self.ma.update(close)
+        std = self.std.update(close)
+        k = self.config['bb_k']
+        upper = ma + k * std
+        lower = ma - k * std
+
+        signal = 0
+        if close > upper and regime in ('Volatile', 'Risk-Off'):
+            signal = -1
+        if close < lower:
+            signal = 1
+        return signal, self.t_pos.get(regime, 0.0)
+
+
+class LiveStrategy:
+    """
+    实时策略：状态识别 + 信号生成的增量组合
+    update() 推进一根已收盘K线；preview() 用盘中价格试算而不改变状态
+    """
+    def __init__(self, window=20, config=None):
+        from strategies.regime_detector import StreamingRegimeDetector
+        self.detector = StreamingRegimeDetector(window)
+        self.signals = StreamingSignalGenerator(config)
+
+    def update(self, close, volume, index_close):
+        regime = self.detector.update(close, volume, index_close)
+        signal, t_pos = self.signals.update(close, regime)
+        return {'regime': regime, 'signal': signal, 'suggested_t_pos': t_pos}
+
+    def extend(self, df):
+        """
+        依次推进一段历史 (含 close / volume / index_close 列)，返回最后一根的结果
+        """
+        latest = None
+        for close, volume, index_close in zip(df['close'].to_numpy(), df['volume'].to_numpy(),
+                                              df['index_close'].to_numpy()):
+            latest = self.update(close, volume, index_close)
+        return latest
+
+    def preview(self, close, volume, index_close):
+        return copy.deepcopy(self).update(close, volume, index_close)
+
+
 class Backtester:
     """
-    简易回测引擎
+    持仓回测引擎 (向量化)：
+    1. 期初以收盘价将 initial_capital 买入底仓 (整手)，余额为现金
+    2. signal == -1 时把持仓调至底仓的 (1 - suggested_t_pos)，signal == 1 时买回至满仓，
+       两次信号之间维持上一目标 (前向填充)，均按信号当日收盘价成交
+    3. 买卖收取佣金 fee，卖出另收印花税 stamp_tax；买回金额超过卖出所得时现金可为负 (视为垫资)
+    4. 输出逐根 持仓股数 / 现金 / 净值，列名与 BacktesterV2 一致，可直接计算相同指标；
+       t_profit 只在完成一次做T (买回满仓) 的当根非零，交易天数/成功率按完成的做T次数统计，逐根做T收益见 t_ret
     """
-    def __init__(self, initial_capital=1000000):
+    def __init__(self, initial_capital=1000000, fee=0.0003, stamp_tax=0.0005, lot_size=100):
         self.initial_capital = initial_capital
+        self.fee = fee              # 佣金 (双边)
+        self.stamp_tax = stamp_tax  # 印花税 (仅卖出)
+        self.lot_size = lot_size    # 每手股数
+
+    def target_position(self, signal, t_pos):
+        """
+        由信号序列得到逐根目标持仓比例 (相对底仓)：最近一次信号决定当前仓位，首个信号之前为满仓
+        signal / t_pos 为一维序列或 日期 x 标的 二维数组 (沿第 0 轴)
+        """
+        signal = np.asarray(signal)
+        target = np.where(signal == -1, 1 - np.asarray(t_pos, dtype=np.float64),
+                          np.where(signal == 1, 1.0, np.nan))
+        if len(target):
+            target[0] = np.where(np.isnan(target[0]), 1.0, target[0])
+        # 前向填充：每根取最近一个有效目标的位置
+        rows = np.arange(len(target)).reshape((-1,) + (1,) * (target.ndim - 1))
+        last = np.maximum.accumulate(np.where(np.isnan(target), 0, rows), axis=0)
+        return np.take_along_axis(target, last, axis=0)
+
+    def simulate(self, close, signal, t_pos):
+        """
+        持仓模拟内核：输入为一维序列或 日期 x 标的 二维数组，返回 {字段: 同形状数组}
+        """
+        close = np.asarray(close, dtype=np.float64)
+        lot = self.lot_size
+
+        base_shares = np.floor(self.initial_capital / close[0] / lot) * lot
+        initial_cash = self.initial_capital - base_shares * close[0]
+        position = self.target_position(signal, t_pos)
+        shares = np.floor(base_shares * position / lot + 1e-9) * lot
+
+        prev_shares = np.concatenate([base_shares[None] if close.ndim > 1 else [base_shares], shares[:-1]])
+        trade = shares - prev_shares
+        turnover = np.abs(trade) * close
+        fees = turnover * self.fee + np.where(trade < 0, turnover * self.stamp_tax, 0.0)
+        cash = initial_cash + np.cumsum(-trade * close - fees, axis=0)
+
+        hold_value = initial_cash + base_shares * close
+        strategy_value = cash + shares * close
+        prev_value = np.concatenate([np.full((1,) + close.shape[1:], float(self.initial_capital)), strategy_value[:-1]])
+        # 逐根做T损益：相对底仓的偏离 (减仓部分) 在本根的涨跌，减去手续费；满仓且未成交时恰为 0
+        prev_close = np.concatenate([close[:1], close[:-1]])
+        t_pnl = (prev_shares - base_shares) * (close - prev_close) - fees
+        strategy_daily_ret = strategy_value / prev_value - 1
+        t_ret = t_pnl / prev_value
+
+        # 一次做T = 从底仓减仓起到买回满仓止；整次往返的损益 (含两端手续费) 记在买回当根，
+        # 相对减仓前的净值，因此 t_profit 非零的根数即完成的做T次数，期末尚未买回的一次不计
+        reduced = shares < base_shares
+        was_reduced = prev_shares < base_shares
+        rows = np.arange(len(close)).reshape((-1,) + (1,) * (close.ndim - 1))
+        opened = np.maximum.accumulate(np.where(reduced & ~was_reduced, rows, 0), axis=0)
+        cum_pnl = np.cumsum(t_pnl, axis=0)
+        before = np.take_along_axis(cum_pnl - t_pnl, opened, axis=0)
+        basis = np.take_along_axis(prev_value, opened, axis=0)
+        t_profit = np.where(was_reduced & ~reduced, (cum_pnl - before) / basis, 0.0)
+        return {
+            'position': position,
+            'shares': shares,
+            'trade_shares': trade,
+            'fees': fees,
+            'cash': cash,
+            'hold_value': hold_value,
+            'strategy_value': strategy_value,
+            'benchmark_nav': hold_value / self.initial_capital,
+            'strategy_nav': strategy_value / self.initial_capital,
+            'strategy_daily_ret': strategy_daily_ret,
+            't_ret': t_ret,
+            't_profit': t_profit,
+            # 底仓 (及闲置现金) 部分的收益，strategy_daily_ret = stock_ret + t_ret
+            'stock_ret': strategy_daily_ret - t_ret,
+        }
 
     def run(self, df):
-        # 假设初始持仓 1000 股茅台
-        shares = 1000
-        cash = 0
-        
-        df['hold_value'] = shares * df['close']
-        df['strategy_value'] = df['hold_value']
-        
-        # 模拟做T收益 (简化版：信号触发时按收盘价计算)
-        # 实际中应使用分钟线，这里先实现日线逻辑框架
-        df['daily_ret'] = df['close'].pct_change()
-        
-        # 记录策略表现
-        df['strategy_ret'] = df['daily_ret'] # 默认跟随持仓
-        
-        # 如果有卖出信号，且状态允许，则减少持仓，等待买回
-        # 这里的逻辑是：如果 signal == -1，则卖出 suggested_t_pos 比例的仓位
-        # 并在 signal == 1 时买回。
-        
+        """
+        df: 含 close / signal / suggested_t_pos 的信号表 (generate_signals 的输出)
+        """
+        df = df.copy()
+        result = self.simulate(df['close'], df['signal'], df['suggested_t_pos'])
+        for name, values in result.items():
+            df[name] = values
         return df
+
+    def run_panel(self, panel, regime, signal, t_pos, rng=None):
+        """
+        面板版本 (接口与 BacktesterV2.run_panel 相同)：输入均为 日期 x 标的，返回 {字段: 日期 x 标的 DataFrame}
+        按信号确定性调仓，不使用随机数，rng 仅为接口一致而保留
+        上市前的空收盘价以上市首日收盘价回填，底仓按上市首日收盘价计算
+        """
+        close = panel['close'].bfill()
+        result = self.simulate(close.to_numpy(), signal.to_numpy(), t_pos.to_numpy())
+        return {k: pd.DataFrame(v, index=close.index, columns=close.columns) for k, v in result.items()}
+
+    metrics = staticmethod(BacktesterV2.metrics)
@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+
+from strategies.t_plus_0_backtester import TRADE_TYPES
+from utils.rolling import RollingStd
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = 0.02  # 年化无风险利率
+
+SUCCESS_CODES = [code for code, name in enumerate(TRADE_TYPES) if 'Success' in name]
+
+# 展示用：指标 -> (中文名称, 格式)
+LABELS = {
+    'total_return': ('策略总收益', '{:.2%}'),
+    'benchmark_return': ('基准总收益', '{:.2%}'),
+    'annual_return': ('年化收益率', '{:.2%}'),
+    'max_drawdown': ('最大回撤', '{:.2%}'),
+    'win_rate': ('做T成功率', '{:.2%}'),
+    'sharpe': ('夏普比率', '{:.2f}'),
+    'sortino': ('索提诺比率', '{:.2f}'),
+    'trade_days': ('总交易天数', '{:d}'),
+    'success_trades': ('做T成功次数', '{:d}'),
+    'strategy_final': ('策略最终价值', '{:.2f}'),
+    'benchmark_final': ('基准最终价值', '{:.2f}'),
+    'alpha': ('超额收益 (Alpha)', '{:.2%}'),
+}
+
+# 向量化指标内核：
+# 输入为 日期 x 列 的二维数组 (每列一个策略/标的/模拟路径)，沿第 0 轴计算，每列得到一个数值；
+# 一维输入视为单列，返回标量。展示格式化由 format_metrics 单独完成
+
+
+def _columns(values):
+    values = np.asarray(values, dtype=np.float64)
+    return (values[:, None], True) if values.ndim == 1 else (values, False)
+
+
+def _result(metrics, squeeze):
+    if squeeze:
+        return {k: v[0].item() for k, v in metrics.items()}
+    return metrics
+
+
+def drawdown(nav):
+    """
+    逐日回撤 (相对历史最高净值)
+    """
+    nav = np.asarray(nav, dtype=np.float64)
+    rolling_max = np.maximum.accumulate(nav, axis=0)
+    return (nav - rolling_max) / rolling_max
+
+
+def nav_metrics(nav, daily_ret=None, risk_free=RISK_FREE_RATE, periods=TRADING_DAYS):
+    """
+    净值类指标：total_return / annual_return / max_drawdown / sharpe / sortino
+    nav 以 1 为起点；daily_ret 缺省时由净值推算 (首日收益为 nav[0] - 1)
+    """
+    nav, squeeze = _columns(nav)
+    if daily_ret is None:
+        daily_ret = nav / np.vstack([np.ones((1, nav.shape[1])), nav[:-1]]) - 1
+    else:
+        daily_ret, _ = _columns(daily_ret)
+
+    total_ret = nav[-1] - 1
+    excess = daily_ret.mean(axis=0) * periods - risk_free
+    downside = np.sqrt((np.minimum(daily_ret, 0.0) ** 2).mean(axis=0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        metrics = {
+            'total_return': total_ret,
+            'annual_return': (1 + total_ret) ** (periods / len(nav)) - 1,
+            'max_drawdown': drawdown(nav).min(axis=0),
+            'sharpe': excess / (daily_ret.std(axis=0, ddof=1) * np.sqrt(periods)),
+            'sortino': excess / (downside * np.sqrt(periods)),
+        }
+    return _result(metrics, squeeze)
+
+
+def trade_metrics(t_profit):
+    """
+    按做T收益统计：非零即为交易日，正收益为成功
+    """
+    t_profit, squeeze = _columns(t_profit)
+    trade_days = (t_profit != 0).sum(axis=0)
+    success = (t_profit > 0).sum(axis=0)
+    return _result({
+        'trade_days': trade_days,
+        'success_trades': success,
+        'win_rate': success / np.maximum(trade_days, 1),
+    }, squeeze)
+
+
+def trade_code_metrics(trade_code):
+    """
+    按 TPlus0Backtester 的成交类型编码统计 (0 为未交易，见 TRADE_TYPES)
+    """
+    trade_code, squeeze = _columns(trade_code)
+    trade_days = (trade_code != 0).sum(axis=0)
+    success = np.isin(trade_code, SUCCESS_CODES).sum(axis=0)
+    return _result({
+        'trade_days': trade_days,
+        'success_trades': success,
+        'win_rate': success / np.maximum(trade_days, 1),
+    }, squeeze)
+
+
+def trade_codes(trade_type):
+    """
+    成交类型名称 -> 编码，代替逐个字符串匹配
+    """
+    return pd.Categorical(trade_type, categories=TRADE_TYPES).codes
+
+
+def value_metrics(total_value, benchmark_value):
+    """
+    期末价值及相对基准的超额收益
+    """
+    total_value, squeeze = _columns(total_value)
+    benchmark_value, _ = _columns(benchmark_value)
+    strategy_final, bench_final = total_value[-1], benchmark_value[-1]
+    return _result({
+        'strategy_final': strategy_final,
+        'benchmark_final': bench_final,
+        'alpha': (strategy_final - bench_final) / bench_final,
+    }, squeeze)
+
+
+def multi_period_metrics(res_df, initial_value=None):
+    """
+    TPlus0Backtester.run 结果的数值指标；给出期初总资产时另计净值类指标
+    """
+    metrics = trade_code_metrics(trade_codes(res_df['trade_type']))
+    metrics.update(value_metrics(res_df['total_value'].to_numpy(), res_df['benchmark_value'].to_numpy()))
+    if initial_value is not None:
+        metrics.update(nav_metrics(res_df['total_value'].to_numpy() / initial_value))
+    return metrics
+
+
+class RunningMetrics:
+    """
+    multi_period_metrics 的增量版本 (收盘后日常任务使用)：
+    逐日累加成交统计、净值峰值/最大回撤及日收益率的均值/标准差/下行平方和，只保存若干标量
+    """
+    def __init__(self, initial_value, risk_free=RISK_FREE_RATE, periods=TRADING_DAYS):
+        self.initial_value = initial_value
+        self.risk_free = risk_free
+        self.periods = periods
+        self.days = 0
+        self.trade_days = 0
+        self.success_trades = 0
+        self.strategy_final = np.nan
+        self.benchmark_final = np.nan
+        self.nav = 1.0
+        self.peak = -np.inf
+        self.max_drawdown = 0.0
+        self.ret_sum = 0.0
+        self.ret_std = RollingStd()
+        self.downside_sq = 0.0
+
+    def update(self, trade_code, total_value, benchmark_value):
+        self.days += 1
+        self.trade_days += trade_code != 0
+        self.success_trades += trade_code in SUCCESS_CODES
+        self.strategy_final = total_value
+        self.benchmark_final = benchmark_value
+
+        nav = total_value / self.initial_value
+        ret = nav / self.nav - 1
+        self.nav = nav
+        self.peak = max(self.peak, nav)
+        self.max_drawdown = min(self.max_drawdown, (nav - self.peak) / self.peak)
+        self.ret_sum += ret
+        self.ret_std.update(ret)
+        self.downside_sq += min(ret, 0.0) ** 2
+
+    def result(self):
+        """
+        与 multi_period_metrics(res_df, initial_value) 相同的指标
+        """
+        total_ret = self.nav - 1
+        excess = self.ret_sum / max(self.days, 1) * self.periods - self.risk_free
+        downside = np.sqrt(self.downside_sq / max(self.days, 1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {
+                'trade_days': self.trade_days,
+                'success_trades': self.success_trades,
+                'win_rate': self.success_trades / max(self.trade_days, 1),
+                'strategy_final': self.strategy_final,
+                'benchmark_final': self.benchmark_final,
+                'alpha': (self.strategy_final - self.benchmark_final) / self.benchmark_final,
+                'total_return': total_ret,
+                'annual_return': (1 + total_ret) ** (self.periods / max(self.days, 1)) - 1,
+                'max_drawdown': self.max_drawdown,
+                'sharpe': float(np.float64(excess) / (self.ret_std.value * np.sqrt(self.periods))),
+                'sortino': float(np.float64(excess) / (downside * np.sqrt(self.periods))),
+            }
+
+
+def format_metrics(metrics):
+    """
+    展示用：数值指标 -> {中文名称: 格式化字符串}，未登记的指标原样保留
+    """
+    formatted = {}
+    for key, value in metrics.items():
+        label, fmt = LABELS.get(key, (key, '{}'))
+        if fmt == '{:d}':
+            value = int(value)
+        formatted[label] = fmt.format(value)
+    return formatted
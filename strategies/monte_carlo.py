@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+from strategies.backtester_v2 import BacktesterV2
+from strategies.metrics import nav_metrics, trade_metrics
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# 单个分块中 日期 x 路径 矩阵的内存上限 (每条路径约同时存在 6 个 float64 临时数组)
+MAX_CHUNK_BYTES = 128 * 1024 ** 2
+
+
+class MonteCarloBacktest:
+    """
+    BacktesterV2 的蒙特卡洛模式：
+    1. 做T是否成功的随机数从单条序列 (seed 42) 扩展为 日期 x 路径 矩阵，一次向量化模拟全部路径
+    2. 路径按块计算以限制内存，分块大小不影响结果 (随机数按路径顺序连续生成)
+    3. 输出逐路径指标及其分位数分布
+    """
+    def __init__(self, backtester=None, n_paths=10000, seed=None, chunk_size=None,
+                 quantiles=DEFAULT_QUANTILES, keep_paths=False):
+        self.backtester = backtester or BacktesterV2()
+        self.n_paths = n_paths
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.quantiles = list(quantiles)
+        self.keep_paths = keep_paths
+
+    def _chunk_size(self, n_days):
+        if self.chunk_size:
+            return self.chunk_size
+        return max(1, MAX_CHUNK_BYTES // (n_days * 8 * 6))
+
+    def simulate(self, active, win_rate, gain, loss, stock_ret, win_rand):
+        """
+        模拟内核：win_rand 为 日期 x 路径 的均匀随机数，其余为逐日一维数组
+        返回 (逐路径指标字典, 净值矩阵)
+        """
+        win = win_rand < win_rate[:, None]
+        t_profit = np.where(active[:, None], np.where(win, gain[:, None], loss[:, None]), 0.0)
+        daily_ret = stock_ret[:, None] + t_profit
+        nav = np.cumprod(1 + daily_ret, axis=0)
+
+        metrics = nav_metrics(nav, daily_ret)
+        metrics.update(trade_metrics(t_profit))
+        return metrics, nav
+
+    def run(self, df):
+        """
+        df: 含 regime / signal / suggested_t_pos 的信号表 (generate_signals 的输出)
+        返回 {'metrics': 逐路径指标, 'summary': 分位数分布, 'benchmark_return': 基准收益,
+              'nav_paths' / 'nav_quantiles': 仅 keep_paths=True 时}
+        """
+        bt = self.backtester
+        close = df['close']
+        amp = ((df['high'] - df['low']) / close.shift(1)).to_numpy()
+        stock_ret = close.pct_change().fillna(0).to_numpy()
+        active, win_rate, gain, loss = bt._trade_model(df['regime'].to_numpy(), df['signal'].to_numpy(),
+                                                       df['suggested_t_pos'].to_numpy(), amp)
+
+        n_days = len(df)
+        rng = np.random.default_rng(self.seed)
+        chunk = self._chunk_size(n_days)
+        metrics = []
+        nav_paths = np.empty((n_days, self.n_paths), dtype=np.float32) if self.keep_paths else None
+        for start in range(0, self.n_paths, chunk):
+            m = min(chunk, self.n_paths - start)
+            # 按 路径 x 日期 生成后转置，保证任意分块下每条路径的随机数相同
+            win_rand = rng.random((m, n_days)).T
+            chunk_metrics, nav = self.simulate(active, win_rate, gain, loss, stock_ret, win_rand)
+            metrics.append(pd.DataFrame(chunk_metrics))
+            if nav_paths is not None:
+                nav_paths[:, start:start + m] = nav
+
+        metrics = pd.concat(metrics, ignore_index=True)
+        metrics.index.name = 'path'
+        result = {
+            'metrics': metrics,
+            'summary': self.summarize(metrics),
+            'benchmark_return': close.iloc[-1] / close.iloc[0] - 1,
+        }
+        if nav_paths is not None:
+            result['nav_paths'] = nav_paths
+            result['nav_quantiles'] = pd.DataFrame(np.quantile(nav_paths, self.quantiles, axis=1).T,
+                                                   index=df.index, columns=self.quantiles)
+        return result
+
+    def summarize(self, metrics):
+        """
+        各指标的均值、标准差及分位数
+        """
+        summary = metrics.quantile(self.quantiles)
+        summary.index = [f"p{q * 100:g}" for q in self.quantiles]
+        return pd.concat([metrics.agg(['mean', 'std']), summary])
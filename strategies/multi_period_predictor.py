@@ -1,5 +1,9 @@
-import pandas as pd
+import copy
 import numpy as np
+from utils import indicators
+from utils.rolling import RollingMean
+from utils.resample import asof_index
+from strategies.t_plus_0_backtester import ACTION_CODES, PREDICTION_DTYPE
 
 class MultiPeriodPredictor:
     """
@@ -9,18 +13,19 @@ class MultiPeriodPredictor:
     3. 日线定买卖点
     4. 预测次日关键买卖价格
     """
-    def __init__(self):
-        pass
+    def __init__(self, atr_multiplier=0.25, atr_window=14):
+        self.atr_multiplier = atr_multiplier  # 买卖价相对昨收的 ATR 倍数
+        self.atr_window = atr_window
 
     def analyze_trend(self, df):
         """
         分析趋势：返回 1 (多头), -1 (空头), 0 (震荡)
         """
-        ma5 = df['close'].rolling(5).mean()
-        ma20 = df['close'].rolling(20).mean()
-        if ma5.iloc[-1] > ma20.iloc[-1]:
+        ma5 = indicators.rolling_mean(df['close'], 5)[-1]
+        ma20 = indicators.rolling_mean(df['close'], 20)[-1]
+        if ma5 > ma20:
             return 1
-        elif ma5.iloc[-1] < ma20.iloc[-1]:
+        elif ma5 < ma20:
             return -1
         return 0
 
@@ -28,13 +33,7 @@ class MultiPeriodPredictor:
         """
         使用 ATR 计算波动率区间
         """
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        true_range = np.max(ranges, axis=1)
-        atr = true_range.rolling(window).mean().iloc[-1]
-        return atr
+        return indicators.atr(df['high'], df['low'], df['close'], window)[-1]
 
     def predict_next_day(self, daily_df, weekly_df, monthly_df):
         """
@@ -46,34 +45,191 @@ class MultiPeriodPredictor:
         d_trend = self.analyze_trend(daily_df)
         
         # 2. 计算波动率和枢轴点
-        atr = self.get_volatility_range(daily_df)
+        atr = self.get_volatility_range(daily_df, self.atr_window)
         last_close = daily_df['close'].iloc[-1]
-        
-        # 优化预测逻辑：使用更保守的波动率区间以提高成功率
-        # 预测买入价：昨日收盘价 - 0.3 * ATR (更易成交且安全)
-        # 预测卖出价：昨日收盘价 + 0.3 * ATR
-        buy_price = last_close - 0.25 * atr
-        sell_price = last_close + 0.25 * atr
-        
-        prediction = {
-            'date': daily_df.index[-1],
+
+        return self._build_prediction(daily_df.index[-1], m_trend, w_trend, d_trend, atr, last_close)
+
+    def _build_prediction(self, date, m_trend, w_trend, d_trend, atr, last_close):
+        action, buy_price, sell_price = self._levels(m_trend, w_trend, d_trend, atr, last_close)
+        return {
+            'date': date,
             'trend_m': m_trend,
             'trend_w': w_trend,
             'trend_d': d_trend,
-            'action': 'Wait',
+            'action': action,
             'buy_price': buy_price,
             'sell_price': sell_price
         }
-        
+
+    def _levels(self, m_trend, w_trend, d_trend, atr, last_close):
+        """
+        返回 (动作, 买入价, 卖出价)
+        """
+        # 优化预测逻辑：使用更保守的波动率区间以提高成功率
+        # 预测买入价：昨日收盘价 - 0.3 * ATR (更易成交且安全)
+        # 预测卖出价：昨日收盘价 + 0.3 * ATR
+        buy_price = last_close - self.atr_multiplier * atr
+        sell_price = last_close + self.atr_multiplier * atr
+
         # 高胜率过滤逻辑：
         # 只有当月线、周线、日线三者趋势共振时，才进行积极操作
         if m_trend == w_trend == d_trend and m_trend != 0:
-            if m_trend == 1:
-                prediction['action'] = 'BuyFirst'
-            else:
-                prediction['action'] = 'SellFirst'
+            action = 'BuyFirst' if m_trend == 1 else 'SellFirst'
         else:
             # 趋势不明确时，保持观望或极窄幅震荡
-            prediction['action'] = 'Wait'
-            
-        return prediction
+            action = 'Wait'
+        return action, buy_price, sell_price
+
+    def predict_series(self, daily_df, weekly_df, monthly_df):
+        """
+        单次遍历生成每日预测，结果与逐日截取历史调用 predict_next_day 相同
+        每个交易日只使用当日及之前已收盘的日/周/月K线
+        """
+        stream = StreamingMultiPeriodPredictor(self)
+        return [stream.add_daily_bar(*bar) for bar in self._replay(stream, daily_df, weekly_df, monthly_df)]
+
+    def predict_array(self, daily_df, weekly_df, monthly_df):
+        """
+        精简版本：与 predict_series 相同的预测，直接写入 PREDICTION_DTYPE 结构化数组 (每天 17 字节)，
+        不为每天构造含 Timestamp 的字典，长历史下内存占用低一个数量级
+        """
+        stream = StreamingMultiPeriodPredictor(self)
+        out = np.empty(len(daily_df), dtype=PREDICTION_DTYPE)
+        for i, (_, high, low, close) in enumerate(self._replay(stream, daily_df, weekly_df, monthly_df)):
+            out[i] = stream.step(high, low, close)
+        return out
+
+    @staticmethod
+    def _replay(stream, daily_df, weekly_df, monthly_df):
+        """
+        按交易日先喂入当日可见的周/月K线，再逐日产出 (日期, 最高, 最低, 收盘)
+        """
+        w_close = weekly_df['close'].to_numpy()
+        m_close = monthly_df['close'].to_numpy()
+        # 预计算每个交易日可见的周/月K线数量
+        w_asof = asof_index(daily_df.index, weekly_df.index)
+        m_asof = asof_index(daily_df.index, monthly_df.index)
+        j = k = 0
+
+        for date, high, low, close, w_end, m_end in zip(daily_df.index, daily_df['high'].to_numpy(),
+                                                        daily_df['low'].to_numpy(), daily_df['close'].to_numpy(),
+                                                        w_asof, m_asof):
+            while j < w_end:
+                stream.add_weekly_bar(w_close[j])
+                j += 1
+            while k < m_end:
+                stream.add_monthly_bar(m_close[k])
+                k += 1
+            yield date, high, low, close
+
+
+class _TrendState:
+    """
+    单一周期的 MA5 / MA20 增量状态
+    """
+    def __init__(self):
+        self.count = 0
+        self.ma5 = RollingMean(5)
+        self.ma20 = RollingMean(20)
+
+    def update(self, close):
+        self.count += 1
+        self.ma5.update(close)
+        self.ma20.update(close)
+
+    @property
+    def trend(self):
+        if self.ma5.value > self.ma20.value:
+            return 1
+        elif self.ma5.value < self.ma20.value:
+            return -1
+        return 0
+
+
+class StreamingMultiPeriodPredictor:
+    """
+    增量多周期预测：
+    维护各周期 MA5/MA20 及日线 ATR-14 的滚动窗口状态，每根新K线 O(1) 更新，
+    避免每天对整段历史重新计算 rolling
+    """
+    def __init__(self, predictor=None, min_daily=20, min_weekly=5, min_monthly=2):
+        self.predictor = predictor or MultiPeriodPredictor()
+        self.min_daily = min_daily
+        self.min_weekly = min_weekly
+        self.min_monthly = min_monthly
+        self.daily = _TrendState()
+        self.weekly = _TrendState()
+        self.monthly = _TrendState()
+        self.atr = RollingMean(self.predictor.atr_window)
+        self.prev_close = None
+        self.last_date = None
+
+    def add_weekly_bar(self, close):
+        self.weekly.update(close)
+
+    def add_monthly_bar(self, close):
+        self.monthly.update(close)
+
+    def add_daily_bar(self, date, high, low, close, weekly_close=None, monthly_close=None):
+        """
+        加入一根已收盘的日K线，返回对下一交易日的预测
+        weekly_close / monthly_close: 尚未走完的当前周/月K线收盘价，只参与本次预测、不计入状态；
+        与对截至当天的历史全量重跑 predict_series 时最后一个交易日可见当前周/月K线的口径一致
+        """
+        self._advance(high, low, close)
+        self.last_date = date
+        return self.predict(weekly_close, monthly_close)
+
+    def predict(self, weekly_close=None, monthly_close=None):
+        """
+        不推进状态，按已加入的K线重新给出对下一交易日的预测 (参数同 add_daily_bar)
+        先计入刚走完的周/月K线再调用，可得到该日在全量历史回放中的预测
+        """
+        state = self._state(weekly_close, monthly_close)
+        if state is None:
+            # 数据不足，跳过
+            return {'action': 'Wait'}
+        return self.predictor._build_prediction(self.last_date, *state, self.prev_close)
+
+    def step(self, high, low, close, weekly_close=None, monthly_close=None):
+        """
+        同 add_daily_bar，返回 (动作编码, 买入价, 卖出价) 元组而非字典 (数据不足时为 Wait，价格为 NaN)
+        """
+        self._advance(high, low, close)
+        state = self._state(weekly_close, monthly_close)
+        if state is None:
+            return ACTION_CODES['Wait'], np.nan, np.nan
+        action, buy_price, sell_price = self.predictor._levels(*state, close)
+        return ACTION_CODES[action], buy_price, sell_price
+
+    def _advance(self, high, low, close):
+        """
+        更新日线趋势及 ATR 状态
+        """
+        self.daily.update(close)
+
+        true_range = high - low
+        if self.prev_close is not None:
+            true_range = max(true_range, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self.atr.update(true_range)
+
+    def _state(self, weekly_close, monthly_close):
+        """
+        返回 (月线趋势, 周线趋势, 日线趋势, ATR)，数据不足时返回 None
+        """
+        weekly = self._with_current(self.weekly, weekly_close)
+        monthly = self._with_current(self.monthly, monthly_close)
+        if (self.daily.count < self.min_daily or weekly.count < self.min_weekly
+                or monthly.count < self.min_monthly):
+            return None
+        return monthly.trend, weekly.trend, self.daily.trend, self.atr.value
+
+    @staticmethod
+    def _with_current(state, close):
+        if close is None:
+            return state
+        state = copy.deepcopy(state)
+        state.update(close)
+        return state
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from strategies.regime_detector import RegimeDetector
+from strategies.maotai_t_strategy import MaotaiTStrategy
+from strategies.backtester_v2 import BacktesterV2
+from strategies.multi_period_predictor import MultiPeriodPredictor
+from strategies.t_plus_0_backtester import TPlus0Backtester
+from strategies.metrics import nav_metrics, trade_metrics, trade_code_metrics, value_metrics
+
+PORTFOLIO = 'Portfolio'
+
+
+class PanelBacktest:
+    """
+    多标的面板回测：
+    1. 所有标的对齐为 日期 x 标的 二维数组
+    2. 状态识别、信号生成、回测在一次向量化计算中覆盖全部标的
+    3. 输出逐标的指标及等权组合 (Portfolio) 的汇总指标
+    """
+    def __init__(self, detector=None, strategy=None, backtester=None):
+        self.detector = detector or RegimeDetector()
+        self.strategy = strategy or MaotaiTStrategy()
+        self.backtester = backtester or BacktesterV2()
+
+    def run(self, panel, rng=None):
+        """
+        panel: DataLoader.get_panel_data 的返回值
+        rng: 传给回测引擎的随机数生成器，各列独立抽取做T胜负 (默认各列共用单标的回测的随机数序列)
+        返回 {字段: 日期 x 标的 DataFrame}
+        """
+        regime = self.detector.detect_panel(panel)
+        signal, t_pos = self.strategy.generate_signals_panel(panel['close'], regime)
+        result = self.backtester.run_panel(panel, regime, signal, t_pos, rng=rng)
+        result.update(regime=regime, signal=signal, suggested_t_pos=t_pos)
+        return result
+
+    def calculate_metrics(self, result):
+        """
+        逐标的及等权组合指标，每行一个标的
+        """
+        nav = result['strategy_nav'].to_numpy()
+        ret = result['strategy_daily_ret'].to_numpy()
+        bench = result['benchmark_nav'].to_numpy()
+        t_profit = result['t_profit'].to_numpy()
+
+        # 等权组合：各标的初始资金相同，组合净值为各标的净值均值
+        port_nav = nav.mean(axis=1, keepdims=True)
+        port_ret = np.vstack([np.zeros((1, 1)), port_nav[1:] / port_nav[:-1] - 1])
+
+        metrics = nav_metrics(np.hstack([nav, port_nav]), np.hstack([ret, port_ret]))
+        metrics['benchmark_return'] = np.append(bench[-1] - 1, bench[-1].mean() - 1)
+
+        # 组合的交易统计为各标的之和
+        trades = trade_metrics(t_profit)
+        metrics['trade_days'] = np.append(trades['trade_days'], trades['trade_days'].sum())
+        metrics['success_trades'] = np.append(trades['success_trades'], trades['success_trades'].sum())
+        metrics['win_rate'] = metrics['success_trades'] / np.maximum(metrics['trade_days'], 1)
+
+        index = list(result['strategy_nav'].columns) + [PORTFOLIO]
+        return pd.DataFrame(metrics, index=index)
+
+    def run_multi_period(self, daily_panel, weekly_panel, monthly_panel, predictor=None, backtester=None):
+        """
+        多周期预测 + 双向做T 的面板版本：预测按标的单次遍历，回测对全部标的一次计算
+        返回 (结果字典, 指标表)
+        """
+        predictor = predictor or MultiPeriodPredictor()
+        backtester = backtester or TPlus0Backtester()
+
+        def frame(panel, symbol):
+            return pd.DataFrame({f: panel[f][symbol] for f in ['high', 'low', 'close']}).dropna()
+
+        predictions = {}
+        n_days = len(daily_panel['close'])
+        for symbol in daily_panel['close'].columns:
+            preds = predictor.predict_series(frame(daily_panel, symbol),
+                                             frame(weekly_panel, symbol),
+                                             frame(monthly_panel, symbol))
+            # 上市前无数据的日期补 Wait，保持与面板日期对齐
+            predictions[symbol] = [{'action': 'Wait'}] * (n_days - len(preds)) + preds
+
+        result = backtester.run_panel(daily_panel['high'], daily_panel['low'], daily_panel['close'], predictions)
+
+        # 组合按各标的价值加总
+        total_value = result['total_value'].to_numpy()
+        bench_value = result['benchmark_value'].to_numpy()
+        values = value_metrics(np.hstack([total_value, total_value.sum(axis=1, keepdims=True)]),
+                               np.hstack([bench_value, bench_value.sum(axis=1, keepdims=True)]))
+        trades = trade_code_metrics(result['trade_code'].to_numpy())
+        trade_days = np.append(trades['trade_days'], trades['trade_days'].sum())
+        success = np.append(trades['success_trades'], trades['success_trades'].sum())
+        metrics = pd.DataFrame({
+            'trade_days': trade_days,
+            'success_trades': success,
+            'win_rate': success / np.maximum(trade_days, 1),
+            **values,
+        }, index=list(daily_panel['close'].columns) + [PORTFOLIO])
+        return result, metrics
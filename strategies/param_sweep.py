@@ -0,0 +1,127 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from strategies.regime_detector import RegimeDetector
+from strategies.maotai_t_strategy import MaotaiTStrategy
+from strategies.backtester_v2 import BacktesterV2
+from strategies.multi_period_predictor import MultiPeriodPredictor
+from strategies.t_plus_0_backtester import TPlus0Backtester
+from strategies.metrics import multi_period_metrics
+from utils.shared_frames import SharedFrame
+
+# 可扫描的参数 (组件.参数名)：
+#   detector.window
+#   strategy.risk_on_t_ratio / volatile_t_ratio / risk_off_t_ratio / bb_window / bb_k
+#   backtester.t_cost                       (regime 流水线)
+#   predictor.atr_multiplier / atr_window   (multi_period 流水线)
+#   backtester.fee                          (multi_period 流水线)
+PIPELINES = ('regime', 'multi_period')
+
+# 子进程中挂载的共享行情 (由 _init_worker 设置)
+_SHARED = {}
+
+
+def expand_grid(grid):
+    """
+    参数网格 {name: [v1, v2, ...]} 展开为参数组合列表
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def split_params(params):
+    """
+    '组件.参数名' 形式的参数字典 -> {组件: {参数名: 取值}}，组件为 detector / strategy / predictor / backtester
+    """
+    parts = {'detector': {}, 'strategy': {}, 'predictor': {}, 'backtester': {}}
+    for key, value in params.items():
+        component, _, name = key.partition('.')
+        if component not in parts or not name:
+            raise ValueError(f"未知参数: {key}")
+        parts[component][name] = value
+    return parts
+
+
+def run_regime_pipeline(daily_df, params):
+    """
+    状态识别 -> 做T信号 -> BacktesterV2，返回数值指标
+    """
+    parts = split_params(params)
+    df = RegimeDetector(**parts['detector']).detect(daily_df.copy(deep=False))
+    df = MaotaiTStrategy(parts['strategy']).generate_signals(df)
+    return regime_metrics(BacktesterV2(**parts['backtester']).run(df))
+
+
+def regime_metrics(df):
+    """
+    BacktesterV2.run 结果的数值指标
+    """
+    return BacktesterV2.metrics(df)
+
+
+def run_multi_period_pipeline(daily_df, weekly_df, monthly_df, params):
+    """
+    多周期预测 -> TPlus0Backtester，返回数值指标
+    """
+    parts = split_params(params)
+    predictions = MultiPeriodPredictor(**parts['predictor']).predict_series(daily_df, weekly_df, monthly_df)
+    backtester = TPlus0Backtester(**parts['backtester'])
+    res_df = backtester.run(daily_df, predictions)
+    return multi_period_metrics(res_df, backtester.initial_value)
+
+
+def _init_worker(specs):
+    for key, spec in specs.items():
+        _SHARED[key] = SharedFrame.attach(spec)
+
+
+def _run_task(pipeline, params):
+    frames = {key: df for key, (_, df) in _SHARED.items()}
+    return _dispatch(pipeline, frames, params)
+
+
+def _dispatch(pipeline, frames, params):
+    if pipeline == 'regime':
+        return run_regime_pipeline(frames['daily'], params)
+    return run_multi_period_pipeline(frames['daily'], frames['weekly'], frames['monthly'], params)
+
+
+class ParameterSweep:
+    """
+    并行参数扫描引擎：
+    1. 行情只加载一次，放入共享内存供所有子进程读取
+    2. 参数组合分发到进程池并行回测
+    3. 汇总为一张参数 + 指标的结果表
+    """
+    def __init__(self, pipeline='regime', max_workers=None):
+        if pipeline not in PIPELINES:
+            raise ValueError(f"未知流水线: {pipeline}，可选 {PIPELINES}")
+        self.pipeline = pipeline
+        self.max_workers = max_workers or os.cpu_count()
+
+    def run(self, grid, daily_df, weekly_df=None, monthly_df=None):
+        """
+        grid: {参数名: 取值列表}，返回每个参数组合一行的结果表
+        """
+        combos = expand_grid(grid)
+        frames = {'daily': daily_df}
+        if self.pipeline == 'multi_period':
+            frames.update(weekly=weekly_df, monthly=monthly_df)
+
+        if self.max_workers <= 1 or len(combos) <= 1:
+            rows = [_dispatch(self.pipeline, frames, params) for params in combos]
+        else:
+            shared = {key: SharedFrame(df) for key, df in frames.items()}
+            try:
+                specs = {key: sf.spec for key, sf in shared.items()}
+                with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                         initargs=(specs,)) as pool:
+                    rows = list(pool.map(_run_task, itertools.repeat(self.pipeline), combos))
+            finally:
+                for sf in shared.values():
+                    sf.close()
+
+        return pd.concat([pd.DataFrame(combos), pd.DataFrame(rows)], axis=1)
@@ -1,5 +1,12 @@
+import copy
 import pandas as pd
 import numpy as np
+from utils import indicators
+from utils.rolling import RollingMean, RollingStd
+
+# 状态名称及精简模式下 regime 列的分类类型 (编码即 np.select 的条件序号)
+REGIMES = ['Risk-On', 'Volatile', 'Risk-Off', 'Low-Liquidity']
+REGIME_DTYPE = pd.CategoricalDtype(REGIMES)
 
 class RegimeDetector:
     """
@@ -10,31 +17,129 @@ class RegimeDetector:
     3. 系统性回撤 (Risk-Off): 指数破位，趋势向下
     4. 流动性收缩 (Low-Liquidity): 成交额下滑，横盘
     """
-    def __init__(self, window=20):
+    def __init__(self, window=20, index_std='full', lean=False):
         self.window = window
+        # 指数波动阈值所用标准差：'full' 为全样本 (新数据会改变全部历史状态)，
+        # 'expanding' 只使用截至当日的数据，与 StreamingRegimeDetector 一致
+        self.index_std = index_std
+        # 精简模式：只写入分类类型的 regime 列，均线/波动率等中间量不落为列 (长分钟线历史下内存占用更低)
+        self.lean = lean
+
+    def _index_std(self, index_close):
+        if self.index_std == 'expanding':
+            return indicators.expanding_std(index_close)
+        return index_close.std()
 
     def detect(self, df):
         """
         输入包含收盘价和指数价格的 DataFrame
         """
-        # 计算移动平均线
-        df['ma_index'] = df['index_close'].rolling(window=self.window).mean()
-        df['ma_stock'] = df['close'].rolling(window=self.window).mean()
-        
+        # 计算移动平均线 (指标经 utils.indicators 缓存，与做T信号等共用同一份结果)
+        index_close = df['index_close']
+        ma_index = indicators.rolling_mean(index_close, self.window)
+
         # 计算波动率 (ATR 简化版或标准差)
-        df['volatility'] = df['close'].pct_change().rolling(window=self.window).std()
-        
+        volatility = indicators.return_volatility(df['close'], self.window)
+
         # 计算成交量变化
-        df['vol_ma'] = df['volume'].rolling(window=self.window).mean()
-        
+        vol_ma = indicators.rolling_mean(df['volume'], self.window)
+
         # 状态判定逻辑
+        index_values = index_close.to_numpy()
+        index_move = np.abs(np.diff(index_values, prepend=np.nan))
         conditions = [
-            (df['index_close'] > df['ma_index']) & (df['volume'] > df['vol_ma']), # 风险偏好上升
-            (df['volatility'] > df['volatility'].rolling(window=60).mean()) & (df['index_close'].diff().abs() < df['index_close'].std()), # 高位震荡
-            (df['index_close'] < df['ma_index']), # 系统性回撤
+            (index_values > ma_index) & (df['volume'].to_numpy() > vol_ma), # 风险偏好上升
+            (volatility > indicators.rolling_mean(volatility, 60)) & (index_move < self._index_std(index_close)), # 高位震荡
+            (index_values < ma_index), # 系统性回撤
         ]
-        choices = ['Risk-On', 'Volatile', 'Risk-Off']
-        
-        df['regime'] = np.select(conditions, choices, default='Low-Liquidity')
-        
+
+        if self.lean:
+            codes = np.select(conditions, [0, 1, 2], default=3).astype(np.int8)
+            df['regime'] = pd.Categorical.from_codes(codes, dtype=REGIME_DTYPE)
+            return df
+
+        df['ma_index'] = ma_index
+        df['ma_stock'] = indicators.rolling_mean(df['close'], self.window)
+        df['volatility'] = volatility
+        df['vol_ma'] = vol_ma
+        df['regime'] = np.select(conditions, REGIMES[:3], default=REGIMES[3])
+
         return df
+
+    def detect_panel(self, panel):
+        """
+        面板版本：panel 为 {字段: 日期 x 标的 DataFrame}，'index_close' 为指数 Series
+        (或与标的同形状的 DataFrame，如压力测试中每条模拟路径各有一条指数)
+        一次向量化计算所有标的的市场状态，返回 日期 x 标的 的状态 DataFrame
+        """
+        close = panel['close']
+        volume = panel['volume']
+        index_close = panel['index_close']
+
+        ma_index = indicators.rolling_mean(index_close, self.window)
+        volatility = indicators.return_volatility(close, self.window)
+        vol_ma = indicators.rolling_mean(volume, self.window)
+
+        # 指数为 Series 时相关条件对所有标的相同，按列广播
+        shape = close.shape
+        index_values = index_close.to_numpy()
+        index_up = index_values > ma_index
+        index_down = index_values < ma_index
+        index_calm = np.asarray(index_close.diff().abs() < self._index_std(index_close))
+        if index_values.ndim == 1:
+            index_up, index_down, index_calm = index_up[:, None], index_down[:, None], index_calm[:, None]
+
+        conditions = [
+            np.broadcast_to(index_up & (volume.to_numpy() > vol_ma), shape), # 风险偏好上升
+            np.broadcast_to((volatility > indicators.rolling_mean(volatility, 60)) & index_calm, shape), # 高位震荡
+            np.broadcast_to(index_down, shape), # 系统性回撤
+        ]
+        regime = np.select(conditions, REGIMES[:3], default=REGIMES[3])
+        return pd.DataFrame(regime, index=close.index, columns=close.columns)
+
+
+class StreamingRegimeDetector:
+    """
+    增量市场状态识别：
+    以 O(window) 的环形缓冲保存 MA20 / 成交量均值 / 波动率 / 60日波动率均值 的窗口状态，
+    每根新K线 O(1) 更新，结果与 RegimeDetector(index_std='expanding').detect 逐行一致
+    """
+    def __init__(self, window=20):
+        self.window = window
+        self.ma_index = RollingMean(window)
+        self.vol_ma = RollingMean(window)
+        self.volatility = RollingStd(window)
+        self.volatility_ma = RollingMean(60)
+        self.index_std = RollingStd()
+        self.prev_close = np.nan
+        self.prev_index = np.nan
+        self.regime = None
+
+    def update(self, close, volume, index_close):
+        """
+        加入一根已收盘的K线，返回当日市场状态
+        """
+        ma_index = self.ma_index.update(index_close)
+        vol_ma = self.vol_ma.update(volume)
+        volatility = self.volatility.update(close / self.prev_close - 1)
+        volatility_ma = self.volatility_ma.update(volatility)
+        index_std = self.index_std.update(index_close)
+        index_move = abs(index_close - self.prev_index)
+        self.prev_close = close
+        self.prev_index = index_close
+
+        if index_close > ma_index and volume > vol_ma:
+            self.regime = 'Risk-On'
+        elif volatility > volatility_ma and index_move < index_std:
+            self.regime = 'Volatile'
+        elif index_close < ma_index:
+            self.regime = 'Risk-Off'
+        else:
+            self.regime = 'Low-Liquidity'
+        return self.regime
+
+    def preview(self, close, volume, index_close):
+        """
+        用尚未收盘的盘中价格试算状态，不改变内部状态 (用于盘中重新评估)
+        """
+        return copy.deepcopy(self).update(close, volume, index_close)
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+from strategies.monte_carlo import DEFAULT_QUANTILES, MonteCarloBacktest
+from strategies.panel import PanelBacktest
+from strategies.metrics import nav_metrics, trade_metrics, value_metrics
+
+# 单个分块中 日期 x 路径 矩阵的内存上限；状态识别/信号/回测期间每个单元格约占用 STRESS_CELL_BYTES
+MAX_CHUNK_BYTES = 256 * 1024 ** 2
+STRESS_CELL_BYTES = 600
+
+FIELDS = ['open', 'high', 'low', 'close', 'volume', 'index_close']
+
+
+class BlockBootstrap:
+    """
+    分块自助法生成模拟行情：
+    历史日线转为逐日相对前收盘的 开/高/低/收 比率、成交量及指数涨跌比率，
+    每条路径由随机起点的连续 block_size 天拼接而成，块内保留波动聚集、振幅与涨跌、个股与指数之间的关系
+    """
+    def __init__(self, daily_df, block_size=20):
+        df = daily_df[['open', 'high', 'low', 'close', 'volume', 'index_close']].copy()
+        df['index_close'] = df['index_close'].ffill()
+        df = df.dropna()
+        prev_close = df['close'].shift(1)
+
+        self.first = df.iloc[0]
+        self.index = df.index
+        self.ratios = pd.DataFrame({
+            'open': df['open'] / prev_close,
+            'high': df['high'] / prev_close,
+            'low': df['low'] / prev_close,
+            'close': df['close'] / prev_close,
+            'volume': df['volume'],
+            'index_close': df['index_close'] / df['index_close'].shift(1),
+        }).iloc[1:].to_numpy()
+        self.block_size = min(block_size, len(self.ratios))
+
+    def draw(self, rng, n_paths, n_days):
+        """
+        每条路径后 n_days - 1 天对应的历史行号 (路径 x 日期)，按路径顺序连续生成，分块大小不影响结果
+        """
+        n_blocks = -(-(n_days - 1) // self.block_size)
+        starts = rng.integers(0, len(self.ratios) - self.block_size + 1, size=(n_paths, n_blocks))
+        rows = starts[:, :, None] + np.arange(self.block_size)
+        return rows.reshape(n_paths, -1)[:, :n_days - 1]
+
+    def paths(self, rows):
+        """
+        由历史行号拼出 {字段: 日期 x 路径 数组}，首日均为历史首日
+        """
+        r = self.ratios[rows.T]  # 日期 x 路径 x 字段
+        n_paths = rows.shape[0]
+
+        def start(field):
+            return np.full((1, n_paths), float(self.first[field]))
+
+        close = np.cumprod(np.concatenate([start('close'), r[:, :, 3]]), axis=0)
+        prev_close = close[:-1]
+        return {
+            'open': np.concatenate([start('open'), prev_close * r[:, :, 0]]),
+            'high': np.concatenate([start('high'), prev_close * r[:, :, 1]]),
+            'low': np.concatenate([start('low'), prev_close * r[:, :, 2]]),
+            'close': close,
+            'volume': np.concatenate([start('volume'), r[:, :, 4]]),
+            'index_close': np.cumprod(np.concatenate([start('index_close'), r[:, :, 5]]), axis=0),
+        }
+
+
+class StressTest:
+    """
+    分块自助法压力测试：
+    1. 由历史日线生成 n_paths 条模拟行情 (个股 OHLCV + 指数)
+    2. 每条路径作为面板的一列，状态识别 -> 做T信号 -> 回测 在一次向量化计算中覆盖一个分块的全部路径，
+       各路径的做T胜负随机数独立抽取 (与行情抽样使用不同的随机数流)
+    3. 路径按块计算以限制内存，输出逐路径指标及相对死拿的超额收益 (alpha) 分布
+    """
+    def __init__(self, detector=None, strategy=None, backtester=None, n_paths=2000, n_days=None,
+                 block_size=20, seed=None, chunk_size=None, quantiles=DEFAULT_QUANTILES):
+        self.panel = PanelBacktest(detector, strategy, backtester)
+        self.n_paths = n_paths
+        self.n_days = n_days
+        self.block_size = block_size
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.quantiles = list(quantiles)
+
+    def _chunk_size(self, n_days):
+        if self.chunk_size:
+            return self.chunk_size
+        return max(1, MAX_CHUNK_BYTES // (n_days * STRESS_CELL_BYTES))
+
+    def evaluate(self, panel, rng=None):
+        """
+        对一个 日期 x 路径 面板运行完整链路，返回逐路径指标 DataFrame
+        rng: 做T胜负随机数的生成器 (None 时与单标的回测相同，用于历史路径对照)
+        """
+        result = self.panel.run(panel, rng=rng)
+        nav = result['strategy_nav'].to_numpy()
+        bench = result['benchmark_nav'].to_numpy()
+        metrics = nav_metrics(nav, result['strategy_daily_ret'].to_numpy())
+        metrics['benchmark_return'] = bench[-1] - 1
+        metrics['alpha'] = value_metrics(nav, bench)['alpha']
+        metrics.update(trade_metrics(result['t_profit'].to_numpy()))
+        return pd.DataFrame(metrics)
+
+    def run(self, daily_df):
+        """
+        daily_df: 含 OHLCV 及 index_close 的历史日线 (DataLoader.get_daily_data 的输出)
+        返回 {'metrics': 逐路径指标, 'summary': 分位数分布, 'historical': 历史实际路径的指标,
+              'prob_outperform': 跑赢死拿的路径比例}
+        """
+        bootstrap = BlockBootstrap(daily_df, self.block_size)
+        n_days = self.n_days or len(bootstrap.ratios) + 1
+        dates = pd.bdate_range(bootstrap.index[0], periods=n_days)
+        # 行情抽样与做T胜负各用一条独立的随机数流，两者都按路径顺序连续生成，结果与分块大小无关
+        rng, coin_rng = [np.random.default_rng(s) for s in np.random.SeedSequence(self.seed).spawn(2)]
+        chunk = self._chunk_size(n_days)
+
+        metrics = []
+        for start in range(0, self.n_paths, chunk):
+            m = min(chunk, self.n_paths - start)
+            arrays = bootstrap.paths(bootstrap.draw(rng, m, n_days))
+            columns = pd.RangeIndex(start, start + m, name='path')
+            panel = {field: pd.DataFrame(arrays[field], index=dates, columns=columns) for field in FIELDS}
+            metrics.append(self.evaluate(panel, coin_rng))
+            del arrays, panel
+
+        metrics = pd.concat(metrics, ignore_index=True)
+        metrics.index.name = 'path'
+
+        # 历史实际路径作为单列面板走同一链路，作为对照
+        history = {field: pd.DataFrame({0: daily_df[field]}) for field in FIELDS[:-1]}
+        history['index_close'] = daily_df['index_close'].ffill()
+        historical = self.evaluate(history).iloc[0]
+        return {
+            'metrics': metrics,
+            'summary': self.summarize(metrics),
+            'historical': historical,
+            'prob_outperform': float((metrics['alpha'] > 0).mean()),
+        }
+
+    # 各指标的均值、标准差及分位数
+    summarize = MonteCarloBacktest.summarize
@@ -1,6 +1,34 @@
 import pandas as pd
 import numpy as np
 
+# 预测动作编码 (结构化数组中使用整数存储)
+ACTIONS = ['Wait', 'BuyFirst', 'SellFirst', 'RangeT']
+ACTION_CODES = {name: code for code, name in enumerate(ACTIONS)}
+
+PREDICTION_DTYPE = np.dtype([
+    ('action', np.int8),
+    ('buy_price', np.float64),
+    ('sell_price', np.float64),
+])
+
+TRADE_TYPES = ['None', 'BuyFirst_Success', 'BuyFirst_Failed_Close',
+               'SellFirst_Success', 'SellFirst_Failed_Close']
+
+
+def to_prediction_array(predictions):
+    """
+    将预测字典列表转换为结构化数组 (action / buy_price / sell_price)
+    缺少价格的预测 (如数据不足时的 Wait) 以 NaN 填充
+    """
+    if isinstance(predictions, np.ndarray):
+        return predictions
+    arr = np.empty(len(predictions), dtype=PREDICTION_DTYPE)
+    arr['action'] = [ACTION_CODES[p['action']] for p in predictions]
+    arr['buy_price'] = [p.get('buy_price', np.nan) for p in predictions]
+    arr['sell_price'] = [p.get('sell_price', np.nan) for p in predictions]
+    return arr
+
+
 class TPlus0Backtester:
     """
     双向做T回测引擎：
@@ -14,80 +42,125 @@ class TPlus0Backtester:
         # 假设手中还有等值于 100 股茅台的现金
         self.initial_cash = None # 将在运行中根据第一天价格初始化
 
+    @property
+    def initial_value(self):
+        """
+        期初总资产：初始现金 + 首日持仓市值 (初始现金即等于首日持仓市值)
+        """
+        return None if self.initial_cash is None else self.initial_cash * 2
+
     def run(self, daily_df, predictions):
         """
-        predictions: 每日预测结果的列表
+        predictions: 每日预测结果的列表 (字典列表或 PREDICTION_DTYPE 结构化数组)
         """
-        results = []
-        shares = self.initial_shares
-        
-        # 初始化现金：等于第一天持仓价值
-        cash = shares * daily_df.iloc[0]['close']
-        self.initial_cash = cash
-        
-        # 记录初始总资产
-        initial_total_value = cash + shares * daily_df.iloc[0]['close']
-        
-        # 遍历每一天进行模拟
-        # 注意：预测是基于前一天数据，应用于当天
-        for i in range(1, len(daily_df)):
-            current_date = daily_df.index[i]
-            day_data = daily_df.iloc[i]
-            
-            # 获取针对这一天的预测 (由前一天生成)
-            # 在实际回测中，我们需要确保预测只使用 i-1 之前的数据
-            pred = predictions[i-1] 
-            
-            daily_profit = 0
-            trade_type = "None"
-            
-            # 模拟日内交易 (优化成交逻辑：预测区间必须被当日振幅完全覆盖才算成功)
-            if pred['action'] == 'BuyFirst':
-                # 先买：如果当日最低价触及买入价
-                if day_data['low'] <= pred['buy_price']:
-                    buy_cost = pred['buy_price'] * 100 * (1 + self.fee)
-                    # 尝试卖出：当日最高价必须触及卖出价
-                    if day_data['high'] >= pred['sell_price']:
-                        sell_revenue = pred['sell_price'] * 100 * (1 - self.fee)
-                        daily_profit = sell_revenue - buy_cost
-                        trade_type = "BuyFirst_Success"
-                    else:
-                        # 卖出失败，尾盘强制卖出
-                        sell_revenue = day_data['close'] * 100 * (1 - self.fee)
-                        daily_profit = sell_revenue - buy_cost
-                        trade_type = "BuyFirst_Failed_Close"
-            
-            elif pred['action'] == 'SellFirst' or pred['action'] == 'RangeT':
-                # 先卖：如果当日最高价触及卖出价
-                if day_data['high'] >= pred['sell_price']:
-                    sell_revenue = pred['sell_price'] * 100 * (1 - self.fee)
-                    # 尝试买回：当日最低价必须触及买入价
-                    if day_data['low'] <= pred['buy_price']:
-                        buy_cost = pred['buy_price'] * 100 * (1 + self.fee)
-                        daily_profit = sell_revenue - buy_cost
-                        trade_type = "SellFirst_Success"
-                    else:
-                        # 买回失败，尾盘强制买回
-                        buy_cost = day_data['close'] * 100 * (1 + self.fee)
-                        daily_profit = sell_revenue - buy_cost
-                        trade_type = "SellFirst_Failed_Close"
-            
-            cash += daily_profit
-            
-            results.append({
-                'date': current_date,
-                'close': day_data['close'],
-                'trade_type': trade_type,
-                'daily_profit': daily_profit,
-                'total_cash': cash,
-                'stock_value': shares * day_data['close'],
-                'total_value': cash + shares * day_data['close']
-            })
-            
-        res_df = pd.DataFrame(results)
-        res_df.set_index('date', inplace=True)
-        
+        high = np.ascontiguousarray(daily_df['high'].to_numpy(dtype=np.float64))
+        low = np.ascontiguousarray(daily_df['low'].to_numpy(dtype=np.float64))
+        close = np.ascontiguousarray(daily_df['close'].to_numpy(dtype=np.float64))
+        preds = to_prediction_array(predictions)
+
+        out = self.run_arrays(high, low, close, preds)
+
+        res_df = pd.DataFrame({
+            'close': close[1:],
+            'trade_type': np.array(TRADE_TYPES, dtype=object)[out['trade_code']],
+            'daily_profit': out['daily_profit'],
+            'total_cash': out['total_cash'],
+            'stock_value': out['stock_value'],
+            'total_value': out['total_value'],
+        }, index=daily_df.index[1:])
+        res_df.index.name = 'date'
+
         # 计算基准：死拿 100 股 + 初始现金
         res_df['benchmark_value'] = self.initial_cash + self.initial_shares * res_df['close']
-        
+
         return res_df
+
+    def run_panel(self, high, low, close, predictions):
+        """
+        面板版本：high/low/close 为 日期 x 标的 DataFrame
+        predictions: {标的: 预测列表} 或 日期 x 标的 结构化数组
+        返回 {字段: 日期 x 标的 DataFrame}
+        区间中途上市的标的，上市前的空收盘价以上市首日收盘价回填，初始现金及基准按上市首日收盘价计算
+        """
+        close = close.bfill()
+        if isinstance(predictions, dict):
+            preds = np.stack([to_prediction_array(predictions[s]) for s in close.columns], axis=1)
+        else:
+            preds = predictions
+
+        out = self.run_arrays(high.to_numpy(dtype=np.float64), low.to_numpy(dtype=np.float64),
+                              close.to_numpy(dtype=np.float64), preds)
+        index, columns = close.index[1:], close.columns
+        frames = {k: pd.DataFrame(v, index=index, columns=columns) for k, v in out.items()}
+        frames['trade_type'] = pd.DataFrame(np.array(TRADE_TYPES, dtype=object)[out['trade_code']],
+                                            index=index, columns=columns)
+        frames['benchmark_value'] = self.initial_cash + self.initial_shares * close.iloc[1:]
+        return frames
+
+    def run_arrays(self, high, low, close, preds):
+        """
+        数组内核：输入当日 high/low/close 数组及结构化预测数组，返回逐日结果数组
+        支持一维 (单标的) 或二维 日期 x 标的 (面板) 输入
+        注意：预测是基于前一天数据，应用于当天，即第 i 天使用 preds[i-1]
+        """
+        shares = self.initial_shares
+
+        # 初始化现金：等于第一天持仓价值
+        cash0 = shares * close[0]
+        self.initial_cash = cash0
+
+        h, l, c = high[1:], low[1:], close[1:]
+        daily_profit, trade_code = self._fills(h, l, c, preds[:len(close) - 1])
+
+        # 现金按顺序累加 (与逐日 cash += daily_profit 的浮点结果一致)
+        total_cash = np.cumsum(np.concatenate(([cash0], daily_profit)), axis=0)[1:]
+        stock_value = shares * c
+
+        return {
+            'trade_code': trade_code,
+            'daily_profit': daily_profit,
+            'total_cash': total_cash,
+            'stock_value': stock_value,
+            'total_value': total_cash + stock_value,
+        }
+
+    def step(self, cash, high, low, close, prediction):
+        """
+        增量版本：用上一交易日的预测撮合当日K线 (收盘后日常任务逐日推进)
+        prediction: 预测字典或 PREDICTION_DTYPE 记录；返回 (成交类型编码, 当日做T收益, 新的现金)
+        与 run_arrays 的逐日结果一致
+        """
+        pred = to_prediction_array([prediction]) if isinstance(prediction, dict) else np.asarray(prediction).reshape(1)
+        daily_profit, trade_code = self._fills(np.array([high], dtype=np.float64), np.array([low], dtype=np.float64),
+                                               np.array([close], dtype=np.float64), pred)
+        profit = float(daily_profit[0])
+        return int(trade_code[0]), profit, cash + profit
+
+    def _fills(self, h, l, c, pred):
+        """
+        按当日 high/low/close 及预测判定成交，返回 (当日做T收益, 成交类型编码)
+        """
+        action = pred['action']
+        buy_price = pred['buy_price']
+        sell_price = pred['sell_price']
+
+        buy_hit = l <= buy_price
+        sell_hit = h >= sell_price
+
+        # 模拟日内交易 (优化成交逻辑：预测区间必须被当日振幅完全覆盖才算成功)
+        # 先买：当日最低价触及买入价后，最高价触及卖出价则成功，否则尾盘强制卖出
+        buy_first = (action == ACTION_CODES['BuyFirst']) & buy_hit
+        bf_cost = buy_price * 100 * (1 + self.fee)
+        bf_revenue = np.where(sell_hit, sell_price, c) * 100 * (1 - self.fee)
+
+        # 先卖：当日最高价触及卖出价后，最低价触及买入价则成功，否则尾盘强制买回
+        sell_first = np.isin(action, (ACTION_CODES['SellFirst'], ACTION_CODES['RangeT'])) & sell_hit
+        sf_revenue = sell_price * 100 * (1 - self.fee)
+        sf_cost = np.where(buy_hit, buy_price, c) * 100 * (1 + self.fee)
+
+        daily_profit = np.where(buy_first, bf_revenue - bf_cost,
+                                np.where(sell_first, sf_revenue - sf_cost, 0.0))
+        trade_code = np.select(
+            [buy_first & sell_hit, buy_first, sell_first & buy_hit, sell_first],
+            [1, 2, 3, 4], default=0).astype(np.int8)
+        return daily_profit, trade_code
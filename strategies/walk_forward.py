@@ -0,0 +1,197 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from strategies.regime_detector import RegimeDetector
+from strategies.maotai_t_strategy import MaotaiTStrategy
+from strategies.backtester_v2 import BacktesterV2
+from strategies.multi_period_predictor import MultiPeriodPredictor
+from strategies.t_plus_0_backtester import TPlus0Backtester, to_prediction_array
+from strategies.metrics import multi_period_metrics
+from strategies.param_sweep import PIPELINES, expand_grid, split_params, regime_metrics
+
+# 各流水线训练期选参的默认目标 (越大越好)
+DEFAULT_OBJECTIVES = {'regime': 'sharpe', 'multi_period': 'alpha'}
+
+# 子进程中的预计算指标 (由 _init_worker 设置)
+_PRECOMPUTED = {}
+
+
+def make_folds(n, train_size, test_size, step=None, anchored=False):
+    """
+    生成训练/测试折的位置区间 (左闭右开)：
+    rolling 模式训练窗口长度固定；anchored 模式训练起点固定在 0，逐折扩展
+    step 默认等于 test_size，使各折测试区间首尾相接
+    """
+    step = step or test_size
+    folds = []
+    test_start = train_size
+    while test_start + test_size <= n:
+        folds.append({
+            'fold': len(folds),
+            'train_start': 0 if anchored else test_start - train_size,
+            'train_end': test_start,
+            'test_start': test_start,
+            'test_end': test_start + test_size,
+        })
+        test_start += step
+    return folds
+
+
+def fold_seed(seed, fold):
+    """
+    各折的做T胜负随机数种子：由基础种子和折编号派生，避免各折在各自区间上重复同一段随机数序列
+    """
+    return int(np.random.SeedSequence([seed, fold]).generate_state(1)[0])
+
+
+def _indicator_key(pipeline, params):
+    # 只影响回测器的参数不需要重新计算指标
+    parts = split_params(params)
+    names = ('detector', 'strategy') if pipeline == 'regime' else ('predictor',)
+    return tuple((name, tuple(sorted(parts[name].items()))) for name in names)
+
+
+def precompute(pipeline, params, daily_df, weekly_df=None, monthly_df=None):
+    """
+    在全部历史上计算一次指标，各折只截取所需区间
+    所有指标均只使用截至当日的数据 (状态识别使用扩展窗口的指数标准差)，
+    因此截取结果与在该折数据上单独计算 (含预热期) 一致 (指标数值仅有浮点舍入量级的差异)
+    """
+    parts = split_params(params)
+    if pipeline == 'regime':
+        detector_params = {'index_std': 'expanding', **parts['detector']}
+        df = RegimeDetector(**detector_params).detect(daily_df.copy(deep=False))
+        return MaotaiTStrategy(parts['strategy']).generate_signals(df)
+    predictions = MultiPeriodPredictor(**parts['predictor']).predict_series(daily_df, weekly_df, monthly_df)
+    return {'daily': daily_df[['high', 'low', 'close']], 'predictions': to_prediction_array(predictions)}
+
+
+def _evaluate(pipeline, data, params, start, end, seed):
+    """
+    在 [start, end) 区间回测，返回 (指标, 逐日 策略/基准 收益率)
+    区间前一根K线作为起点 (净值 1)，使首日收益与相邻折衔接
+    seed: 状态识别流水线的做T胜负随机数种子 (多周期流水线没有随机成分)
+    """
+    parts = split_params(params)
+    anchor = max(start - 1, 0)
+    if pipeline == 'regime':
+        df = BacktesterV2(**{'seed': seed, **parts['backtester']}).run(data.iloc[anchor:end])
+        metrics = regime_metrics(df)
+        returns = pd.DataFrame({'strategy_ret': df['strategy_daily_ret'], 'benchmark_ret': df['stock_ret']})
+        return metrics, returns.iloc[start - anchor:]
+
+    backtester = TPlus0Backtester(**parts['backtester'])
+    res_df = backtester.run(data['daily'].iloc[anchor:end], data['predictions'][anchor:end])
+    metrics = multi_period_metrics(res_df, backtester.initial_value)
+    values = res_df[['total_value', 'benchmark_value']] / backtester.initial_value
+    returns = values / values.shift(1).fillna(1.0) - 1
+    returns.columns = ['strategy_ret', 'benchmark_ret']
+    # TPlus0Backtester 的结果从起点的下一根开始，正好是区间内的交易日
+    return metrics, returns
+
+
+def _select(pipeline, combos, objective, fold, seed):
+    """
+    训练期内逐个参数组合回测，按目标选出最优组合 (各组合使用同一随机数序列，比较只反映参数差异)
+    """
+    scores = []
+    for key, params in combos:
+        metrics, _ = _evaluate(pipeline, _PRECOMPUTED[key], params, fold['train_start'], fold['train_end'], seed)
+        score = metrics[objective]
+        scores.append(-np.inf if score != score else score)
+    return int(np.argmax(scores)), scores
+
+
+def _run_fold(pipeline, combos, objective, fold, seed):
+    row = dict(fold)
+    seed = fold_seed(seed, fold['fold'])
+    if len(combos) > 1:
+        best, scores = _select(pipeline, combos, objective, fold, seed)
+        row[f'train_{objective}'] = scores[best]
+    else:
+        best = 0
+    key, params = combos[best]
+    row.update(params)
+    metrics, returns = _evaluate(pipeline, _PRECOMPUTED[key], params, fold['test_start'], fold['test_end'], seed)
+    row.update(metrics)
+    return row, returns
+
+
+def _init_worker(precomputed):
+    _PRECOMPUTED.update(precomputed)
+
+
+def _run_task(args):
+    return _run_fold(*args)
+
+
+class WalkForward:
+    """
+    滚动前推验证：
+    1. 历史切分为 训练/测试 折 (rolling 或 anchored)
+    2. 指标在全部历史上只计算一次，重叠区间的各折直接复用
+    3. 给定参数网格时在训练期选参，再在紧随其后的测试期样本外回测；各折并行执行
+    4. 输出逐折指标表及拼接的样本外净值曲线
+    状态识别流水线的做T胜负随机数按折派生种子 (fold_seed)，各折互不相关
+    """
+    def __init__(self, pipeline='regime', train_size=252, test_size=63, step=None, anchored=False,
+                 objective=None, max_workers=None, seed=42):
+        if pipeline not in PIPELINES:
+            raise ValueError(f"未知流水线: {pipeline}，可选 {PIPELINES}")
+        self.pipeline = pipeline
+        self.train_size = train_size
+        self.test_size = test_size
+        self.step = step
+        self.anchored = anchored
+        self.objective = objective or DEFAULT_OBJECTIVES[pipeline]
+        self.max_workers = max_workers or os.cpu_count()
+        self.seed = seed
+
+    def run(self, daily_df, weekly_df=None, monthly_df=None, grid=None):
+        """
+        grid: {参数名: 取值列表}，为空时各折使用默认参数
+        返回 (逐折指标表, 样本外净值 DataFrame)
+        """
+        folds = make_folds(len(daily_df), self.train_size, self.test_size, self.step, self.anchored)
+        if not folds:
+            raise ValueError(f"数据长度 {len(daily_df)} 不足一个折 (训练 {self.train_size} + 测试 {self.test_size})")
+
+        combos, precomputed = [], {}
+        for params in expand_grid(grid or {}):
+            key = _indicator_key(self.pipeline, params)
+            if key not in precomputed:
+                precomputed[key] = precompute(self.pipeline, params, daily_df, weekly_df, monthly_df)
+            combos.append((key, params))
+
+        tasks = [(self.pipeline, combos, self.objective, fold, self.seed) for fold in folds]
+        if self.max_workers <= 1 or len(folds) <= 1:
+            _init_worker(precomputed)
+            try:
+                results = [_run_task(task) for task in tasks]
+            finally:
+                _PRECOMPUTED.clear()
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(folds)),
+                                     initializer=_init_worker, initargs=(precomputed,)) as pool:
+                results = list(pool.map(_run_task, tasks))
+
+        table = pd.DataFrame([row for row, _ in results]).set_index('fold')
+        for col in ('train_start', 'train_end', 'test_start', 'test_end'):
+            # 结束位置为开区间，日期取区间内最后一个交易日
+            offset = 1 if col.endswith('end') else 0
+            table[col.replace('start', 'from').replace('end', 'to')] = daily_df.index[table[col] - offset]
+        return table, self.stitch([returns.assign(fold=fold['fold']) for (_, returns), fold in zip(results, folds)])
+
+    @staticmethod
+    def stitch(fold_returns):
+        """
+        按日期拼接各折样本外收益率 (测试区间重叠时保留较早一折)，复利得到净值
+        """
+        oos = pd.concat(fold_returns)
+        oos = oos[~oos.index.duplicated(keep='first')]
+        oos['strategy_nav'] = (1 + oos['strategy_ret']).cumprod()
+        oos['benchmark_nav'] = (1 + oos['benchmark_ret']).cumprod()
+        return oos
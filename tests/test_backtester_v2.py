@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+from strategies.backtester_v2 import BacktesterV2
+from strategies.maotai_t_strategy import MaotaiTStrategy
+from strategies.regime_detector import RegimeDetector
+from utils.synthetic_data import generate_ohlcv
+
+
+def signal_frame(n=600, seed=0):
+    df = generate_ohlcv(n, seed=seed)
+    df['index_close'] = 4000 * np.exp(np.cumsum(np.random.default_rng(seed + 1).normal(0, 0.01, n)))
+    return MaotaiTStrategy().generate_signals(RegimeDetector().detect(df))
+
+
+def test_vectorized_run_matches_reference_loop():
+    df = signal_frame()
+    assert (df['signal'] != 0).any()
+
+    bt = BacktesterV2()
+    fast = bt.run(df)
+    slow = bt.run_reference(df)
+    for column in ['t_profit', 'strategy_nav', 'benchmark_nav', 'strategy_daily_ret']:
+        np.testing.assert_array_equal(fast[column].to_numpy(), slow[column].to_numpy())
+
+
+def test_run_leaves_input_untouched():
+    df = signal_frame(200, seed=3)
+    before = df.copy()
+    BacktesterV2().run(df)
+    pd.testing.assert_frame_equal(df, before)
+
+
+def measured_frame():
+    # 逐行：买回信号 / 卖出信号 / 无信号 / 做T仓位为 0 / 无分钟线 (价差为 NaN) / 对应方向价差为 NaN
+    return pd.DataFrame({
+        'close': [100.0, 101.0, 99.0, 100.0, 102.0, 101.0],
+        'high': [101.0, 102.0, 101.0, 101.0, 103.0, 102.0],
+        'low': [99.0, 100.0, 98.0, 99.0, 100.0, 100.0],
+        'regime': ['Volatile'] * 6,
+        'signal': [1, -1, 0, 1, -1, 1],
+        'suggested_t_pos': [0.5, 0.7, 0.5, 0.0, 0.7, 0.5],
+        'long_spread': [0.02, 0.05, 0.03, 0.04, np.nan, np.nan],
+        'short_spread': [0.06, 0.01, 0.03, 0.04, np.nan, 0.02],
+    }, index=pd.bdate_range('2024-01-01', periods=6))
+
+
+def test_measured_profit_model():
+    df = measured_frame()
+    t_cost = 0.0005
+    expected = [0.02 * 0.5 * 0.5 - 2 * t_cost, 0.01 * 0.5 * 0.7 - 2 * t_cost, 0.0, 0.0, 0.0, 0.0]
+
+    result = BacktesterV2(t_cost=t_cost, profit_model='measured', capture=0.5).run(df)
+    np.testing.assert_allclose(result['t_profit'], expected, rtol=1e-12)
+    np.testing.assert_allclose(result['strategy_daily_ret'], result['stock_ret'] + result['t_profit'], rtol=1e-12)
+
+    lean = BacktesterV2(t_cost=t_cost, profit_model='measured', capture=0.5, lean=True).run(df.copy())
+    np.testing.assert_allclose(lean['t_profit'], expected, rtol=1e-6)
+
+
+def reference_metrics(df):
+    """
+    原有的 calculate_metrics 输出
+    """
+    total_ret = df['strategy_nav'].iloc[-1] - 1
+    bench_ret = df['benchmark_nav'].iloc[-1] - 1
+    annual_ret = (1 + total_ret) ** (252 / len(df)) - 1
+    rolling_max = df['strategy_nav'].cummax()
+    drawdown = (df['strategy_nav'] - rolling_max) / rolling_max
+    t_trades = df[df['t_profit'] != 0]
+    win_rate = len(t_trades[t_trades['t_profit'] > 0]) / len(t_trades) if len(t_trades) > 0 else 0
+    sharpe = (df['strategy_daily_ret'].mean() * 252 - 0.02) / (df['strategy_daily_ret'].std() * np.sqrt(252))
+    metrics = {
+        '策略总收益': f"{total_ret*100:.2f}%",
+        '基准总收益': f"{bench_ret*100:.2f}%",
+        '年化收益率': f"{annual_ret*100:.2f}%",
+        '最大回撤': f"{drawdown.min()*100:.2f}%",
+        '做T成功率': f"{win_rate*100:.2f}%",
+        '夏普比率': f"{sharpe:.2f}",
+        '总交易天数': len(t_trades)
+    }
+    return metrics, drawdown
+
+
+def test_calculate_metrics_keeps_original_output():
+    bt = BacktesterV2()
+    df = bt.run(signal_frame())
+    metrics, dd = bt.calculate_metrics(df)
+    expected, expected_dd = reference_metrics(df)
+
+    assert metrics == expected
+    assert type(metrics['总交易天数']) is int
+    np.testing.assert_allclose(dd, expected_dd, rtol=1e-12, atol=1e-15)
+    assert 'sortino' in bt.metrics(df)
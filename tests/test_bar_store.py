@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from utils.bar_store import BarStore
+from utils.synthetic_data import generate_minute
+
+
+def test_read_is_zero_copy(tmp_path, monkeypatch):
+    store = BarStore(str(tmp_path))
+    bars = generate_minute(3)
+    store.write('sh600519', '1', bars)
+
+    # 记录 read() 内部使用的映射数组，DataFrame 的索引及各列应直接建立在其上
+    mapped = {}
+    slice_ = store.slice
+
+    def recording_slice(*args, **kwargs):
+        mapped.update(slice_(*args, **kwargs))
+        return dict(mapped)
+
+    monkeypatch.setattr(store, 'slice', recording_slice)
+    df = store.read('sh600519', '1', start=bars.index[240], end=bars.index[-1].normalize())
+
+    assert np.shares_memory(np.asarray(df.index), mapped['timestamp'])
+    for col in BarStore.COLUMNS:
+        assert np.shares_memory(df[col].to_numpy(), mapped[col])
+    pd.testing.assert_frame_equal(df, bars.iloc[240:][BarStore.COLUMNS], check_freq=False, check_names=False,
+                                  check_index_type=False)
+
+
+def test_append_merges_overlap(tmp_path):
+    store = BarStore(str(tmp_path))
+    bars = generate_minute(3)
+    store.write('sh600519', '1', bars.iloc[:400])
+    store.write('sh600519', '1', bars.iloc[300:])
+
+    pd.testing.assert_frame_equal(store.read('sh600519', '1'), bars[BarStore.COLUMNS], check_freq=False,
+                                  check_names=False, check_index_type=False)
+    days, starts, ends = store.day_index('sh600519', '1')
+    assert len(days) == 3
+    assert (ends - starts == 240).all()
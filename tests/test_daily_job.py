@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from strategies.daily_job import DailyJob
+from strategies.multi_period_predictor import MultiPeriodPredictor
+from strategies.t_plus_0_backtester import TPlus0Backtester
+from utils.resample import resample_ohlcv
+from utils.synthetic_data import generate_multi_period
+
+COLUMNS = ['trade_type', 'daily_profit', 'total_cash', 'stock_value', 'total_value', 'benchmark_value']
+
+
+def batch(daily):
+    weekly, monthly = resample_ohlcv(daily, 'weekly'), resample_ohlcv(daily, 'monthly')
+    predictions = MultiPeriodPredictor().predict_series(daily, weekly, monthly)
+    return TPlus0Backtester().run(daily, predictions), predictions
+
+
+def test_journal_matches_batch_backtest():
+    daily = generate_multi_period(1000, seed=3)[0]
+    expected, _ = batch(daily)
+
+    # 分多次推进 (含周中断点)，检查点恢复后继续
+    job = DailyJob()
+    journal = pd.concat([job.extend(daily.iloc[:400]), job.extend(daily.iloc[:733]), job.extend(daily)])
+
+    # 批量回测从第二个交易日开始撮合
+    journal = journal.iloc[1:]
+    assert journal.index.equals(expected.index)
+    assert (journal['trade_type'] != 'None').any()
+    pd.testing.assert_frame_equal(journal[COLUMNS], expected[COLUMNS], check_freq=False, check_index_type=False)
+
+
+def test_recorded_prediction_matches_batch_on_history_so_far():
+    daily = generate_multi_period(300, seed=5)[0]
+    job = DailyJob()
+    for end in range(200, 300, 7):
+        row = job.extend(daily.iloc[:end]).iloc[-1]
+        last = batch(daily.iloc[:end])[1][-1]
+        assert row['action'] == last['action']
+        np.testing.assert_equal((row['buy_price'], row['sell_price']),
+                                (last.get('buy_price', np.nan), last.get('sell_price', np.nan)))
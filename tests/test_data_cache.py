@@ -0,0 +1,137 @@
+import pandas as pd
+import pytest
+
+from utils.data_cache import DataCache
+from utils.providers import FileProvider
+from utils.synthetic_data import generate_ohlcv
+
+SYMBOL = 'sh600519'
+
+
+class RecordingFetcher:
+    """
+    以 FileProvider 为数据源的 fetcher，记录每次请求的区间
+    """
+    def __init__(self, root, df):
+        self.provider = FileProvider(str(root))
+        self.provider.dump(SYMBOL, 'daily', df)
+        self.calls = []
+
+    def __call__(self, start_date, end_date):
+        self.calls.append((start_date, end_date))
+        return self.provider.fetch_stock(SYMBOL, 'daily', start_date, end_date)
+
+
+@pytest.fixture
+def history():
+    return generate_ohlcv(120, start='2024-01-01')
+
+
+@pytest.fixture
+def fetcher(tmp_path, history):
+    return RecordingFetcher(tmp_path / 'provider', history)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DataCache(str(tmp_path / 'cache'))
+
+
+def count_saves(monkeypatch, cache):
+    saves = []
+    save = cache.save
+    monkeypatch.setattr(cache, 'save', lambda *args: (saves.append(args[:2]), save(*args)))
+    return saves
+
+
+def test_fetches_only_missing_ranges(cache, fetcher, history):
+    first = cache.get(SYMBOL, 'daily', '20240201', '20240301', fetcher)
+    assert fetcher.calls == [('20240201', '20240301')]
+    pd.testing.assert_frame_equal(first, history.loc['2024-02-01':'2024-03-01'], check_freq=False)
+
+    # 完全命中：不再请求
+    cache.get(SYMBOL, 'daily', '20240205', '20240220', fetcher)
+    assert len(fetcher.calls) == 1
+
+    # 向前扩展：只请求缓存起点之前的区间
+    extended = cache.get(SYMBOL, 'daily', '20240115', '20240301', fetcher)
+    assert fetcher.calls[1] == ('20240115', '20240201')
+    pd.testing.assert_frame_equal(extended, history.loc['2024-01-15':'2024-03-01'], check_freq=False)
+    assert cache.load(SYMBOL, 'daily')[1] == (pd.Timestamp('2024-01-15'), pd.Timestamp('2024-03-01'))
+
+
+def test_resumes_from_last_cached_bar(cache, fetcher, history):
+    # 覆盖区间止于周日，最后一根缓存K线为周五
+    cache.get(SYMBOL, 'daily', '20240101', '20240303', fetcher)
+    last_bar = cache.load(SYMBOL, 'daily')[0].index[-1]
+    assert last_bar == pd.Timestamp('2024-03-01')
+
+    result = cache.get(SYMBOL, 'daily', '20240101', '20240315', fetcher)
+    assert fetcher.calls[-1] == ('20240301', '20240315')
+    pd.testing.assert_frame_equal(result, history.loc[:'2024-03-15'], check_freq=False)
+
+
+def test_complete_until_excludes_today():
+    today = pd.Timestamp.now().normalize()
+    assert DataCache._complete_until(today) == today - pd.Timedelta(days=1)
+    assert DataCache._complete_until(today + pd.Timedelta(days=5)) == today - pd.Timedelta(days=1)
+    assert DataCache._complete_until(pd.Timestamp('2024-03-01')) == pd.Timestamp('2024-03-01')
+
+
+def test_range_ending_today_is_refetched(cache, tmp_path):
+    today = pd.Timestamp.now().normalize()
+    df = generate_ohlcv(30, start=(today - pd.Timedelta(days=29)).strftime('%Y-%m-%d'), freq='D')
+    fetcher = RecordingFetcher(tmp_path / 'provider', df)
+    start, end = df.index[0].strftime('%Y%m%d'), today.strftime('%Y%m%d')
+
+    cache.get(SYMBOL, 'daily', start, end, fetcher)
+    assert cache.load(SYMBOL, 'daily')[1][1] == today - pd.Timedelta(days=1)
+
+    # 当天K线未计入覆盖区间，再次请求时从最后一根已收盘的缓存K线重新拉取 (同时覆盖当天K线)
+    cache.get(SYMBOL, 'daily', start, end, fetcher)
+    assert fetcher.calls[-1] == ((today - pd.Timedelta(days=1)).strftime('%Y%m%d'), end)
+
+
+def test_unchanged_refetch_does_not_rewrite_cache(cache, tmp_path, monkeypatch):
+    today = pd.Timestamp.now().normalize()
+    # 数据源只到昨天 (如周末/盘前)，补拉当天得到空结果
+    df = generate_ohlcv(30, start=(today - pd.Timedelta(days=30)).strftime('%Y-%m-%d'), freq='D')
+    fetcher = RecordingFetcher(tmp_path / 'provider', df)
+    start, end = df.index[0].strftime('%Y%m%d'), today.strftime('%Y%m%d')
+    cache.get(SYMBOL, 'daily', start, end, fetcher)
+
+    saves = count_saves(monkeypatch, cache)
+    cache.get(SYMBOL, 'daily', start, end, fetcher)
+    assert len(fetcher.calls) == 2
+    assert saves == []
+
+
+def test_rebased_history_is_refetched(cache, fetcher, history):
+    cache.get(SYMBOL, 'daily', '20240101', '20240301', fetcher)
+
+    # 3 月中旬除权除息：前复权价格以最新价为基准，之前的K线整体下调
+    rebased = history.copy()
+    prices = ['open', 'high', 'low', 'close']
+    rebased.loc[:'2024-03-14', prices] = (rebased.loc[:'2024-03-14', prices] * 0.97).round(2)
+    fetcher.provider.dump(SYMBOL, 'daily', rebased)
+
+    result = cache.get(SYMBOL, 'daily', '20240101', '20240329', fetcher)
+    assert fetcher.calls[-2:] == [('20240301', '20240329'), ('20240101', '20240329')]
+    pd.testing.assert_frame_equal(result, rebased.loc[:'2024-03-29'], check_freq=False)
+    pd.testing.assert_frame_equal(cache.load(SYMBOL, 'daily')[0], rebased.loc[:'2024-03-29'], check_freq=False)
+
+    # 复权基准未变时只补拉新K线
+    cache.get(SYMBOL, 'daily', '20240101', '20240405', fetcher)
+    assert fetcher.calls[-1] == ('20240329', '20240405')
+
+
+def test_offline_reads_cache_without_fetching(cache, fetcher, history):
+    with pytest.raises(FileNotFoundError):
+        cache.get(SYMBOL, 'daily', '20240201', '20240301', fetcher, offline=True)
+    assert fetcher.calls == []
+
+    cache.get(SYMBOL, 'daily', '20240201', '20240301', fetcher)
+    # 离线时超出缓存的部分不会请求，只返回已缓存的K线
+    result = cache.get(SYMBOL, 'daily', '20240101', '20240401', fetcher, offline=True)
+    assert len(fetcher.calls) == 1
+    pd.testing.assert_frame_equal(result, history.loc['2024-02-01':'2024-03-01'], check_freq=False)
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import indicators
+from utils.indicators import BLOCK_SIZE
+
+N = 3 * BLOCK_SIZE + 123
+
+
+def price_series(n=N, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.Series(1500 * np.exp(np.cumsum(rng.normal(0, 0.01, n))))
+
+
+def with_gaps(series):
+    # NaN 段 (跨分块边界)、单个 NaN 及 ±inf
+    values = series.to_numpy().copy()
+    values[BLOCK_SIZE - 30:BLOCK_SIZE + 40] = np.nan
+    values[2 * BLOCK_SIZE + 7] = np.nan
+    values[500] = np.inf
+    values[3 * BLOCK_SIZE + 50:3 * BLOCK_SIZE + 53] = -np.inf
+    return pd.Series(values)
+
+
+def reference(values):
+    # 含 ±inf 的窗口结果为 NaN，对应 pandas 中把 ±inf 视作缺失值
+    return values.replace([np.inf, -np.inf], np.nan)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    indicators.cache().clear()
+    yield
+    indicators.cache().clear()
+
+
+@pytest.mark.parametrize('window', [5, 20, BLOCK_SIZE + 10])
+@pytest.mark.parametrize('gaps', [False, True])
+def test_rolling_mean_std_match_pandas(window, gaps):
+    values = price_series()
+    if gaps:
+        values = with_gaps(values)
+    rolling = reference(values).rolling(window)
+
+    np.testing.assert_allclose(indicators.rolling_mean(values, window), rolling.mean(), rtol=1e-10)
+    np.testing.assert_allclose(indicators.rolling_std(values, window), rolling.std(), rtol=1e-6)
+
+
+def test_two_dimensional_matches_pandas():
+    frame = pd.DataFrame({i: price_series(seed=i) for i in range(3)})
+    frame[1] = with_gaps(frame[1])
+    rolling = reference(frame).rolling(20)
+
+    np.testing.assert_allclose(indicators.rolling_mean(frame, 20), rolling.mean(), rtol=1e-10)
+    np.testing.assert_allclose(indicators.rolling_std(frame, 20), rolling.std(), rtol=1e-6)
+
+
+def test_atr_matches_pandas():
+    close = price_series()
+    rng = np.random.default_rng(1)
+    high = close * (1 + rng.uniform(0, 0.02, N))
+    low = close * (1 - rng.uniform(0, 0.02, N))
+    prev_close = close.shift()
+    true_range = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+
+    np.testing.assert_allclose(indicators.atr(high, low, close, 14), true_range.rolling(14).mean(), rtol=1e-10)
+
+
+def test_in_place_modification_is_recomputed():
+    values = price_series().to_numpy().copy()
+    before = indicators.rolling_mean(values, 20)
+
+    values[BLOCK_SIZE] *= 2
+    after = indicators.rolling_mean(values, 20)
+    assert not np.array_equal(before, after, equal_nan=True)
+    np.testing.assert_allclose(after, pd.Series(values).rolling(20).mean(), rtol=1e-10)
+
+    # DataFrame 列原地赋值同理
+    df = pd.DataFrame({'close': price_series()})
+    before = indicators.rolling_std(df['close'], 20)
+    df.loc[100, 'close'] = 1.0
+    after = indicators.rolling_std(df['close'], 20)
+    assert not np.array_equal(before, after, equal_nan=True)
+    np.testing.assert_allclose(after, df['close'].rolling(20).std(), rtol=1e-6)
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from strategies.intraday_simulator import IntradayFillSimulator
+from utils.bar_store import BarStore
+from utils.synthetic_data import generate_minute
+
+SYMBOL = 'sh600519'
+
+
+def daily_and_predictions(minute):
+    daily = minute.groupby(minute.index.normalize()).agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+    # 交替先买后卖 / 先卖后买，买卖价为收盘价上下 0.5%
+    predictions = [{'action': 'BuyFirst' if i % 2 else 'SellFirst', 'buy_price': c * 0.995, 'sell_price': c * 1.005}
+                   for i, c in enumerate(daily['close'])]
+    return daily, predictions
+
+
+def test_symbol_without_minute_bars(tmp_path):
+    minute = generate_minute(40, bars_per_day=8)
+    daily, predictions = daily_and_predictions(minute)
+    store = BarStore(str(tmp_path))
+    store.write(SYMBOL, '1', minute.iloc[:0])
+
+    result = IntradayFillSimulator(store, SYMBOL).run(daily, predictions)
+    assert len(result) == len(daily) - 1
+    assert (result['minute_bars'] == 0).all()
+    assert (result['trade_type'] == 'None').all()
+    np.testing.assert_array_equal(result['total_cash'], result['total_cash'].iloc[0])
+
+
+def test_partial_minute_coverage(tmp_path):
+    minute = generate_minute(40, bars_per_day=8)
+    daily, predictions = daily_and_predictions(minute)
+    store = BarStore(str(tmp_path))
+    covered_days = daily.index[25:]
+    store.write(SYMBOL, '1', minute[minute.index.normalize().isin(covered_days)])
+
+    result = IntradayFillSimulator(store, SYMBOL).run(daily, predictions)
+    covered = result['minute_bars'] > 0
+    assert covered.sum() == len(covered_days)
+    assert (result.loc[~covered, 'trade_type'] == 'None').all()
+    assert (result.loc[covered, 'trade_type'] != 'None').any()
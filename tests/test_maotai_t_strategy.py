@@ -0,0 +1,33 @@
+import numpy as np
+
+from strategies.maotai_t_strategy import Backtester
+
+
+def round_trip(bt, close, sold, open_, close_):
+    """
+    从第 open_ 根减仓 sold 股到第 close_ 根买回的整次往返损益 (含两端佣金及卖出印花税)
+    """
+    sell_fees = sold * close[open_] * (bt.fee + bt.stamp_tax)
+    buy_fees = sold * close[close_] * bt.fee
+    return sold * (close[open_] - close[close_]) - sell_fees - buy_fees
+
+
+def test_simulate_records_round_trip_profit_on_buy_back():
+    close = np.array([100.0, 102.0, 105.0, 103.0, 98.0, 99.0, 101.0, 104.0, 100.0, 97.0])
+    signal = np.array([0, -1, 0, 0, 1, 0, -1, 1, -1, 0])
+    t_pos = np.full(len(close), 0.5)
+    bt = Backtester(initial_capital=1000000)
+    out = bt.simulate(close, signal, t_pos)
+
+    sold = out['shares'][0] - out['shares'][1]
+    assert sold > 0
+    values = out['strategy_value']
+    expected = np.zeros(len(close))
+    # 第 1 根减仓、第 4 根买回；第 6 根减仓、第 7 根买回；第 8 根减仓后至期末未买回，不计
+    expected[4] = round_trip(bt, close, sold, 1, 4) / values[0]
+    expected[7] = round_trip(bt, close, sold, 6, 7) / values[5]
+
+    np.testing.assert_allclose(out['t_profit'], expected, rtol=1e-9, atol=1e-15)
+    assert np.count_nonzero(out['t_profit']) == 2
+    # 逐根收益分解不受影响
+    np.testing.assert_allclose(out['strategy_daily_ret'], out['stock_ret'] + out['t_ret'], rtol=1e-9, atol=1e-15)
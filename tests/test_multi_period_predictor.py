@@ -0,0 +1,106 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.multi_period_predictor import MultiPeriodPredictor
+from strategies.t_plus_0_backtester import ACTIONS
+from utils.resample import resample_ohlcv
+from utils.synthetic_data import generate_multi_period
+
+
+def baseline_trend(df):
+    ma5 = df['close'].rolling(5).mean()
+    ma20 = df['close'].rolling(20).mean()
+    if ma5.iloc[-1] > ma20.iloc[-1]:
+        return 1
+    elif ma5.iloc[-1] < ma20.iloc[-1]:
+        return -1
+    return 0
+
+
+def baseline_predict_next_day(daily_df, weekly_df, monthly_df):
+    """
+    原有的 predict_next_day：每天对截取的历史调用 pandas rolling
+    """
+    m_trend, w_trend, d_trend = baseline_trend(monthly_df), baseline_trend(weekly_df), baseline_trend(daily_df)
+    high_low = daily_df['high'] - daily_df['low']
+    high_close = np.abs(daily_df['high'] - daily_df['close'].shift())
+    low_close = np.abs(daily_df['low'] - daily_df['close'].shift())
+    true_range = np.max(pd.concat([high_low, high_close, low_close], axis=1), axis=1)
+    atr = true_range.rolling(14).mean().iloc[-1]
+    last_close = daily_df['close'].iloc[-1]
+    if m_trend == w_trend == d_trend and m_trend != 0:
+        action = 'BuyFirst' if m_trend == 1 else 'SellFirst'
+    else:
+        action = 'Wait'
+    return {'date': daily_df.index[-1], 'trend_m': m_trend, 'trend_w': w_trend, 'trend_d': d_trend,
+            'action': action, 'buy_price': last_close - 0.25 * atr, 'sell_price': last_close + 0.25 * atr}
+
+
+def predict_loop(predict_next_day, daily_df, weekly_df, monthly_df):
+    """
+    原有的逐日截取历史预测循环 (run_multi_period_backtest.py)
+    """
+    predictions = []
+    for i in range(len(daily_df)):
+        current_date = daily_df.index[i]
+        d_sub = daily_df.iloc[:i+1]
+        w_sub = weekly_df[weekly_df.index <= current_date]
+        m_sub = monthly_df[monthly_df.index <= current_date]
+        if len(d_sub) < 20 or len(w_sub) < 5 or len(m_sub) < 2:
+            predictions.append({'action': 'Wait'})
+            continue
+        predictions.append(predict_next_day(d_sub, w_sub, m_sub))
+    return predictions
+
+
+def multi_period(calendar, n=600, seed=2):
+    daily, weekly, monthly = generate_multi_period(n, seed)
+    if calendar:
+        weekly, monthly = resample_ohlcv(daily, 'weekly'), resample_ohlcv(daily, 'monthly')
+    return daily, weekly, monthly
+
+
+@lru_cache
+def baseline_predictions(calendar):
+    return predict_loop(baseline_predict_next_day, *multi_period(calendar))
+
+
+@pytest.mark.parametrize('calendar', [False, True])
+def test_predict_series_matches_loop(calendar):
+    data = multi_period(calendar)
+    expected = baseline_predictions(calendar)
+    result = MultiPeriodPredictor().predict_series(*data)
+
+    actions = [p['action'] for p in expected]
+    # 预热期 (日线不足 20 根 / 周线不足 5 根 / 月线不足 2 根) 的 Wait 及之后的交易信号都要覆盖
+    assert actions[0] == 'Wait' and set(actions) - {'Wait'}
+    assert result == expected
+
+
+@pytest.mark.parametrize('calendar', [False, True])
+def test_predict_array_matches_loop(calendar):
+    data = multi_period(calendar)
+    expected = baseline_predictions(calendar)
+    result = MultiPeriodPredictor().predict_array(*data)
+
+    assert [ACTIONS[code] for code in result['action']] == [p['action'] for p in expected]
+    np.testing.assert_array_equal(result['buy_price'], [p.get('buy_price', np.nan) for p in expected])
+    np.testing.assert_array_equal(result['sell_price'], [p.get('sell_price', np.nan) for p in expected])
+
+
+def test_predict_next_day_loop_matches_series():
+    # 现在的 predict_next_day 使用分块累计和内核，ATR 与 pandas 的在线累加可能相差末位
+    data = multi_period(True)
+    predictor = MultiPeriodPredictor()
+    expected = predict_loop(predictor.predict_next_day, *data)
+    result = predictor.predict_series(*data)
+
+    assert [p['action'] for p in result] == [p['action'] for p in expected]
+    for got, want in zip(result, expected):
+        assert got.keys() == want.keys()
+        for key in ('buy_price', 'sell_price'):
+            if key in want:
+                assert got[key] == pytest.approx(want[key], rel=1e-12)
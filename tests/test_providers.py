@@ -0,0 +1,50 @@
+import akshare as ak
+import pandas as pd
+import pytest
+
+from utils.data_cache import DataCache
+from utils.providers import AkShareProvider, RetryingProvider
+
+
+class FlakyProvider:
+    """
+    前 failures 次调用抛出 error，之后返回空表
+    """
+    def __init__(self, error, failures):
+        self.error = error
+        self.failures = failures
+        self.calls = 0
+
+    def fetch_index(self, symbol, start_date, end_date):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return pd.DataFrame()
+
+
+def test_empty_fetch_returns_empty_bars(monkeypatch, tmp_path):
+    monkeypatch.setattr(ak, 'stock_zh_a_hist', lambda **kwargs: pd.DataFrame())
+    monkeypatch.setattr(ak, 'stock_zh_index_daily_em', lambda **kwargs: pd.DataFrame())
+    provider = AkShareProvider()
+
+    # 只含周末的区间
+    for df in (provider.fetch_stock('sh600519', 'daily', '20240106', '20240107'),
+               provider.fetch_index('sh000300', '20240106', '20240107')):
+        assert df.empty
+        assert isinstance(df.index, pd.DatetimeIndex)
+        assert list(df.columns) == ['open', 'high', 'low', 'close', 'volume']
+
+    cache = DataCache(str(tmp_path))
+    fetcher = lambda start, end: provider.fetch_stock('sh600519', 'daily', start, end)
+    assert cache.get('sh600519', 'daily', '20240106', '20240107', fetcher).empty
+
+
+def test_retries_only_transient_errors():
+    provider = FlakyProvider(ConnectionError('reset'), failures=2)
+    assert RetryingProvider(provider, retries=3, backoff=0).fetch_index('sh000300', '20240101', '20240105').empty
+    assert provider.calls == 3
+
+    provider = FlakyProvider(KeyError('日期'), failures=1)
+    with pytest.raises(KeyError):
+        RetryingProvider(provider, retries=3, backoff=0).fetch_index('sh000300', '20240101', '20240105')
+    assert provider.calls == 1
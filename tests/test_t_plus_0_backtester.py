@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.multi_period_predictor import MultiPeriodPredictor
+from strategies.t_plus_0_backtester import TPlus0Backtester
+from utils.resample import resample_ohlcv
+from utils.synthetic_data import generate_multi_period
+
+
+def reference_run(daily_df, predictions, fee=0.0002, shares=100):
+    """
+    原有的逐日循环撮合
+    """
+    cash = initial_cash = shares * daily_df['close'].iloc[0]
+    rows = []
+    for i in range(1, len(daily_df)):
+        day, pred = daily_df.iloc[i], predictions[i - 1]
+        profit, trade_type = 0, 'None'
+        if pred['action'] == 'BuyFirst':
+            if day['low'] <= pred['buy_price']:
+                buy_cost = pred['buy_price'] * 100 * (1 + fee)
+                if day['high'] >= pred['sell_price']:
+                    profit, trade_type = pred['sell_price'] * 100 * (1 - fee) - buy_cost, 'BuyFirst_Success'
+                else:
+                    profit, trade_type = day['close'] * 100 * (1 - fee) - buy_cost, 'BuyFirst_Failed_Close'
+        elif pred['action'] in ('SellFirst', 'RangeT'):
+            if day['high'] >= pred['sell_price']:
+                sell_revenue = pred['sell_price'] * 100 * (1 - fee)
+                if day['low'] <= pred['buy_price']:
+                    profit, trade_type = sell_revenue - pred['buy_price'] * 100 * (1 + fee), 'SellFirst_Success'
+                else:
+                    profit, trade_type = sell_revenue - day['close'] * 100 * (1 + fee), 'SellFirst_Failed_Close'
+        cash += profit
+        rows.append({'date': daily_df.index[i], 'close': day['close'], 'trade_type': trade_type,
+                     'daily_profit': profit, 'total_cash': cash, 'stock_value': shares * day['close'],
+                     'total_value': cash + shares * day['close']})
+    res_df = pd.DataFrame(rows).set_index('date')
+    res_df['benchmark_value'] = initial_cash + shares * res_df['close']
+    return res_df
+
+
+def scenario():
+    """
+    逐日构造的成交场景：(当日 最高/最低/收盘, 当日收盘后对次日的预测)，注释为当日按上一交易日预测的成交
+    """
+    days = [
+        ((101, 99, 100), ('BuyFirst', 99, 101)),
+        ((101.5, 98.5, 100.5), ('SellFirst', 99, 102)),      # 先买：买卖价均触及
+        ((102.5, 98.0, 99.0), ('BuyFirst', 98, 100)),        # 先卖：买卖价均触及
+        ((99.5, 97.0, 97.5), ('SellFirst', 96, 99)),         # 先买：只触及买入价，尾盘卖出
+        ((99.5, 97.5, 99.2), ('BuyFirst', 98, 101)),         # 先卖：只触及卖出价，尾盘买回
+        ((96.0, 94.0, 95.0), ('SellFirst', 94, 96)),         # 先买：跳空低开穿过买入价，按买入价成交
+        ((99.0, 97.0, 98.0), ('RangeT', 97, 99)),            # 先卖：跳空高开穿过卖出价，按卖出价成交
+        ((99.5, 96.5, 97.0), ('Wait', 96, 98)),              # 区间做T：按先卖撮合
+        ((98.5, 95.5, 96.0), ('BuyFirst', 90, 100)),         # 观望
+        ((97.0, 95.0, 96.5), ('SellFirst', 97.5, 98)),       # 先买：价格未触及
+        ((97.0, 95.0, 96.0), ('Wait', np.nan, np.nan)),      # 先卖：价格未触及
+        ((96.5, 95.5, 96.2), ('Wait', np.nan, np.nan)),      # 数据不足时的观望
+    ]
+    index = pd.bdate_range('2024-01-01', periods=len(days))
+    daily = pd.DataFrame([bar for bar, _ in days], columns=['high', 'low', 'close'], index=index)
+    predictions = [{'action': action, 'buy_price': buy, 'sell_price': sell} for _, (action, buy, sell) in days]
+    return daily, predictions
+
+
+def test_scenario_matches_loop():
+    daily, predictions = scenario()
+    result = TPlus0Backtester().run(daily, predictions)
+
+    assert list(result['trade_type']) == [
+        'BuyFirst_Success', 'SellFirst_Success', 'BuyFirst_Failed_Close', 'SellFirst_Failed_Close',
+        'BuyFirst_Failed_Close', 'SellFirst_Failed_Close', 'SellFirst_Success', 'None', 'None', 'None', 'None']
+    pd.testing.assert_frame_equal(result, reference_run(daily, predictions), check_freq=False, check_dtype=False)
+
+
+@pytest.mark.parametrize('seed', [0, 3])
+def test_synthetic_history_matches_loop(seed):
+    daily = generate_multi_period(800, seed)[0]
+    predictions = MultiPeriodPredictor().predict_series(daily, resample_ohlcv(daily, 'weekly'),
+                                                        resample_ohlcv(daily, 'monthly'))
+    result = TPlus0Backtester().run(daily, predictions)
+
+    assert (result['trade_type'] != 'None').sum() > 10
+    pd.testing.assert_frame_equal(result, reference_run(daily, predictions), check_freq=False, check_dtype=False,
+                                  check_index_type=False)
+
+
+def test_step_matches_run():
+    daily, predictions = scenario()
+    backtester = TPlus0Backtester()
+    expected = backtester.run(daily, predictions)
+
+    cash = backtester.initial_cash
+    for i, (high, low, close) in enumerate(daily.iloc[1:].to_numpy()):
+        code, profit, cash = backtester.step(cash, high, low, close, predictions[i])
+        assert profit == expected['daily_profit'].iloc[i]
+        assert cash == expected['total_cash'].iloc[i]
+
+
+def test_panel_matches_single_symbol():
+    daily, predictions = scenario()
+    synthetic = generate_multi_period(300, 1)[0]
+    synthetic_predictions = MultiPeriodPredictor().predict_series(
+        synthetic, resample_ohlcv(synthetic, 'weekly'), resample_ohlcv(synthetic, 'monthly'))
+
+    # 单列面板
+    panel = TPlus0Backtester().run_panel(daily[['high']].rename(columns={'high': 'A'}),
+                                         daily[['low']].rename(columns={'low': 'A'}),
+                                         daily[['close']].rename(columns={'close': 'A'}), {'A': predictions})
+    single = TPlus0Backtester().run(daily, predictions)
+    for field in single.columns.drop('close'):
+        pd.testing.assert_series_equal(panel[field]['A'], single[field], check_names=False, check_freq=False,
+                                       check_dtype=False)
+
+    # 多列面板逐列与单标的一致
+    frames = {'A': synthetic, 'B': synthetic * 1.1}
+    preds = {'A': synthetic_predictions, 'B': [dict(p, buy_price=p.get('buy_price', np.nan) * 1.1,
+                                                    sell_price=p.get('sell_price', np.nan) * 1.1)
+                                               for p in synthetic_predictions]}
+    high, low, close = (pd.DataFrame({s: df[field] for s, df in frames.items()}) for field in ('high', 'low', 'close'))
+    panel = TPlus0Backtester().run_panel(high, low, close, preds)
+    for symbol, df in frames.items():
+        single = TPlus0Backtester().run(df, preds[symbol])
+        for field in ('trade_type', 'daily_profit', 'total_cash', 'total_value', 'benchmark_value'):
+            pd.testing.assert_series_equal(panel[field][symbol], single[field], check_names=False,
+                                           check_freq=False, check_dtype=False, check_index_type=False)
@@ -0,0 +1,101 @@
+import os
+import numpy as np
+import pandas as pd
+
+
+class BarStore:
+    """
+    内存映射列式K线存储：
+    root/<symbol>/<period>/ 下每列一个 .npy 文件 (timestamp 为 int64 纳秒，其余列 float64)
+    读取时使用 np.load 内存映射，按时间区间二分切片，只有实际访问的页才会载入内存，
+    多年的 1 分钟线也无需整体读入 pandas；read() 返回的 DataFrame 直接建立在映射之上 (零拷贝)
+    """
+    COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+    def __init__(self, root="bar_store"):
+        self.root = root
+
+    def _dir(self, symbol, period):
+        return os.path.join(self.root, symbol, str(period))
+
+    def exists(self, symbol, period):
+        return os.path.exists(os.path.join(self._dir(symbol, period), "timestamp.npy"))
+
+    def write(self, symbol, period, df, append=True):
+        """
+        写入K线 (df 为时间索引，至少包含 COLUMNS 列)
+        append=True 时与已有数据合并，时间重复的K线以新数据为准；
+        合并后整体重写各列文件，耗时与已有历史长度成正比 (O(历史))，适合按天批量导入而非逐根追加
+        """
+        df = df[self.COLUMNS].sort_index()
+        if append and self.exists(symbol, period):
+            old = self.read(symbol, period)
+            df = pd.concat([old, df])
+            df = df[~df.index.duplicated(keep="last")].sort_index()
+
+        path = self._dir(symbol, period)
+        os.makedirs(path, exist_ok=True)
+        timestamps = df.index.values.astype("datetime64[ns]").view(np.int64)
+        self._save(path, "timestamp", timestamps)
+        for col in self.COLUMNS:
+            self._save(path, col, df[col].to_numpy(dtype=np.float64))
+
+        # 交易日索引：每个交易日在列数组中的起止位置
+        days = timestamps.view("datetime64[ns]").astype("datetime64[D]")
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]]) if len(days) else np.empty(0, np.int64)
+        self._save(path, "day", days[starts].astype("datetime64[D]").view(np.int64))
+        self._save(path, "day_start", starts.astype(np.int64))
+
+    @staticmethod
+    def _save(path, name, values):
+        # 先写临时文件再替换：已映射旧文件的读者继续看到旧数据，不会因文件被截断而出错
+        tmp = os.path.join(path, f"{name}.npy.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, values)
+        os.replace(tmp, os.path.join(path, f"{name}.npy"))
+
+    def columns(self, symbol, period, columns=None, mmap_mode="r"):
+        """
+        返回 {列名: 内存映射数组}，包含 'timestamp'
+        mmap_mode='c' 为写时复制映射：可在内存中修改，不会写回文件
+        """
+        path = self._dir(symbol, period)
+        names = ["timestamp"] + list(columns or self.COLUMNS)
+        return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in names}
+
+    def day_index(self, symbol, period):
+        """
+        返回 (交易日 datetime64[D] 数组, 起始位置, 结束位置)
+        """
+        path = self._dir(symbol, period)
+        days = np.load(os.path.join(path, "day.npy")).view("datetime64[D]")
+        starts = np.load(os.path.join(path, "day_start.npy"))
+        n = len(np.load(os.path.join(path, "timestamp.npy"), mmap_mode="r"))
+        ends = np.append(starts[1:], n)
+        return days, starts, ends
+
+    def slice(self, symbol, period, start=None, end=None, columns=None, mmap_mode="r"):
+        """
+        按时间区间零拷贝切片，返回 {列名: 数组视图}
+        """
+        cols = self.columns(symbol, period, columns, mmap_mode)
+        ts = cols["timestamp"]
+        lo = 0 if start is None else np.searchsorted(ts, pd.Timestamp(start).value, side="left")
+        if end is None:
+            hi = len(ts)
+        else:
+            end = pd.Timestamp(end)
+            if end == end.normalize():
+                # 只给日期时包含当天全部K线
+                end = end + pd.Timedelta(days=1) - pd.Timedelta(1)
+            hi = np.searchsorted(ts, end.value, side="right")
+        return {name: arr[lo:hi] for name, arr in cols.items()}
+
+    def read(self, symbol, period, start=None, end=None, columns=None):
+        """
+        读取区间K线为 DataFrame：索引及各列均为写时复制映射上的视图，不复制数据；
+        修改 DataFrame 只影响本进程内存中被改写的页，不会改动存储文件
+        """
+        cols = self.slice(symbol, period, start, end, columns, mmap_mode="c")
+        index = pd.DatetimeIndex(np.asarray(cols.pop("timestamp")).view("datetime64[ns]"), name="date", copy=False)
+        return pd.DataFrame({name: np.asarray(arr) for name, arr in cols.items()}, index=index, copy=False)
@@ -0,0 +1,119 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+
+class DataCache:
+    """
+    本地行情缓存：按 标的/周期 存储为列式文件 (Parquet / Feather)
+    1. 命中缓存时直接读文件，不再重复下载历史K线
+    2. 只向数据源请求缓存之外的缺失区间，并合并回缓存
+    3. 离线模式下只读缓存，绝不访问网络
+    """
+    def __init__(self, cache_dir="data_cache", fmt="parquet"):
+        if fmt not in ("parquet", "feather"):
+            raise ValueError(f"不支持的缓存格式: {fmt}")
+        self.cache_dir = cache_dir
+        self.fmt = fmt
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, symbol, period):
+        return os.path.join(self.cache_dir, f"{symbol}_{period}.{self.fmt}")
+
+    def _meta_path(self, symbol, period):
+        return os.path.join(self.cache_dir, f"{symbol}_{period}.meta.json")
+
+    def load(self, symbol, period):
+        """
+        读取缓存，返回 (DataFrame, 已覆盖区间)；无缓存时返回 (None, None)
+        """
+        path = self.path(symbol, period)
+        if not os.path.exists(path):
+            return None, None
+        if self.fmt == "parquet":
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_feather(path).set_index("date")
+
+        coverage = None
+        meta_path = self._meta_path(symbol, period)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            coverage = (pd.Timestamp(meta["start"]), pd.Timestamp(meta["end"]))
+        elif len(df) > 0:
+            coverage = (df.index[0], df.index[-1])
+        return df, coverage
+
+    def save(self, symbol, period, df, coverage):
+        df = df.sort_index()
+        df.index.name = "date"
+        if self.fmt == "parquet":
+            df.to_parquet(self.path(symbol, period))
+        else:
+            df.reset_index().to_feather(self.path(symbol, period))
+        with open(self._meta_path(symbol, period), "w") as f:
+            json.dump({"start": coverage[0].strftime("%Y%m%d"),
+                       "end": coverage[1].strftime("%Y%m%d")}, f)
+
+    def get(self, symbol, period, start_date, end_date, fetcher, offline=False):
+        """
+        按区间获取数据
+        fetcher: fetcher(start_date, end_date) -> DataFrame (日期索引)，日期格式 YYYYMMDD
+        """
+        start = pd.Timestamp(start_date)
+        end = pd.Timestamp(end_date)
+        cached, coverage = self.load(symbol, period)
+
+        if cached is None:
+            if offline:
+                raise FileNotFoundError(f"离线模式下缺少缓存: {self.path(symbol, period)}")
+            merged = fetcher(start.strftime("%Y%m%d"), end.strftime("%Y%m%d"))
+            new_coverage = (start, self._complete_until(end))
+        else:
+            merged = cached
+            new_coverage = coverage
+            if not offline:
+                pieces = [cached]
+                complete = cached.loc[:coverage[1]]
+                if start < coverage[0]:
+                    pieces.insert(0, fetcher(start.strftime("%Y%m%d"),
+                                             coverage[0].strftime("%Y%m%d")))
+                    new_coverage = (start, new_coverage[1])
+                if end > coverage[1]:
+                    # 从最后一根已收盘的缓存K线开始重新拉取：覆盖可能未走完的K线，重叠的一根用于校验复权基准
+                    resume = complete.index[-1] if len(complete) > 0 else coverage[1]
+                    pieces.append(fetcher(resume.strftime("%Y%m%d"),
+                                          end.strftime("%Y%m%d")))
+                    new_coverage = (new_coverage[0], max(coverage[1], self._complete_until(end)))
+                if any(self._rebased(complete, piece) for piece in pieces if piece is not cached):
+                    # 除权除息后前复权价格整体重算，新旧K线不再衔接：重新拉取整个区间
+                    merged = fetcher(new_coverage[0].strftime("%Y%m%d"),
+                                     max(end, coverage[1]).strftime("%Y%m%d"))
+                elif len(pieces) > 1:
+                    merged = pd.concat(pieces)
+                    merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+
+        # 只在数据或已覆盖区间有变化时写回 (如周末拉取当天K线为空时不重写缓存)
+        if cached is None or new_coverage != coverage or not merged.equals(cached):
+            self.save(symbol, period, merged, new_coverage)
+        return merged.loc[start:end].copy()
+
+    @staticmethod
+    def _rebased(cached, fetched):
+        """
+        新拉取的K线与已缓存K线重叠部分的价格不一致时返回 True (前复权基准已变化)
+        """
+        common = cached.index.intersection(fetched.index)
+        if len(common) == 0:
+            return False
+        columns = [c for c in ("open", "high", "low", "close") if c in cached.columns]
+        return not np.allclose(cached.loc[common, columns].to_numpy(dtype=float),
+                               fetched.loc[common, columns].to_numpy(dtype=float), rtol=1e-9, equal_nan=True)
+
+    @staticmethod
+    def _complete_until(end):
+        # 今天的K线可能尚未收盘，不计入已覆盖区间，下次运行会再拉取
+        today = pd.Timestamp.now().normalize()
+        return min(end, today - pd.Timedelta(days=1))
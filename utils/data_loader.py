@@ -1,52 +1,131 @@
-import akshare as ak
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from utils.data_cache import DataCache
+from utils.providers import AkShareProvider, ReplayProvider, RetryingProvider
+from utils.resample import resample_ohlcv
 
 class DataLoader:
     """
     数据加载类：负责从 AkShare 获取茅台及大盘数据
+    cache_dir: 本地缓存目录，设置后优先读取缓存，仅增量拉取缺失区间
+    offline: 离线模式，只读缓存，不访问网络
+    provider: 数据源 (见 utils/providers.py)，默认为带超时重试的 AkShare
+    replay: BarStore 目录 (或实例)，设置后从本地内存映射库回放行情，不访问网络也不使用 cache_dir
     """
-    def __init__(self, symbol="sh600519", index_symbol="sh000300"):
+    def __init__(self, symbol="sh600519", index_symbol="sh000300", cache_dir=None, offline=False,
+                 provider=None, replay=None):
         self.symbol = symbol  # 贵州茅台
         self.index_symbol = index_symbol  # 沪深300
+        if replay is not None:
+            # 回放数据已在本地且为零拷贝读取，不再经过 Parquet 缓存
+            provider, cache_dir, offline = ReplayProvider(replay), None, False
+        self.provider = provider or RetryingProvider(AkShareProvider())
+        self.cache = DataCache(cache_dir) if cache_dir else None
+        self.offline = offline
+        if offline and self.cache is None:
+            raise ValueError("离线模式需要指定 cache_dir")
 
-    def get_data(self, period="daily", start_date="20200101", end_date="20260101"):
+    def get_data(self, period="daily", start_date="20200101", end_date="20260101", symbol=None):
         """
         获取指定周期的数据 (daily, weekly, monthly)
+        symbol: 默认为 self.symbol
         """
-        print(f"正在获取 {self.symbol} {period} 数据...")
-        df = ak.stock_zh_a_hist(symbol=self.symbol.replace("sh", ""), period=period, 
-                               start_date=start_date, end_date=end_date, adjust="qfq")
-        df['date'] = pd.to_datetime(df['日期'])
-        df.set_index('date', inplace=True)
-        df = df[['开盘', '最高', '最低', '收盘', '成交量']]
-        df.columns = ['open', 'high', 'low', 'close', 'volume']
-        return df
+        symbol = symbol or self.symbol
+        if self.cache is None:
+            return self._fetch_stock(symbol, period, start_date, end_date)
+        return self.cache.get(symbol, period, start_date, end_date,
+                              lambda s, e: self._fetch_stock(symbol, period, s, e),
+                              offline=self.offline)
 
-    def get_multi_period_data(self, start_date, end_date):
+    def get_index_data(self, start_date="20200101", end_date="20260101"):
+        """
+        获取指数日线数据
+        """
+        if self.cache is None:
+            return self._fetch_index(start_date, end_date)
+        return self.cache.get(self.index_symbol, "daily", start_date, end_date,
+                              self._fetch_index, offline=self.offline)
+
+    def _fetch_stock(self, symbol, period, start_date, end_date):
+        print(f"正在获取 {symbol} {period} 数据...")
+        return self.provider.fetch_stock(symbol, period, start_date, end_date)
+
+    def _fetch_index(self, start_date, end_date):
+        print(f"正在获取 {self.index_symbol} 指数数据...")
+        return self.provider.fetch_index(self.index_symbol, start_date, end_date)
+
+    def get_daily_data(self, start_date, end_date):
+        """
+        获取日线数据并附加指数收盘价 (index_close 列)，两个请求并发执行
+        """
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            daily_future = pool.submit(self.get_data, "daily", start_date, end_date)
+            index_future = pool.submit(self.get_index_data, start_date, end_date)
+            daily = daily_future.result()
+            index_df = index_future.result()
+        daily['index_close'] = index_df['close']
+        return daily
+
+    def get_multi_period_data(self, start_date, end_date, derive=True):
         """
         获取日、周、月多周期数据
+        derive=True 时只下载日线和指数，周/月线由日线按交易日历本地聚合，三者来自同一份快照；
+        否则四个请求并发执行，总耗时约等于最慢的一个
         """
-        daily = self.get_data("daily", start_date, end_date)
-        weekly = self.get_data("weekly", start_date, end_date)
-        monthly = self.get_data("monthly", start_date, end_date)
-        
-        # 获取指数数据作为参考
-        index_df = ak.stock_zh_index_daily(symbol=self.index_symbol)
-        index_df['date'] = pd.to_datetime(index_df['date'])
-        index_df.set_index('date', inplace=True)
-        
+        periods = ("daily",) if derive else ("daily", "weekly", "monthly")
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(self.get_data, period, start_date, end_date) for period in periods]
+            # 获取指数数据作为参考
+            index_future = pool.submit(self.get_index_data, start_date, end_date)
+            frames = [f.result() for f in futures]
+            index_df = index_future.result()
+
+        daily = frames[0]
+        if derive:
+            weekly = resample_ohlcv(daily, "weekly")
+            monthly = resample_ohlcv(daily, "monthly")
+        else:
+            weekly, monthly = frames[1:]
+
         daily['index_close'] = index_df['close']
         return daily, weekly, monthly
 
-    def get_minute_data(self, period='1'):
+    def get_panel_data(self, symbols, start_date, end_date, period="daily"):
+        """
+        获取多只股票的面板数据：返回 {字段: 日期 x 标的 DataFrame}
+        各标的按日期并集对齐，停牌日沿用前收盘价、成交量记为 0
+        日线面板额外包含 'index_close' (指数收盘价 Series)
+        """
+        with ThreadPoolExecutor(max_workers=min(8, len(symbols))) as pool:
+            results = pool.map(lambda symbol: self.get_data(period, start_date, end_date, symbol=symbol), symbols)
+            frames = dict(zip(symbols, results))
+        dates = frames[symbols[0]].index
+        for df in frames.values():
+            dates = dates.union(df.index)
+
+        panel = {}
+        for field in ['open', 'high', 'low', 'close', 'volume']:
+            wide = pd.DataFrame({symbol: df[field] for symbol, df in frames.items()}, index=dates)
+            panel[field] = wide.fillna(0) if field == 'volume' else wide
+        # 停牌日：开高低收均取前收盘价
+        close = panel['close'].ffill()
+        for field in ['open', 'high', 'low']:
+            panel[field] = panel[field].fillna(close)
+        panel['close'] = close
+
+        if period == "daily":
+            panel['index_close'] = self.get_index_data(start_date, end_date)['close'].reindex(dates)
+        return panel
+
+    def get_minute_data(self, period='1', store=None):
         """
         获取分钟级数据 (AkShare 接口通常返回最近几个交易日的数据)
+        store: 可选的 BarStore，新拉取的分钟线会追加写入，逐日积累长期历史
         """
         print(f"正在获取 {self.symbol} {period}分钟线数据...")
-        df = ak.stock_zh_a_hist_min_em(symbol=self.symbol.replace("sh", ""), period=period, adjust="qfq")
-        df['时间'] = pd.to_datetime(df['时间'])
-        df.set_index('时间', inplace=True)
-        df.columns = ['open', 'close', 'high', 'low', 'volume', 'amount', 'amplitude', 'pct_chg', 'turnover']
+        df = self.provider.fetch_minute(self.symbol, period)
+        if store is not None and not isinstance(self.provider, ReplayProvider):
+            store.write(self.symbol, period, df, append=True)
         return df
@@ -0,0 +1,288 @@
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+# 缓存条目上限 (每个条目为一个与输入同形状的 float64 数组)
+DEFAULT_CACHE_SIZE = 256
+
+# 滚动内核分块累加的块长 (行数)
+BLOCK_SIZE = 4096
+
+
+# ---------------------------------------------------------------------------
+# 单遍内核：沿第 0 轴 (日期) 计算，支持一维序列及 日期 x 标的 二维矩阵
+# 窗口内有 NaN 时只统计有效值，有效值不足 window 个时结果为 NaN (与 pandas rolling 一致)
+# 精度：均值与 pandas 一致到 ~1e-15；标准差与精确两遍算法的相对误差一般 < 1e-9，窗口很小且波动远小于
+# 价格水平时 (如百万根分钟线上的 5 根窗口) 可达 ~3e-7。pandas 的在线更新在长序列上漂移更大 (同场景 ~1e-4)，
+# 因此与 pandas rolling().std() 比较时应按 ~1e-6 的相对容差
+# ---------------------------------------------------------------------------
+
+def _cumulative(values):
+    """
+    有效个数 / 和 / 平方和的累计值 (首行补 0)，先减去每列均值再累加以降低舍入误差
+    """
+    valid = ~np.isnan(values)
+    ref = np.where(valid, values, 0.0).sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+    y = np.where(valid, values - ref, 0.0)
+    pad = np.zeros((1,) + values.shape[1:])
+    count = np.concatenate([pad, np.cumsum(valid, axis=0, dtype=np.float64)])
+    s1 = np.concatenate([pad, np.cumsum(y, axis=0)])
+    s2 = np.concatenate([pad, np.cumsum(y * y, axis=0)])
+    return count, s1, s2, ref
+
+
+def _window(cum, window):
+    # 第 i 行窗口 [i - window + 1, i] 的和 = 累计值之差
+    hi = np.arange(1, len(cum))
+    lo = np.maximum(hi - window, 0)
+    return cum[hi] - cum[lo]
+
+
+def _window_moments(values, window):
+    """
+    各窗口的 有效个数 / 和 / 平方和 (相对每行所在分块的均值 ref)
+    整段历史一次累加时，长序列 (如百万根分钟线) 累计平方和的舍入误差会淹没小窗口的方差，
+    因此按 BLOCK_SIZE 分块：块内以块均值为基准单独累加，跨两块的窗口把前一块的部分平移到当前块基准后合并
+    """
+    n = len(values)
+    size = max(min(BLOCK_SIZE, n), window, 1)
+    n_blocks = -(-n // size)
+    rest = values.shape[1:]
+    padded = np.full((n_blocks * size,) + rest, np.nan)
+    padded[:n] = values
+    padded = padded.reshape((n_blocks, size) + rest)
+
+    valid = ~np.isnan(padded)
+    ref = np.where(valid, padded, 0.0).sum(axis=1) / np.maximum(valid.sum(axis=1), 1)
+    y = np.where(valid, padded - ref[:, None], 0.0)
+    cum = [np.cumsum(a, axis=1).reshape((-1,) + rest)[:n] for a in (valid.astype(np.float64), y, y * y)]
+
+    # 块内窗口：累计值之差
+    moments = []
+    for c in cum:
+        m = c.copy()
+        m[window:] -= c[:-window]
+        moments.append(m)
+
+    # 起点不在当前块内的窗口 (块内偏移 < window)：补上前一块的块尾累计值，并平移到当前块基准
+    i = np.arange(n)
+    rows = i[(i % size < window) & (i >= size)]
+    if len(rows):
+        block = rows // size
+        end = block * size - 1
+        n0, t1 = [c[end] - c[rows - window] for c in cum[:2]]
+        d = ref[block - 1] - ref[block]
+        count, s1, s2 = moments
+        count[rows] += cum[0][end]
+        s1[rows] += cum[1][end] + n0 * d
+        s2[rows] += cum[2][end] + 2 * d * t1 + n0 * d * d
+    return (*moments, np.repeat(ref, size, axis=0)[:n])
+
+
+def _constant(values, window):
+    """
+    窗口内取值是否完全相同 (如停牌期间的收盘价、零收益率)
+    此时均值直接取该值、标准差取 0，与 pandas 一致，不受累计和舍入误差影响
+    """
+    changed = np.zeros(values.shape)
+    changed[1:] = values[1:] != values[:-1]
+    pad = np.zeros((1,) + values.shape[1:])
+    return _window(np.concatenate([pad, np.cumsum(changed, axis=0)]), window - 1) == 0
+
+
+def _finite(values, window):
+    """
+    ±inf (如价格为 0 时的收益率) 不参与累计，否则会污染整个分块；含 ±inf 的窗口结果为 NaN
+    返回 (±inf 替换为 NaN 后的数组, 含 ±inf 的窗口掩码，无 ±inf 时为 None)
+    """
+    inf = np.isinf(values)
+    if not inf.any():
+        return values, None
+    pad = np.zeros((1,) + values.shape[1:])
+    return np.where(inf, np.nan, values), _window(np.concatenate([pad, np.cumsum(inf, axis=0)]), window) > 0
+
+
+def _std(count, s1, s2, ddof, min_periods):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # 舍入误差可能使方差略小于 0
+        var = np.maximum((s2 - s1 * s1 / count) / (count - ddof), 0.0)
+    return np.where((count >= min_periods) & (count > ddof), np.sqrt(var), np.nan)
+
+
+def rolling_mean_kernel(values, window):
+    values, infinite = _finite(np.asarray(values, dtype=np.float64), window)
+    count, s1, _, ref = _window_moments(values, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(_constant(values, window), values, s1 / count + ref)
+    mean = np.where(count >= window, mean, np.nan)
+    return mean if infinite is None else np.where(infinite, np.nan, mean)
+
+
+def rolling_std_kernel(values, window, ddof=1):
+    values, infinite = _finite(np.asarray(values, dtype=np.float64), window)
+    std = _std(*_window_moments(values, window)[:3], ddof, window)
+    std = np.where(_constant(values, window) & ~np.isnan(std), 0.0, std)
+    return std if infinite is None else np.where(infinite, np.nan, std)
+
+
+def expanding_std_kernel(values, ddof=1):
+    values, infinite = _finite(np.asarray(values, dtype=np.float64), len(values))
+    count, s1, s2, _ = _cumulative(values)
+    std = _std(count[1:], s1[1:], s2[1:], ddof, 1)
+    return std if infinite is None else np.where(infinite, np.nan, std)
+
+
+def pct_change_kernel(values):
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out[1:] = values[1:] / values[:-1] - 1
+    return out
+
+
+def true_range_kernel(high, low, close):
+    """
+    真实波幅：max(最高 - 最低, |最高 - 昨收|, |最低 - 昨收|)，首日只有 最高 - 最低
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    prev_close = np.full(high.shape, np.nan)
+    prev_close[1:] = np.asarray(close, dtype=np.float64)[:-1]
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+# ---------------------------------------------------------------------------
+# 记忆化缓存
+# ---------------------------------------------------------------------------
+
+def _identity(values):
+    """
+    序列标识：底层内存块 (最外层 ndarray) + 在其中的区间 (起始地址、形状、步长) + 内容摘要
+    同一 DataFrame 的同一列、浅拷贝 (copy(deep=False)) 及 SharedFrame 挂载的同一块内存得到相同标识；
+    写时复制只保护被其他对象引用的数据，自有数据的原地修改 (df.loc[...] = x、ndarray 赋值) 不换内存，
+    因此可写内存块上的区间还要按内容摘要区分 (百万行约 8ms，远小于内核本身)，修改后不会命中过期结果；
+    只读内存块 (如缓存输出的数组) 内容不变，省去摘要。无法摘要的 object 数组返回 None，不参与缓存
+    """
+    arr = np.asarray(values)
+    if arr.dtype.hasobject:
+        return None, None
+    root = arr
+    while isinstance(root.base, np.ndarray):
+        root = root.base
+    digest = None
+    if root.flags.writeable:
+        digest = hashlib.sha1(np.ascontiguousarray(arr).view(np.uint8), usedforsecurity=False).digest()
+    key = (id(root), arr.__array_interface__['data'][0], arr.shape, arr.strides, arr.dtype.str, digest)
+    return key, root
+
+
+class IndicatorCache:
+    """
+    指标记忆化缓存 (LRU)：键为 (指标名, 参数, 各输入序列的标识)
+    条目弱引用输入的内存块，内存块释放后即使地址被复用也不会误命中；
+    新增条目时顺带清除输入已释放的条目 (如压力测试逐块生成的路径矩阵)，不必等 LRU 淘汰
+    返回的数组为只读，避免调用方修改缓存内容
+    """
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name, params, inputs, compute):
+        ids = [_identity(v) for v in inputs]
+        if any(root is None for _, root in ids):
+            result = compute(*[np.asarray(v) for v in inputs])
+            result.flags.writeable = False
+            return result
+        key = (name, params) + tuple(k for k, _ in ids)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and all(ref() is root for ref, (_, root) in zip(entry[0], ids)):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        result = compute(*[np.asarray(v) for v in inputs])
+        result.flags.writeable = False
+        with self._lock:
+            for dead in [k for k, (refs, _) in self._entries.items() if any(r() is None for r in refs)]:
+                del self._entries[dead]
+            self._entries[key] = ([weakref.ref(root) for _, root in ids], result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_CACHE = IndicatorCache()
+
+
+def cache():
+    """
+    进程内共享的指标缓存
+    """
+    return _CACHE
+
+
+# ---------------------------------------------------------------------------
+# 记忆化指标：输入为 Series / 日期 x 标的 DataFrame / ndarray，返回只读 ndarray
+# 缓存的输出本身地址固定，可作为其他指标的输入继续命中缓存 (如 波动率 -> 波动率均值)
+# ---------------------------------------------------------------------------
+
+def rolling_mean(values, window):
+    return _CACHE.get('rolling_mean', (window,), (values,), lambda v: rolling_mean_kernel(v, window))
+
+
+def rolling_std(values, window, ddof=1):
+    return _CACHE.get('rolling_std', (window, ddof), (values,), lambda v: rolling_std_kernel(v, window, ddof))
+
+
+def expanding_std(values, ddof=1):
+    return _CACHE.get('expanding_std', (ddof,), (values,), lambda v: expanding_std_kernel(v, ddof))
+
+
+def pct_change(values):
+    return _CACHE.get('pct_change', (), (values,), pct_change_kernel)
+
+
+def return_volatility(close, window):
+    """
+    收益率的滚动标准差
+    """
+    return rolling_std(pct_change(close), window)
+
+
+def true_range(high, low, close):
+    return _CACHE.get('true_range', (), (high, low, close), true_range_kernel)
+
+
+def atr(high, low, close, window=14):
+    """
+    平均真实波幅：真实波幅的 window 日简单均值
+    """
+    return rolling_mean(true_range(high, low, close), window)
+
+
+def bollinger(close, window=20, k=2):
+    """
+    布林带：返回 (中轨, 标准差, 上轨, 下轨)
+    """
+    ma = rolling_mean(close, window)
+    std = rolling_std(close, window)
+    upper = _CACHE.get('bollinger_upper', (window, k), (ma, std), lambda m, s: m + k * s)
+    lower = _CACHE.get('bollinger_lower', (window, k), (ma, std), lambda m, s: m - k * s)
+    return ma, std, upper, lower
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+# 分钟线 -> 日线微结构特征
+FEATURES = ['vwap', 'realized_vol', 'high_time', 'low_time', 'long_spread', 'short_spread',
+            'open_volume_share', 'close_volume_share']
+
+MINUTE_NS = 60 * 10 ** 9
+DAY_NS = 24 * 60 * MINUTE_NS
+
+
+def day_features(timestamp, open_, high, low, close, volume, open_minutes=30, close_minutes=30):
+    """
+    单个交易日的分钟K线 (int64 纳秒时间戳及各列数组) -> 特征元组 (顺序同 FEATURES)
+    vwap: 以分钟收盘价按成交量加权的均价
+    realized_vol: 日内分钟对数收益率的已实现波动率 (不含隔夜)
+    high_time / low_time: 最高价 / 最低价首次出现的时刻 (距零点的分钟数，如 571 为 9:31)
+    long_spread / short_spread: 先买后卖 / 先卖后买 的最大可实现价差 (第二笔须在第一笔之后的K线上)，相对当日开盘价
+    open_volume_share / close_volume_share: 开盘后 / 收盘前 open_minutes / close_minutes 分钟内的成交量占比
+    """
+    n = len(close)
+    if n == 0:
+        return (np.nan,) * len(FEATURES)
+    total_volume = volume.sum()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        vwap = (close * volume).sum() / total_volume
+        realized_vol = np.sqrt((np.diff(np.log(close)) ** 2).sum()) if n > 1 else np.nan
+        day_start = timestamp[0] - timestamp[0] % DAY_NS
+        high_time = (timestamp[np.argmax(high)] - day_start) // MINUTE_NS
+        low_time = (timestamp[np.argmin(low)] - day_start) // MINUTE_NS
+
+        # 第 j 根K线之前的最低价 / 最高价，与之后K线的最高价 / 最低价之差即为以 j 为第二笔的最大价差
+        if n > 1:
+            long_spread = (high[1:] - np.minimum.accumulate(low[:-1])).max() / open_[0]
+            short_spread = (np.maximum.accumulate(high[:-1]) - low[1:]).max() / open_[0]
+        else:
+            long_spread = short_spread = np.nan
+        open_share = volume[timestamp - timestamp[0] < open_minutes * MINUTE_NS].sum() / total_volume
+        close_share = volume[timestamp[-1] - timestamp < close_minutes * MINUTE_NS].sum() / total_volume
+    return (vwap, realized_vol, float(high_time), float(low_time), long_spread, short_spread,
+            open_share, close_share)
+
+
+def iter_day_features(store, symbol, period='1', start=None, end=None, **kwargs):
+    """
+    逐日读取 BarStore 的内存映射分钟线并计算特征，产出 (交易日, 特征元组)
+    每次只访问一天的K线，多年的分钟线也只占常数内存
+    """
+    cols = store.columns(symbol, period)
+    days, starts, ends = store.day_index(symbol, period)
+    lo = 0 if start is None else np.searchsorted(days, np.datetime64(pd.Timestamp(start).date()), side='left')
+    hi = len(days) if end is None else np.searchsorted(days, np.datetime64(pd.Timestamp(end).date()), side='right')
+    for day, a, b in zip(days[lo:hi], starts[lo:hi], ends[lo:hi]):
+        yield day, day_features(*(np.asarray(cols[name][a:b]) for name in ['timestamp'] + store.COLUMNS), **kwargs)
+
+
+def iter_frame_features(minute_df, **kwargs):
+    """
+    同 iter_day_features，输入为分钟线 DataFrame (如 DataLoader.get_minute_data 的返回)
+    """
+    timestamp = minute_df.index.values.astype('datetime64[ns]').view(np.int64)
+    values = [minute_df[name].to_numpy(dtype=np.float64) for name in ['open', 'high', 'low', 'close', 'volume']]
+    day = timestamp // DAY_NS
+    bounds = np.r_[0, np.flatnonzero(day[1:] != day[:-1]) + 1, len(day)]
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        yield (np.datetime64(int(day[a]), 'D'),
+               day_features(timestamp[a:b], *(v[a:b] for v in values), **kwargs))
+
+
+def minute_features(source, symbol=None, period='1', start=None, end=None, **kwargs):
+    """
+    分钟线 -> 日线特征 DataFrame (日期索引，列为 FEATURES)，可直接 join 到日线表上
+    source: BarStore (需指定 symbol) 或分钟线 DataFrame
+    """
+    if isinstance(source, pd.DataFrame):
+        rows = iter_frame_features(source, **kwargs)
+    else:
+        rows = iter_day_features(source, symbol, period, start, end, **kwargs)
+    dates, values = [], []
+    for day, features in rows:
+        dates.append(day)
+        values.append(features)
+    index = pd.DatetimeIndex(np.array(dates, dtype='datetime64[ns]'), name='date')
+    return pd.DataFrame(np.array(values, dtype=np.float64).reshape(-1, len(FEATURES)), index=index, columns=FEATURES)
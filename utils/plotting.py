@@ -0,0 +1,9 @@
+def pyplot():
+    """
+    按需导入 matplotlib.pyplot 并使用无界面的 Agg 后端 (只写图片文件)
+    绘图是可选步骤，不绘图的运行无需承担 matplotlib 的导入开销
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
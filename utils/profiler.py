@@ -0,0 +1,222 @@
+import cProfile
+import datetime
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，进程峰值内存记为 None
+    resource = None
+
+
+def _max_rss_kb():
+    """
+    进程峰值常驻内存 (KB)：Linux 下 ru_maxrss 单位为 KB，macOS 为字节；不支持的平台返回 None
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def _rows(value):
+    # 统计阶段处理的行数：取返回值或第一个 DataFrame/数组参数的长度
+    if isinstance(value, tuple):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        return None
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+def default_targets():
+    """
+    默认插桩的流水线阶段：(类, 方法名) 列表
+    """
+    from utils.data_loader import DataLoader
+    from strategies.regime_detector import RegimeDetector
+    from strategies.maotai_t_strategy import MaotaiTStrategy
+    from strategies.backtester_v2 import BacktesterV2
+    from strategies.multi_period_predictor import MultiPeriodPredictor
+    from strategies.t_plus_0_backtester import TPlus0Backtester
+
+    return [
+        (DataLoader, 'get_data'), (DataLoader, 'get_index_data'), (DataLoader, 'get_daily_data'),
+        (DataLoader, 'get_minute_data'), (DataLoader, 'get_multi_period_data'),
+        (RegimeDetector, 'detect'),
+        (MaotaiTStrategy, 'generate_signals'),
+        (BacktesterV2, 'run'), (BacktesterV2, 'calculate_metrics'),
+        (MultiPeriodPredictor, 'predict_next_day'), (MultiPeriodPredictor, 'predict_series'),
+        (TPlus0Backtester, 'run'),
+    ]
+
+
+class Profiler:
+    """
+    流水线阶段插桩：
+    1. install() 时把各阶段方法替换为计时包装，uninstall() 还原；未启用时没有任何额外开销
+    2. 每个阶段记录调用次数、总耗时、处理行数及峰值内存
+    3. 运行结束写出 JSON 报告，可选 cProfile / tracemalloc 详细转储
+    """
+    active = None  # 当前已 install 的 Profiler
+
+    def __init__(self, output="profile.json", trace_memory=False, cprofile=False):
+        self.output = output
+        self.trace_memory = trace_memory
+        self.cprofile = cprofile
+        self.stages = {}
+        self._patched = []
+        self._profile = None
+        self._start = None
+        self._local = threading.local()  # 各线程正在执行的阶段，用于把嵌套阶段的内存峰值向外层传递
+
+    @classmethod
+    def from_env(cls):
+        """
+        根据环境变量 MAOTAI_PROFILE (报告路径) 创建，未设置时返回 None
+        MAOTAI_PROFILE_MODE 可取 memory / cprofile / all
+        """
+        output = os.environ.get("MAOTAI_PROFILE")
+        if not output:
+            return None
+        mode = os.environ.get("MAOTAI_PROFILE_MODE", "")
+        return cls(output, trace_memory=mode in ("memory", "all"), cprofile=mode in ("cprofile", "all"))
+
+    def _stats(self, name):
+        if name not in self.stages:
+            self.stages[name] = {'calls': 0, 'wall_time': 0.0, 'rows': 0,
+                                 'peak_memory': 0, 'max_rss_kb': 0}
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        手动计时一个阶段 (如绘图)
+        """
+        stats = self._stats(name)
+        if self.trace_memory:
+            self._flush_peak()
+            tracemalloc.reset_peak()
+        self._open().append(stats)
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats['wall_time'] += time.perf_counter() - start
+            stats['calls'] += 1
+            if rows:
+                stats['rows'] += rows
+            if self.trace_memory:
+                self._flush_peak()
+            self._open().pop()
+            stats['max_rss_kb'] = _max_rss_kb()
+
+    def _open(self):
+        if not hasattr(self._local, 'stages'):
+            self._local.stages = []
+        return self._local.stages
+
+    def _flush_peak(self):
+        # tracemalloc 只有一个全局峰值，重置前先记入所有未结束的阶段
+        peak = tracemalloc.get_traced_memory()[1]
+        for stats in self._open():
+            stats['peak_memory'] = max(stats['peak_memory'], peak)
+
+    def wrap(self, name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.stage(name) as stats:
+                result = func(*args, **kwargs)
+            rows = _rows(result)
+            if rows is None and len(args) > 1:
+                rows = _rows(args[1])
+            stats['rows'] += rows or 0
+            return result
+        return wrapper
+
+    def install(self, targets=None):
+        for cls, attr in targets or default_targets():
+            original = cls.__dict__[attr]
+            self._patched.append((cls, attr, original))
+            setattr(cls, attr, self.wrap(f"{cls.__name__}.{attr}", original))
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.cprofile:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._start = time.perf_counter()
+        Profiler.active = self
+        return self
+
+    def uninstall(self):
+        for cls, attr, original in reversed(self._patched):
+            setattr(cls, attr, original)
+        self._patched = []
+        Profiler.active = None
+        if self._profile is not None:
+            self._profile.disable()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def report(self):
+        return {
+            'timestamp': datetime.datetime.now().isoformat(),
+            'total_wall_time': time.perf_counter() - self._start if self._start else None,
+            # 各阶段记录的是阶段结束时的进程峰值
+            'max_rss_kb': _max_rss_kb(),
+            'trace_memory': self.trace_memory,
+            'stages': self.stages,
+        }
+
+    def dump(self):
+        """
+        写出 JSON 报告；启用 cProfile 时另存 <output>.prof
+        """
+        report = self.report()
+        with open(self.output, "w") as f:
+            json.dump(report, f, indent=2)
+        if self._profile is not None:
+            self._profile.dump_stats(os.path.splitext(self.output)[0] + ".prof")
+        return report
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc):
+        self.uninstall()
+        self.dump()
+        return False
+
+
+@contextmanager
+def profiled():
+    """
+    脚本入口使用：设置了 MAOTAI_PROFILE 时插桩整个运行过程，否则什么也不做
+    """
+    profiler = Profiler.from_env()
+    if profiler is None:
+        yield None
+        return
+    with profiler:
+        yield profiler
+    print(f"\n性能剖析报告已保存为 '{profiler.output}'")
+
+
+@contextmanager
+def stage(name):
+    """
+    为非方法调用的代码段 (如绘图) 计时；未启用剖析时不做任何事
+    """
+    if Profiler.active is None:
+        yield
+    else:
+        with Profiler.active.stage(name):
+            yield
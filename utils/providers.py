@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+
+import pandas as pd
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+MINUTE_COLUMNS = ['open', 'close', 'high', 'low', 'volume', 'amount', 'amplitude', 'pct_chg', 'turnover']
+
+
+def _empty_bars(columns, index_name='date'):
+    """
+    区间内没有交易日 (如只含周末/节假日) 时接口返回无列的空表，统一为带日期索引的空K线表
+    """
+    return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name=index_name), dtype=float)
+
+
+class AkShareProvider:
+    """
+    AkShare 数据源：返回统一列名 (open/high/low/close/volume) 的日期索引 DataFrame
+    timeout: 传给支持超时参数的接口 (个股日/周/月线) 的单次 HTTP 请求超时 (秒)
+    """
+    def __init__(self, timeout=20.0):
+        self.timeout = timeout
+
+    @staticmethod
+    def _code(symbol):
+        # sh600519 / sz000858 -> 600519 / 000858
+        return symbol[2:] if symbol[:2] in ("sh", "sz", "bj") else symbol
+
+    def fetch_stock(self, symbol, period, start_date, end_date):
+        import akshare as ak
+        df = ak.stock_zh_a_hist(symbol=self._code(symbol), period=period,
+                               start_date=start_date, end_date=end_date, adjust="qfq", timeout=self.timeout)
+        if df.empty:
+            return _empty_bars(OHLCV_COLUMNS)
+        df['date'] = pd.to_datetime(df['日期'])
+        df.set_index('date', inplace=True)
+        df = df[['开盘', '最高', '最低', '收盘', '成交量']]
+        df.columns = OHLCV_COLUMNS
+        return df
+
+    def fetch_index(self, symbol, start_date, end_date):
+        import akshare as ak
+        # 使用支持日期区间的接口，避免每次拉取全部历史
+        index_df = ak.stock_zh_index_daily_em(symbol=symbol, start_date=start_date, end_date=end_date)
+        if index_df.empty:
+            return _empty_bars(OHLCV_COLUMNS)
+        index_df['date'] = pd.to_datetime(index_df['date'])
+        index_df.set_index('date', inplace=True)
+        return index_df[OHLCV_COLUMNS]
+
+    def fetch_minute(self, symbol, period='1'):
+        import akshare as ak
+        df = ak.stock_zh_a_hist_min_em(symbol=self._code(symbol), period=period, adjust="qfq")
+        if df.empty:
+            return _empty_bars(MINUTE_COLUMNS, '时间')
+        df['时间'] = pd.to_datetime(df['时间'])
+        df.set_index('时间', inplace=True)
+        df.columns = MINUTE_COLUMNS
+        return df
+
+
+class FileProvider:
+    """
+    本地文件数据源 (测试及离线替身)：
+    root/<symbol>_<period>.csv 或 .parquet，第一列为日期索引；分钟线的 period 记为 'minute_<n>'
+    """
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, symbol, period):
+        for ext in ("parquet", "csv"):
+            path = os.path.join(self.root, f"{symbol}_{period}.{ext}")
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"缺少本地数据文件: {symbol}_{period}")
+
+    def _read(self, symbol, period):
+        path = self._path(symbol, period)
+        if path.endswith(".parquet"):
+            return pd.read_parquet(path)
+        return pd.read_csv(path, index_col=0, parse_dates=True)
+
+    def dump(self, symbol, period, df, fmt="csv"):
+        """
+        写入一份数据文件 (用于准备测试或离线数据)
+        """
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, f"{symbol}_{period}.{fmt}")
+        if fmt == "parquet":
+            df.to_parquet(path)
+        else:
+            df.to_csv(path)
+
+    def fetch_stock(self, symbol, period, start_date, end_date):
+        return self._read(symbol, period).loc[pd.Timestamp(start_date):pd.Timestamp(end_date)]
+
+    def fetch_index(self, symbol, start_date, end_date):
+        return self._read(symbol, "daily").loc[pd.Timestamp(start_date):pd.Timestamp(end_date)]
+
+    def fetch_minute(self, symbol, period='1'):
+        return self._read(symbol, f"minute_{period}")
+
+
+class ReplayProvider:
+    """
+    本地回放数据源：从 BarStore (内存映射的列式K线) 读取日/周/月/指数/分钟线，完全离线
+    返回的 DataFrame 是按日期区间切出的映射视图，不解析文本、不复制数据，
+    多年分钟线也只在访问时按页载入；数据可用 import_bars 从 AkShare 一次性导入
+    """
+    def __init__(self, store):
+        from utils.bar_store import BarStore
+        self.store = store if isinstance(store, BarStore) else BarStore(store)
+
+    def _read(self, symbol, period, start_date=None, end_date=None):
+        if not self.store.exists(symbol, period):
+            raise FileNotFoundError(f"回放库 {self.store.root} 中缺少 {symbol} {period} 数据")
+        return self.store.read(symbol, period, start_date, end_date)
+
+    def fetch_stock(self, symbol, period, start_date, end_date):
+        return self._read(symbol, period, start_date, end_date)
+
+    def fetch_index(self, symbol, start_date, end_date):
+        return self._read(symbol, "daily", start_date, end_date)
+
+    def fetch_minute(self, symbol, period='1'):
+        return self._read(symbol, str(period))
+
+
+def import_bars(store, symbols, start_date, end_date, index_symbols=(), periods=("daily", "weekly", "monthly"),
+                minute_periods=("1",), provider=None):
+    """
+    一次性从 AkShare (或其他数据源) 拉取行情并写入 BarStore，供 ReplayProvider 离线回放
+    已有数据按时间合并 (重复K线以新数据为准)；分钟线接口只返回最近几个交易日，重复导入可逐日积累
+    返回 {(标的, 周期): 写入后的K线数}
+    """
+    from utils.bar_store import BarStore
+    store = store if isinstance(store, BarStore) else BarStore(store)
+    provider = provider or RetryingProvider(AkShareProvider())
+
+    jobs = [(symbol, period, provider.fetch_stock, (symbol, period, start_date, end_date))
+            for symbol in symbols for period in periods]
+    jobs += [(symbol, "daily", provider.fetch_index, (symbol, start_date, end_date)) for symbol in index_symbols]
+    jobs += [(symbol, str(period), provider.fetch_minute, (symbol, str(period)))
+             for symbol in symbols for period in minute_periods]
+
+    counts = {}
+    for symbol, period, fetch, args in jobs:
+        print(f"导入 {symbol} {period} ...")
+        store.write(symbol, period, fetch(*args), append=True)
+        counts[(symbol, period)] = len(store.columns(symbol, period, [])["timestamp"])
+    return counts
+
+
+def _call_with_timeout(func, args, timeout):
+    """
+    在守护线程中调用 func，超过 timeout 秒抛出 TimeoutError
+    超时的线程无法强制终止，只是不再等待其结果；守护线程不会阻止进程退出
+    (线程池的工作线程在解释器退出时会被 join，卡住的请求会把等待推迟到退出时)
+    """
+    result = {}
+
+    def target():
+        try:
+            result['value'] = func(*args)
+        except BaseException as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=target, name="fetch", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"超时 ({timeout}s)")
+    if 'error' in result:
+        raise result['error']
+    return result['value']
+
+
+def _transient(error):
+    # 网络错误及超时 (requests 的异常均派生自 OSError) 才值得重试；缺少文件、数据解析错误等重试也不会成功
+    return isinstance(error, OSError) and not isinstance(error, FileNotFoundError)
+
+
+class RetryingProvider:
+    """
+    为任意数据源增加单次调用超时及有限次数的指数退避重试 (只重试网络错误及超时)
+    超时只是外层保护：底层请求应尽量自带超时 (如 AkShareProvider.timeout)，否则卡住的守护线程会一直占用连接
+    """
+    def __init__(self, provider, retries=3, backoff=1.0, timeout=30.0):
+        self.provider = provider
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+    def _call(self, name, *args):
+        func = getattr(self.provider, name)
+        for attempt in range(self.retries + 1):
+            try:
+                if self.timeout is None:
+                    return func(*args)
+                return _call_with_timeout(func, args, self.timeout)
+            except Exception as e:
+                if attempt == self.retries or not _transient(e):
+                    raise
+                wait = self.backoff * 2 ** attempt
+                print(f"{name}{args} 失败: {e}，{wait:.1f}s 后重试 ({attempt + 1}/{self.retries})")
+                time.sleep(wait)
+
+    def fetch_stock(self, symbol, period, start_date, end_date):
+        return self._call("fetch_stock", symbol, period, start_date, end_date)
+
+    def fetch_index(self, symbol, start_date, end_date):
+        return self._call("fetch_index", symbol, start_date, end_date)
+
+    def fetch_minute(self, symbol, period='1'):
+        return self._call("fetch_minute", symbol, period)
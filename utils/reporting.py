@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+from utils.plotting import pyplot
+
+REGIME_COLORS = {'Risk-On': 'green', 'Volatile': 'yellow', 'Risk-Off': 'red', 'Low-Liquidity': 'gray'}
+
+# 默认图宽 (像素) = figsize 宽度 x dpi
+DEFAULT_DPI = 100
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets 降采样：返回保留点的位置
+    首尾点固定保留，中间每个桶选出与前一保留点、后一桶均值构成三角形面积最大的点
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # 下一个桶 (最后一个桶的下一个即为末点)
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[nlo:nhi].mean()
+        avg_y = y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def minmax(y, n_buckets):
+    """
+    最小/最大值分桶降采样：每个桶保留最小值和最大值所在位置 (及首尾点)，峰谷不会被抹平
+    """
+    n = len(y)
+    if n_buckets * 2 >= n:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    rows = -(-n // size)
+    padded = np.full(rows * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(rows, size)
+    base = np.arange(rows) * size
+    idx = np.concatenate([base + np.nanargmin(padded, axis=1), base + np.nanargmax(padded, axis=1), [0, n - 1]])
+    return np.unique(idx)
+
+
+def downsample(series, width, method='lttb'):
+    """
+    将序列降采样到约 width 个像素可显示的点数 (NaN 点先剔除)
+    method: 'lttb' 保留约 width 个点；'minmax' 每像素保留最小/最大两个点
+    """
+    series = series.dropna()
+    if len(series) <= width * 2:
+        return series
+    y = series.to_numpy(dtype=np.float64)
+    if method == 'minmax':
+        idx = minmax(y, width)
+    else:
+        index = series.index
+        x = index.asi8.astype(np.float64) if isinstance(index, pd.DatetimeIndex) else np.arange(len(y), dtype=np.float64)
+        idx = lttb(x, y, width)
+    return series.iloc[idx]
+
+
+def regime_spans(regime):
+    """
+    将逐日状态合并为连续区间：[(起始日期, 结束日期, 状态)]
+    结束日期取下一区间的起始日，使相邻色块首尾相接
+    """
+    values = regime.to_numpy()
+    if len(values) == 0:
+        return []
+    starts = np.r_[0, np.flatnonzero(values[1:] != values[:-1]) + 1]
+    ends = np.r_[starts[1:], len(values) - 1]
+    index = regime.index
+    return [(index[s], index[e], values[s]) for s, e in zip(starts, ends)]
+
+
+def draw_regimes(ax, regime, colors=REGIME_COLORS, alpha=0.2, max_spans=None):
+    """
+    每段连续状态一个 axvspan (而不是每个状态一次覆盖全区间的 fill_between)
+    区间数超过 max_spans (通常为图宽像素数，如分钟线频繁切换) 时，同一状态的区间合并为一个图形对象绘制
+    """
+    spans = regime_spans(regime)
+    if max_spans is not None and len(spans) > max_spans:
+        from matplotlib.collections import PolyCollection
+        from matplotlib.dates import date2num
+
+        # x 为数据坐标、y 为坐标轴比例 (0~1)，与 axvspan 相同
+        transform = ax.get_xaxis_transform()
+        for name, color in colors.items():
+            runs = [(start, end) for start, end, value in spans if value == name]
+            if not runs:
+                continue
+            x = np.asarray(runs)
+            if isinstance(regime.index, pd.DatetimeIndex):
+                x = date2num(pd.DatetimeIndex(x.ravel())).reshape(-1, 2)
+            verts = [[(a, 0), (a, 1), (b, 1), (b, 0)] for a, b in x]
+            ax.add_collection(PolyCollection(verts, transform=transform, facecolor=color, alpha=alpha,
+                                             linewidth=0, label=name))
+        ax.autoscale_view()
+        return
+
+    labeled = set()
+    for start, end, name in spans:
+        if name not in colors:
+            continue
+        label = name if name not in labeled else None
+        labeled.add(name)
+        ax.axvspan(start, end, color=colors[name], alpha=alpha, linewidth=0, label=label)
+
+
+def render_report(path, panels, title=None, width=14, height_per_panel=4, dpi=DEFAULT_DPI, method='lttb'):
+    """
+    多面板报告一次渲染并写入文件，所有曲线按图宽 (像素) 降采样
+    panels: 字典列表，可用的键：
+        lines:  {标签: Series 或 (Series, 绘图参数字典)}
+        fill:   (Series, 绘图参数字典)，以 0 为基线填充 (如回撤)，按 minmax 降采样
+        regime: 状态 Series，绘制为背景色块
+        vlines: 竖线日期列表
+        title / ylabel / ylim / height (相对高度) / legend (图例位置)
+    """
+    plt = pyplot()
+    pixels = int(width * dpi)
+    heights = [p.get('height', 1) for p in panels]
+    fig, axes = plt.subplots(len(panels), 1, figsize=(width, height_per_panel * sum(heights)),
+                             dpi=dpi, sharex=True, squeeze=False, gridspec_kw={'height_ratios': heights})
+    for ax, panel in zip(axes[:, 0], panels):
+        if panel.get('regime') is not None:
+            draw_regimes(ax, panel['regime'], max_spans=pixels)
+        for label, line in panel.get('lines', {}).items():
+            series, style = line if isinstance(line, tuple) else (line, {})
+            points = downsample(series, pixels, method)
+            ax.plot(points.index, points.to_numpy(), label=label, **style)
+        if panel.get('fill') is not None:
+            series, style = panel['fill']
+            points = downsample(series, pixels, 'minmax')
+            ax.fill_between(points.index, points.to_numpy(), 0, **style)
+        for x in panel.get('vlines', []):
+            ax.axvline(x, color='gray', alpha=0.3, linestyle='--')
+        if panel.get('title'):
+            ax.set_title(panel['title'])
+        if panel.get('ylabel'):
+            ax.set_ylabel(panel['ylabel'])
+        if panel.get('ylim'):
+            ax.set_ylim(*panel['ylim'])
+        if ax.get_legend_handles_labels()[0]:
+            # loc='best' 需要遍历所有图形对象寻找空白处，数据量大时很慢
+            ax.legend(loc=panel.get('legend', 'upper left'))
+        ax.grid(True, alpha=0.3)
+    if title:
+        fig.suptitle(title)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+    return path
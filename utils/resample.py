@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+# 周线按自然周 (周一至周日)、月线按自然月分组，只包含实际有日线的交易日
+PERIOD_RULES = {'weekly': 'W-SUN', 'monthly': 'M'}
+
+AGGREGATIONS = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+
+def _period_groups(index, period):
+    """
+    返回 (分组键, 每组最后一个交易日)，后者作为K线日期
+    """
+    groups = index.to_period(PERIOD_RULES[period])
+    codes = np.asarray(groups.asi8)
+    last = np.r_[np.flatnonzero(codes[1:] != codes[:-1]), len(codes) - 1] if len(codes) else []
+    dates = index[last]
+    dates.name = index.name
+    return groups, dates
+
+
+def resample_ohlcv(daily, period):
+    """
+    由日线聚合周线/月线，K线日期取该周期内最后一个交易日 (与 AkShare 周/月线一致)
+    """
+    groups, dates = _period_groups(daily.index, period)
+    agg = {col: how for col, how in AGGREGATIONS.items() if col in daily.columns}
+    out = daily[list(agg)].groupby(groups).agg(agg)
+    out.index = dates
+    return out
+
+
+def resample_panel(panel, period):
+    """
+    面板版本：{字段: 日期 x 标的 DataFrame} -> 周/月线面板，各标的共用面板的交易日历
+    first / last 跳过空值，区间中途上市的标的取上市后的首个开盘价；整个周期都未上市时为空
+    """
+    groups, dates = _period_groups(panel['close'].index, period)
+    out = {}
+    for field, how in AGGREGATIONS.items():
+        if field in panel:
+            out[field] = panel[field].groupby(groups).agg(how)
+            out[field].index = dates
+    return out
+
+
+def asof_index(daily_index, period_index):
+    """
+    预计算 日线 -> 周/月线 的 as-of 位置：
+    第 i 个交易日可见的周期K线数量 (即 period_index <= daily_index[i] 的个数)
+    替代逐日的 period_df.index <= current_date 布尔掩码
+    """
+    return np.searchsorted(period_index.values, daily_index.values, side='right')
+
+
+class IncrementalResampler:
+    """
+    增量周/月线聚合：
+    新日线到来时只更新当前未走完的周期K线，已完成的周期不再重算
+    """
+    def __init__(self, period):
+        self.rule = PERIOD_RULES[period]
+        self.dates = []
+        self.bars = []          # 已完成周期的 [open, high, low, close, volume]
+        self.current = None     # 当前未走完周期的K线
+        self.current_key = None
+        self.current_date = None
+
+    def update(self, date, open_, high, low, close, volume):
+        """
+        加入一根日线；返回 True 表示上一个周期在这根日线之前已经走完
+        """
+        key = pd.Timestamp(date).to_period(self.rule)
+        closed = False
+        if self.current is not None and key != self.current_key:
+            self.dates.append(self.current_date)
+            self.bars.append(self.current)
+            closed = True
+        if self.current is None or closed:
+            self.current = [open_, high, low, close, volume]
+            self.current_key = key
+        else:
+            bar = self.current
+            bar[1] = max(bar[1], high)
+            bar[2] = min(bar[2], low)
+            bar[3] = close
+            bar[4] += volume
+        self.current_date = pd.Timestamp(date)
+        return closed
+
+    def extend(self, daily):
+        for row in zip(daily.index, daily['open'], daily['high'], daily['low'],
+                       daily['close'], daily['volume']):
+            self.update(*row)
+        return self
+
+    def frame(self, include_current=True):
+        """
+        返回已聚合的周期K线 DataFrame (默认包含当前未走完的周期)
+        """
+        dates, bars = list(self.dates), list(self.bars)
+        if include_current and self.current is not None:
+            dates.append(self.current_date)
+            bars.append(self.current)
+        index = pd.DatetimeIndex(dates, name='date')
+        return pd.DataFrame(bars, index=index, columns=list(AGGREGATIONS), dtype=np.float64)
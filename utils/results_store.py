@@ -0,0 +1,172 @@
+import json
+import os
+import subprocess
+import uuid
+
+import numpy as np
+import pandas as pd
+
+# 这些列 (累计净值、资产价值、现金) 保留 float64，其余浮点列降为 float32
+FLOAT64_KEYWORDS = ('nav', 'value', 'cash')
+
+# 取值个数不超过行数该比例的字符串列存为分类 (字典编码)
+CATEGORY_RATIO = 0.5
+
+
+def code_version():
+    """
+    当前代码版本 (git commit)，不在 git 仓库中时返回 None
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return None
+    return commit or None
+
+
+def compact(df, float64=()):
+    """
+    压缩列类型：浮点降为 float32 (FLOAT64_KEYWORDS 及 float64 指定的列除外)，
+    整数取最小宽度，重复度高的字符串列 (如 regime / trade_type) 转为分类
+    """
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        name = str(col)
+        if pd.api.types.is_float_dtype(s.dtype):
+            keep = name in float64 or any(k in name for k in FLOAT64_KEYWORDS)
+            out[col] = s if keep else s.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(s.dtype) or pd.api.types.is_bool_dtype(s.dtype):
+            out[col] = s if pd.api.types.is_bool_dtype(s.dtype) else pd.to_numeric(s, downcast='integer')
+        elif (pd.api.types.is_object_dtype(s.dtype) or pd.api.types.is_string_dtype(s.dtype)) \
+                and s.nunique(dropna=False) <= max(len(s) * CATEGORY_RATIO, 1):
+            out[col] = s.astype('category')
+        else:
+            out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+class ResultsStore:
+    """
+    回测结果存储：
+    1. 每次运行写为一个压缩的 Arrow (Feather v2) 列式文件，列类型经 compact 压缩
+    2. 运行元数据 (类型、参数、数据区间、代码版本、汇总指标) 写入文件及 index.json 索引
+    3. 按元数据查询运行，按需读取部分运行/部分列，读取时使用内存映射，不解析文本
+    """
+    INDEX_FILE = "index.json"
+
+    def __init__(self, root="results", compression="zstd"):
+        self.root = root
+        self.compression = compression  # 'zstd' / 'lz4' / 'uncompressed' (可零拷贝映射)
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, run_id):
+        return os.path.join(self.root, f"{run_id}.arrow")
+
+    def _index_path(self):
+        return os.path.join(self.root, self.INDEX_FILE)
+
+    def _read_index(self):
+        path = self._index_path()
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_index(self, records):
+        # 先写临时文件再替换，避免中途失败留下损坏的索引
+        tmp = self._index_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(records, f, indent=1, ensure_ascii=False, default=_json_default)
+        os.replace(tmp, self._index_path())
+
+    def save(self, df, kind, params=None, metrics=None, run_id=None, float64=()):
+        """
+        保存一次运行，返回 run_id
+        kind: 运行类型 (如 regime / multi_period / sweep)；params / metrics 为可 JSON 序列化的字典
+        """
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        run_id = run_id or f"{pd.Timestamp.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:6]}"
+        data = compact(df, float64)
+        is_dates = isinstance(df.index, pd.DatetimeIndex)
+        record = {
+            'run_id': run_id,
+            'kind': kind,
+            'created': pd.Timestamp.now().isoformat(),
+            'code_version': code_version(),
+            'params': params or {},
+            'metrics': metrics or {},
+            'rows': len(df),
+            'columns': [str(c) for c in data.columns],
+            'data_start': df.index[0].isoformat() if is_dates and len(df) else None,
+            'data_end': df.index[-1].isoformat() if is_dates and len(df) else None,
+        }
+
+        table = pa.Table.from_pandas(data, preserve_index=True)
+        meta = dict(table.schema.metadata or {})
+        meta[b'maotai_run'] = json.dumps(record, ensure_ascii=False, default=_json_default).encode()
+        feather.write_feather(table.replace_schema_metadata(meta), self._path(run_id),
+                              compression=self.compression)
+
+        records = [r for r in self._read_index() if r['run_id'] != run_id]
+        records.append(record)
+        self._write_index(records)
+        return run_id
+
+    def query(self, kind=None, **params):
+        """
+        按运行类型及参数值筛选，返回索引表 (每次运行一行，参数展开为 params.<name> 列)
+        """
+        records = self._read_index()
+        if kind is not None:
+            records = [r for r in records if r['kind'] == kind]
+        for name, value in params.items():
+            records = [r for r in records if r['params'].get(name) == value]
+        if not records:
+            return pd.DataFrame(columns=['run_id', 'kind', 'created', 'rows'])
+        return pd.json_normalize(records).set_index('run_id')
+
+    def metadata(self, run_id):
+        for record in self._read_index():
+            if record['run_id'] == run_id:
+                return record
+        raise KeyError(f"没有该运行: {run_id}")
+
+    def load(self, run_id, columns=None):
+        """
+        读取一次运行 (可只读取部分列)，文件以内存映射方式打开
+        """
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        path = self._path(run_id)
+        if columns is not None:
+            # 日期索引以普通列存储，需一并读取
+            with pa.memory_map(path) as source:
+                schema = pa.ipc.open_file(source).schema
+            index_cols = [c for c in json.loads(schema.metadata[b'pandas'])['index_columns']
+                          if isinstance(c, str)]
+            columns = list(dict.fromkeys(index_cols + list(columns)))
+        return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+    def load_many(self, run_ids, columns=None):
+        """
+        读取多次运行并按 run_id 纵向拼接
+        """
+        return pd.concat({run_id: self.load(run_id, columns) for run_id in run_ids}, names=['run_id'])
+
+    def delete(self, run_id):
+        os.remove(self._path(run_id))
+        self._write_index([r for r in self._read_index() if r['run_id'] != run_id])
+
+
+def _json_default(value):
+    # numpy 标量 / 时间戳等转为 JSON 原生类型
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    raise TypeError(f"无法序列化: {type(value)}")
@@ -0,0 +1,171 @@
+import math
+import sys
+from collections import deque
+
+
+class RollingMean:
+    """
+    O(1) 增量滚动均值：每来一个新值只做一次加、一次减
+    累加方式与 pandas rolling().mean() 一致 (Kahan 补偿求和)，
+    因此逐根更新的结果与对整段历史调用 rolling(window).mean() 完全相同
+    """
+    def __init__(self, window, min_periods=None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque()
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.neg_ct = 0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same_ct = 0
+        self.prev_value = math.nan
+
+    def update(self, value):
+        """
+        加入新值并返回当前窗口均值 (样本不足时返回 NaN)
+        """
+        self.values.append(value)
+        if len(self.values) > self.window:
+            self._remove(self.values.popleft())
+        self._add(value)
+        return self.value
+
+    def __deepcopy__(self, memo):
+        # 状态只有标量和数值 deque，浅拷贝属性并复制 deque 即可 (盘中试算/预测时频繁复制)
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone.values = deque(self.values)
+        return clone
+
+    @property
+    def value(self):
+        if self.nobs >= self.min_periods and self.nobs > 0:
+            if self.same_ct >= self.nobs:
+                return self.prev_value
+            result = self.sum_x / self.nobs
+            if self.neg_ct == 0 and result < 0:
+                return 0.0
+            if self.neg_ct == self.nobs and result > 0:
+                return 0.0
+            return result
+        return math.nan
+
+    def _add(self, val):
+        if val != val:
+            return
+        self.nobs += 1
+        y = val - self.comp_add
+        t = self.sum_x + y
+        self.comp_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct += 1
+        if val == self.prev_value:
+            self.same_ct += 1
+        else:
+            self.same_ct = 1
+        self.prev_value = val
+
+    def _remove(self, val):
+        if val != val:
+            return
+        self.nobs -= 1
+        y = -val - self.comp_remove
+        t = self.sum_x + y
+        self.comp_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct -= 1
+
+
+class RollingStd:
+    """
+    O(1) 增量滚动标准差 (ddof=1)
+    与 pandas rolling().std() 相同的 Welford + Kahan 更新方式 (出现数值不稳定时按窗口重算)，
+    逐根结果与批量计算完全一致
+    window=None 时为扩展窗口 (等价于 expanding().std())
+    """
+    # pandas 判定数值不稳定的阈值：平方和缩小到原来的 1e3 * eps 以下
+    INV_COND_TOL = sys.float_info.epsilon * 1e3
+
+    def __init__(self, window=None, min_periods=None, ddof=1):
+        self.window = window
+        if min_periods is None:
+            min_periods = window if window is not None else 1
+        self.min_periods = max(min_periods, 1)
+        self.ddof = ddof
+        self.values = deque()
+        self._reset()
+
+    def _reset(self):
+        self.nobs = 0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.unstable = False
+
+    def update(self, value):
+        """
+        加入新值并返回当前窗口标准差 (样本不足时返回 NaN)
+        """
+        if self.window is not None:
+            self.values.append(value)
+            if len(self.values) > self.window:
+                self._remove(self.values.popleft())
+        self._add(value)
+        if self.unstable and self.window is not None:
+            # 可能出现灾难性抵消，对当前窗口重新累加
+            self._reset()
+            for val in self.values:
+                self._add(val)
+            self.unstable = False
+        return self.value
+
+    def __deepcopy__(self, memo):
+        # 状态只有标量和数值 deque，浅拷贝属性并复制 deque 即可 (盘中试算/预测时频繁复制)
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone.values = deque(self.values)
+        return clone
+
+    @property
+    def value(self):
+        if self.nobs >= self.min_periods and self.nobs > self.ddof:
+            var = self.ssqdm_x / (self.nobs - self.ddof)
+            return math.sqrt(var) if var >= 0 else 0.0
+        return math.nan
+
+    def _add(self, val):
+        if val != val:
+            return
+        prev_m2 = self.ssqdm_x
+        self.nobs += 1
+        prev_mean = self.mean_x - self.comp_add
+        y = val - self.comp_add
+        t = y - self.mean_x
+        self.comp_add = t + self.mean_x - y
+        self.mean_x = self.mean_x + t / self.nobs
+        self.ssqdm_x = self.ssqdm_x + (val - prev_mean) * (val - self.mean_x)
+        if prev_m2 * self.INV_COND_TOL > self.ssqdm_x:
+            self.unstable = True
+
+    def _remove(self, val):
+        if val != val:
+            return
+        prev_m2 = self.ssqdm_x
+        self.nobs -= 1
+        if self.nobs:
+            prev_mean = self.mean_x - self.comp_remove
+            y = val - self.comp_remove
+            t = y - self.mean_x
+            self.comp_remove = t + self.mean_x - y
+            self.mean_x = self.mean_x - t / self.nobs
+            self.ssqdm_x = self.ssqdm_x - (val - prev_mean) * (val - self.mean_x)
+            if prev_m2 * self.INV_COND_TOL > self.ssqdm_x:
+                self.unstable = True
+        else:
+            self.mean_x = 0.0
+            self.ssqdm_x = 0.0
+            self.unstable = False
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+
+
+class SharedFrame:
+    """
+    共享内存中的数值型 DataFrame：
+    主进程只加载一次行情，子进程按名字挂载同一块内存，避免每个任务 pickle 整份数据
+    布局：float64 矩阵，第 0 列为日期 (int64 纳秒)，其余为数据列
+    """
+    def __init__(self, df):
+        values = np.empty((len(df), len(df.columns) + 1), dtype=np.float64)
+        values[:, 0] = df.index.values.astype('datetime64[ns]').view(np.int64).view(np.float64)
+        values[:, 1:] = df.to_numpy(dtype=np.float64)
+
+        self.shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        buf = np.ndarray(values.shape, dtype=np.float64, buffer=self.shm.buf)
+        buf[:] = values
+        self.spec = {
+            'name': self.shm.name,
+            'shape': values.shape,
+            'columns': list(df.columns),
+            'index_name': df.index.name,
+        }
+
+    @staticmethod
+    def attach(spec):
+        """
+        在子进程中挂载共享内存，返回 (SharedMemory 句柄, DataFrame)
+        句柄需保持引用，否则底层内存会被提前释放
+        """
+        shm = shared_memory.SharedMemory(name=spec['name'])
+        buf = np.ndarray(spec['shape'], dtype=np.float64, buffer=shm.buf)
+        index = pd.DatetimeIndex(buf[:, 0].view(np.int64).view('datetime64[ns]'), name=spec['index_name'])
+        df = pd.DataFrame(buf[:, 1:], index=index, columns=spec['columns'], copy=False)
+        return shm, df
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# 与 DataLoader 输出一致的列
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# 超过交易日历可表示范围 (pandas 时间戳上限 2262 年) 时改用分钟间隔
+MAX_BUSINESS_DAYS = 60000
+
+
+def generate_ohlcv(n, seed=0, start_price=1500.0, daily_vol=0.018, freq=None, start="2000-01-03"):
+    """
+    生成确定性的合成 OHLCV (几何随机游走)，列结构与 DataLoader.get_data 相同
+    freq: 默认交易日 ('B')，数量超出日历范围时自动使用分钟间隔
+    """
+    rng = np.random.default_rng(seed)
+    if freq is None:
+        freq = 'B' if n <= MAX_BUSINESS_DAYS else 'min'
+    index = pd.date_range(start, periods=n, freq=freq, name='date')
+
+    close = np.round(start_price * np.exp(np.cumsum(rng.normal(0, daily_vol, n))), 2)
+    prev_close = np.r_[start_price, close[:-1]]
+    open_ = np.round(prev_close * (1 + rng.normal(0, daily_vol / 3, n)), 2)
+    high = np.round(np.maximum(open_, close) * (1 + np.abs(rng.normal(0, daily_vol / 2, n))), 2)
+    low = np.round(np.minimum(open_, close) * (1 - np.abs(rng.normal(0, daily_vol / 2, n))), 2)
+    volume = rng.integers(10000, 60000, n).astype(np.float64)
+
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume},
+                        index=index)
+
+
+def aggregate_bars(df, bars_per_group):
+    """
+    每 bars_per_group 根K线聚合为一根，时间戳取组内最后一根 (与 AkShare 周/月线一致)
+    """
+    groups = np.arange(len(df)) // bars_per_group
+    agg = df.groupby(groups).agg({'open': 'first', 'high': 'max', 'low': 'min',
+                                  'close': 'last', 'volume': 'sum'})
+    last = np.r_[np.flatnonzero(np.diff(groups)), len(df) - 1]
+    agg.index = df.index[last]
+    return agg
+
+
+def generate_multi_period(n, seed=0):
+    """
+    生成日/周/月三周期数据及指数收盘价，结构同 DataLoader.get_multi_period_data
+    周线按 5 根、月线按 21 根日线聚合
+    """
+    daily = generate_ohlcv(n, seed)
+    index_df = generate_ohlcv(n, seed + 1, start_price=3500.0, daily_vol=0.012)
+    daily['index_close'] = index_df['close'].to_numpy()
+    weekly = aggregate_bars(daily[OHLCV_COLUMNS], 5)
+    monthly = aggregate_bars(daily[OHLCV_COLUMNS], 21)
+    return daily, weekly, monthly
+
+
+def generate_minute(days, seed=0, bars_per_day=240, start="2020-01-02", start_price=1500.0):
+    """
+    生成 A 股交易时段的 1 分钟K线 (9:31-11:30, 13:01-15:00，每日 240 根)
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=days)
+    # 每根K线距零点的分钟数
+    session = np.r_[np.arange(9 * 60 + 31, 11 * 60 + 31), np.arange(13 * 60 + 1, 15 * 60 + 1)][:bars_per_day]
+    offsets = pd.to_timedelta(session, unit='min')
+    index = (dates.values[:, None] + offsets.values[None, :]).ravel()
+
+    n = len(index)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.0012, n)))
+    open_ = np.r_[start_price, close[:-1]]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.0003, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.0003, n)))
+    volume = rng.integers(100, 2000, n).astype(np.float64)
+
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume},
+                        index=pd.DatetimeIndex(index, name='date'))